@@ -1,13 +1,9 @@
 import streamlit as st
-import sympy as sp
-from sympy import symbols, sympify, solve, diff, integrate, Rational
-import numpy as np
-import matplotlib.pyplot as plt
-import plotly.graph_objects as go
 from components.math_input import create_math_input
 from components.solution_display import display_solution
-from utils.calculator import evaluate_expression, solve_integral
-from utils.plotting import plot_function, plot_integral
+from utils.calculator import compile_expression
+from components.cached_compute import cached_solve_integral, plot_integral
+from utils.tracing import collect_trace, start_metrics_server
 import streamlit.components.v1 as components
 from components.math_keyboard import math_keyboard
 
@@ -90,6 +86,9 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
+# Endpoint /metrics para Prometheus (solo si CALCUMASTER_METRICS_PORT está definido)
+start_metrics_server()
+
 # Initialize session state variables if they don't exist
 if 'function_str' not in st.session_state:
     st.session_state.function_str = "x^2"
@@ -119,7 +118,7 @@ st.markdown("La herramienta interactiva para resolver y visualizar problemas de
 # Main mode selection
 app_mode = st.selectbox(
     "Selecciona un Modo",
-    ["Inicio", "Integrales Definidas", "Sumas de Riemann", "Área Entre Curvas", "Aplicaciones de Ingeniería", "Escenarios de Ingeniería de Software"],
+    ["Inicio", "Integrales Definidas", "Sumas de Riemann", "Área Entre Curvas", "Aplicaciones de Ingeniería", "Escenarios de Ingeniería de Software", "Administración de Caché"],
     key="app_mode_select"
 )
 
@@ -158,8 +157,7 @@ if app_mode == "Inicio":
     
     # Preview the expression with LaTeX
     try:
-        expr = sp.sympify(function_input.replace("^", "**"))
-        st.latex(expr)
+        st.latex(compile_expression(function_input).latex)
     except Exception as e:
         st.warning("La expresión ingresada no es válida. Por favor, revisa la sintaxis.")
     
@@ -179,18 +177,19 @@ if app_mode == "Inicio":
             # Obtener la función de entrada actual
             function_str = st.session_state.function_str
             
-            # Calculate the integral
-            result, steps = solve_integral(function_str, lower_bound, upper_bound)
-            
-            # Display solution in a styled box
-            st.markdown("<div class='solution-box'>", unsafe_allow_html=True)
-            st.subheader("Solución")
-            
-            # Plot the function and shade the area
-            plot_integral(function_str, lower_bound, upper_bound)
+            with collect_trace("definite_integral") as trace:
+                # Calculate the integral
+                result, steps = cached_solve_integral(function_str, lower_bound, upper_bound)
+                
+                # Display solution in a styled box
+                st.markdown("<div class='solution-box'>", unsafe_allow_html=True)
+                st.subheader("Solución")
+                
+                # Plot the function and shade the area
+                plot_integral(function_str, lower_bound, upper_bound)
             
             # Display solution
-            display_solution(function_str, lower_bound, upper_bound, result, steps)
+            display_solution(function_str, lower_bound, upper_bound, result, steps, trace=trace)
             
             st.markdown("</div>", unsafe_allow_html=True)
             
@@ -340,6 +339,10 @@ elif app_mode == "Aplicaciones de Ingeniería":
 elif app_mode == "Escenarios de Ingeniería de Software":
     import pages.software_engineering_scenarios
     pages.software_engineering_scenarios.show()
+    
+elif app_mode == "Administración de Caché":
+    import pages.cache_admin
+    pages.cache_admin.show()
 
 # Footer - Hidden by CSS but keeping for accessibility
 st.markdown("---")
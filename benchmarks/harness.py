@@ -0,0 +1,152 @@
+import gc
+import json
+import os
+import platform
+import time
+import tracemalloc
+import numpy as np
+
+# Crecimiento mínimo del pico de memoria (bytes) considerado regresión; por debajo es ruido
+MEMORY_NOISE_FLOOR = 256 * 1024
+
+class Benchmark:
+    """
+    A named group of timed calls.
+    
+    Each case is a zero-argument callable (typically one function of a
+    catalog); every repeat times every case once, so the latency
+    distribution covers the whole workload. setup, when given, runs before
+    every call and is not timed (e.g. to empty a cache).
+    """
+    
+    def __init__(self, name, cases, setup=None, repeat=5):
+        self.name = name
+        self.cases = cases
+        self.setup = setup
+        self.repeat = repeat
+
+def _timed_call(benchmark, case):
+    if benchmark.setup:
+        benchmark.setup()
+    start = time.perf_counter()
+    case()
+    return time.perf_counter() - start
+
+def run_benchmark(benchmark, measure_memory=True):
+    """
+    Time a benchmark and measure its peak memory.
+    
+    The first call of every case is a warm-up and is not recorded. Peak
+    memory is the largest tracemalloc peak of one traced call per case
+    (Python and NumPy allocations), measured after the timings so tracing
+    does not slow them down.
+    
+    Args:
+        benchmark (Benchmark): Benchmark to run
+        measure_memory (bool): Whether to trace memory
+    
+    Returns:
+        dict: samples, errors, min, mean, p50, p90, p99, max (seconds) and peak_memory (bytes)
+    """
+    samples = []
+    errors = 0
+    working = []
+    for case in benchmark.cases:
+        try:
+            _timed_call(benchmark, case)
+            working.append(case)
+        except Exception:
+            errors += 1
+    
+    for _ in range(benchmark.repeat):
+        for case in working:
+            samples.append(_timed_call(benchmark, case))
+    
+    peak_memory = None
+    if measure_memory and working:
+        peak_memory = 0
+        for case in working:
+            if benchmark.setup:
+                benchmark.setup()
+            gc.collect()
+            tracemalloc.start()
+            try:
+                case()
+                peak_memory = max(peak_memory, tracemalloc.get_traced_memory()[1])
+            finally:
+                tracemalloc.stop()
+    
+    stats = {"samples": len(samples), "errors": errors, "peak_memory": peak_memory}
+    if samples:
+        values = np.array(samples)
+        stats.update({
+            "min": float(values.min()),
+            "mean": float(values.mean()),
+            "p50": float(np.percentile(values, 50)),
+            "p90": float(np.percentile(values, 90)),
+            "p99": float(np.percentile(values, 99)),
+            "max": float(values.max())
+        })
+    return stats
+
+def environment_info():
+    """Describe the machine and library versions a result was measured on."""
+    import scipy
+    import sympy
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "numpy": np.__version__,
+        "scipy": scipy.__version__,
+        "sympy": sympy.__version__
+    }
+
+def save_results(path, results):
+    """Write benchmark results (with the environment) as a JSON baseline."""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"environment": environment_info(), "results": results}, f, indent=2, sort_keys=True)
+
+def load_results(path):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)["results"]
+
+def compare_results(results, baseline, threshold=0.2, metric="p50"):
+    """
+    Compare results against a baseline.
+    
+    Args:
+        results (dict): Benchmark name -> stats from run_benchmark
+        baseline (dict): Benchmark name -> stats of the baseline
+        threshold (float): Relative slowdown (or memory growth above
+            MEMORY_NOISE_FLOOR) reported as a regression
+        metric (str): Latency statistic compared
+    
+    Returns:
+        list: One dict per benchmark present in both, with name, baseline,
+              current, ratio, memory_ratio and regression
+    """
+    comparison = []
+    for name, stats in results.items():
+        previous = baseline.get(name)
+        if not previous or metric not in stats or metric not in previous:
+            continue
+        ratio = stats[metric] / previous[metric] if previous[metric] else float("inf")
+        memory_ratio = None
+        memory_regression = False
+        if stats.get("peak_memory") and previous.get("peak_memory"):
+            memory_ratio = stats["peak_memory"] / previous["peak_memory"]
+            memory_regression = (memory_ratio > 1 + threshold
+                                 and stats["peak_memory"] - previous["peak_memory"] > MEMORY_NOISE_FLOOR)
+        comparison.append({
+            "name": name,
+            "baseline": previous[metric],
+            "current": stats[metric],
+            "ratio": ratio,
+            "memory_ratio": memory_ratio,
+            "regression": ratio > 1 + threshold or memory_regression
+        })
+    return comparison
@@ -0,0 +1,91 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Tiempo máximo de importación en frío (segundos) de cada módulo de cálculo
+IMPORT_BUDGETS = {
+    "utils.calculator": 0.8,
+    "utils.riemann_sum": 0.8,
+    "utils.area_calculator": 0.8,
+    "utils.batch_integration": 0.9,
+    "calcumaster": 0.9
+}
+
+# Bibliotecas que los módulos de cálculo no deben cargar al importarse
+FORBIDDEN_MODULES = ("streamlit", "plotly", "matplotlib", "scipy")
+
+_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{"elapsed": elapsed, "loaded": [m for m in {forbidden!r} if m in sys.modules]}}))
+"""
+
+def measure_import(module, repeat=3):
+    """
+    Import a module in fresh interpreters and report its cold import time.
+    
+    Args:
+        module (str): Dotted module name
+        repeat (int): Number of fresh interpreters; the fastest run is kept
+    
+    Returns:
+        dict: elapsed (seconds, best of repeat) and loaded (forbidden libraries imported)
+    """
+    best = None
+    for _ in range(repeat):
+        output = subprocess.run(
+            [sys.executable, "-c", _PROBE.format(module=module, forbidden=FORBIDDEN_MODULES)],
+            cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout
+        run = json.loads(output.strip().splitlines()[-1])
+        if best is None or run["elapsed"] < best["elapsed"]:
+            best = run
+    return best
+
+def check_import_budgets(budgets=IMPORT_BUDGETS, scale=1.0, repeat=3):
+    """
+    Check every module against its import-time budget.
+    
+    Args:
+        budgets (dict): Module name -> budget in seconds
+        scale (float): Factor applied to every budget (for slower machines)
+        repeat (int): Fresh interpreters per module
+    
+    Returns:
+        list: One dict per module with module, elapsed, budget, loaded and ok
+    """
+    report = []
+    for module, budget in budgets.items():
+        run = measure_import(module, repeat)
+        limit = budget * scale
+        report.append({
+            "module": module,
+            "elapsed": run["elapsed"],
+            "budget": limit,
+            "loaded": run["loaded"],
+            "ok": run["elapsed"] <= limit and not run["loaded"]
+        })
+    return report
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Presupuesto de tiempo de importación de los módulos de cálculo")
+    parser.add_argument("--scale", type=float, default=float(os.environ.get("CALCUMASTER_IMPORT_BUDGET_SCALE", 1.0)),
+                        help="Factor aplicado a todos los presupuestos")
+    parser.add_argument("--repeat", type=int, default=3, help="Intérpretes nuevos por módulo")
+    args = parser.parse_args(argv)
+    
+    report = check_import_budgets(scale=args.scale, repeat=args.repeat)
+    for row in report:
+        status = "ok" if row["ok"] else "FALLO"
+        loaded = f" (carga {', '.join(row['loaded'])})" if row["loaded"] else ""
+        print(f"{status:5} {row['module']:28} {row['elapsed']:.3f} s / {row['budget']:.3f} s{loaded}")
+    return 0 if all(row["ok"] for row in report) else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,60 @@
+import argparse
+import sys
+from utils.area_calculator import calculate_area_between_curves
+from utils.calculator import solve_integral
+
+# Integrales numéricas cuyo integrando no está definido dentro del intervalo: deben fallar, nunca
+# devolver un número (antes las muestras NaN contaban como 0 y el resultado era 0.0)
+UNDEFINED_INTEGRALS = [
+    ("log(x)", "-2", "-1", "x"),
+    ("sqrt(x)", "-1", "0", "x")
+]
+
+# Áreas con un segmento divergente, indefinido o en otra variable: deben fallar (antes la
+# regla del trapecio sobre las muestras finitas devolvía un área incorrecta, p. ej. 1.6137)
+UNDEFINED_AREAS = [
+    ("1/x", "x", -2, 2, "x"),
+    ("sqrt(x)", "0", -1, 1, "x"),
+    ("t^2", "t", 0, 1, "x")
+]
+
+def _expect_error(description, compute):
+    try:
+        value = compute()
+    except ValueError as e:
+        # Solo la primera línea: los errores de área incluyen además la traza completa
+        return {"case": description, "ok": True, "detail": str(e).splitlines()[0]}
+    return {"case": description, "ok": False, "detail": f"devolvió {value!r} en lugar de un error"}
+
+def check_regressions():
+    """
+    Run every regression case.
+    
+    Returns:
+        list: One dict per case with case, ok and detail
+    """
+    report = []
+    for func_str, lower, upper, var_str in UNDEFINED_INTEGRALS:
+        report.append(_expect_error(
+            f"solve_integral({func_str!r}, {lower}, {upper}, numeric)",
+            lambda: solve_integral(func_str, lower, upper, var_str, mode="numeric")[0]
+        ))
+    for func1_str, func2_str, lower, upper, var_str in UNDEFINED_AREAS:
+        report.append(_expect_error(
+            f"calculate_area_between_curves({func1_str!r}, {func2_str!r}, {lower}, {upper})",
+            lambda: calculate_area_between_curves(func1_str, func2_str, lower, upper, var_str)[0]
+        ))
+    return report
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Casos de regresión de los resultados numéricos")
+    parser.parse_args(argv)
+    
+    report = check_regressions()
+    for row in report:
+        status = "ok" if row["ok"] else "FALLO"
+        print(f"{status:5} {row['case']}: {row['detail']}")
+    return 0 if all(row["ok"] for row in report) else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
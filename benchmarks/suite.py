@@ -0,0 +1,248 @@
+import argparse
+import os
+import sys
+import numpy as np
+from sympy import sympify
+from assets.examples import riemann_sum_examples, definite_integral_examples, area_between_curves_examples
+from utils import antiderivative_store, area_calculator, calculator
+from utils.antiderivative_store import AntiderivativeStore
+from utils.area_calculator import calculate_area_between_curves, find_intersection_points
+from utils.calculator import parse_expression, solve_integral
+from utils.compiled_integral import compile_integral
+from utils.expression_parser import clear_parser_caches
+from utils.example_generator import get_function_catalog
+from utils.riemann_sum import calculate_riemann_sum
+from utils.riemann_sweep import riemann_sweep
+from benchmarks.harness import Benchmark, run_benchmark, save_results, load_results, compare_results
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results", "baseline.json")
+
+# Tamaños de la suma de Riemann: 10, 100, ..., 10^7 (hasta 10^5 con --quick)
+RIEMANN_SIZES = [10 ** k for k in range(1, 8)]
+QUICK_RIEMANN_LIMIT = 10 ** 5
+
+# Ventanas [a, b] evaluadas de una vez con CompiledIntegral.between
+BETWEEN_WINDOWS = 10 ** 4
+
+# Intervalo donde están definidas todas las funciones del catálogo de ejemplos
+CATALOG_BOUNDS = (0.1, 0.9)
+
+def _catalog_functions():
+    # Funciones del catálogo de generate_random_function y de los ejemplos de sumas de Riemann
+    functions = [func_str for group in get_function_catalog("x").values() for func_str, _, _ in group]
+    functions += [example["function"] for example in riemann_sum_examples.values()]
+    return list(dict.fromkeys(functions))
+
+def _integral_jobs():
+    jobs = [(func_str, str(CATALOG_BOUNDS[0]), str(CATALOG_BOUNDS[1]), "x") for func_str in _catalog_functions()]
+    jobs += [(example["function"], str(example["lower_bound"]), str(example["upper_bound"]),
+              example.get("variable", "x")) for example in definite_integral_examples.values()]
+    return jobs
+
+def _example_variable(*func_strs):
+    # Algunos ejemplos de áreas usan t o y como variable en lugar de x
+    names = sorted({str(s) for func_str in func_strs for s in parse_expression(func_str).free_symbols})
+    return names[0] if len(names) == 1 else "x"
+
+def _area_jobs():
+    return [(example["function1"], example["function2"], example["lower_bound"], example["upper_bound"],
+             _example_variable(example["function1"], example["function2"]))
+            for example in area_between_curves_examples.values()]
+
+def _numeric_bounds(job, first, last):
+    # Las páginas evalúan los límites ("pi/4") antes de construir las gráficas
+    job = list(job)
+    for i in (first, last):
+        job[i] = float(parse_expression(str(job[i])))
+    return tuple(job)
+
+def _clear_expression_cache():
+    calculator._expression_cache.clear()
+    clear_parser_caches()
+
+def _fresh_antiderivative_store():
+    # Almacén solo en memoria: cada llamada mide la integración simbólica completa
+    antiderivative_store._default_store = AntiderivativeStore(path=None)
+
+def _clear_area_caches():
+    area_calculator._segment_cache.clear()
+
+def build_benchmarks(quick=False, repeat=5):
+    """
+    Build the benchmark suite.
+    
+    Args:
+        quick (bool): Smaller suite (Riemann sums up to 10^5, fewer repeats)
+        repeat (int): Timed repetitions of every case
+    
+    Returns:
+        list: Benchmark objects
+    """
+    functions = _catalog_functions()
+    integrals = _integral_jobs()
+    areas = _area_jobs()
+    a, b = CATALOG_BOUNDS
+    benchmarks = []
+    
+    benchmarks.append(Benchmark(
+        "parse_expression",
+        [lambda f=f: parse_expression(f) for f in functions],
+        setup=_clear_expression_cache, repeat=repeat
+    ))
+    # Referencia: sympify, que el analizador propio sustituye (solo cambia ^ por **)
+    benchmarks.append(Benchmark(
+        "sympify",
+        [lambda f=f: sympify(f.replace("^", "**")) for f in functions],
+        repeat=repeat
+    ))
+    benchmarks.append(Benchmark(
+        "parse_expression[cached]",
+        [lambda f=f: parse_expression(f) for f in functions],
+        repeat=repeat
+    ))
+    benchmarks.append(Benchmark(
+        "solve_integral[symbolic, cold]",
+        [lambda job=job: solve_integral(*job) for job in integrals],
+        setup=_fresh_antiderivative_store, repeat=1 if quick else max(1, repeat // 2)
+    ))
+    benchmarks.append(Benchmark(
+        "solve_integral[symbolic, cached]",
+        [lambda job=job: solve_integral(*job) for job in integrals],
+        repeat=repeat
+    ))
+    benchmarks.append(Benchmark(
+        "solve_integral[numeric]",
+        [lambda job=job: solve_integral(*job, mode="numeric") for job in integrals],
+        repeat=repeat
+    ))
+    lows = np.linspace(a, b, BETWEEN_WINDOWS, endpoint=False)
+    highs = np.minimum(lows + (b - a) / 10, b)
+    benchmarks.append(Benchmark(
+        f"compiled_integral.between[{BETWEEN_WINDOWS} windows]",
+        [lambda f=f: compile_integral(f).between(lows, highs) for f in functions],
+        repeat=repeat
+    ))
+    
+    sizes = [n for n in RIEMANN_SIZES if not quick or n <= QUICK_RIEMANN_LIMIT]
+    for n in sizes:
+        # Con n grande cada llamada tarda lo suficiente como para repetir menos
+        n_repeat = repeat if n <= 10 ** 5 else 1
+        for method in ("left", "simpson"):
+            benchmarks.append(Benchmark(
+                f"calculate_riemann_sum[{method}, n={n}]",
+                [lambda f=f, n=n, method=method: calculate_riemann_sum(f, a, b, n, method) for f in functions],
+                repeat=n_repeat
+            ))
+    
+    # Barrido n = 1, 2, ..., 2^levels reutilizando las evaluaciones entre niveles
+    levels = 16 if quick else 20
+    for method in ("left", "simpson"):
+        benchmarks.append(Benchmark(
+            f"riemann_sweep[{method}, n<=2^{levels}]",
+            [lambda f=f, method=method: riemann_sweep(f, a, b, method, levels) for f in functions],
+            repeat=repeat
+        ))
+    
+    benchmarks.append(Benchmark(
+        "calculate_area_between_curves",
+        [lambda job=job: calculate_area_between_curves(*job) for job in areas],
+        setup=_clear_area_caches, repeat=repeat
+    ))
+    benchmarks.append(Benchmark(
+        "find_intersection_points[numeric]",
+        [lambda job=job: find_intersection_points(job[0], job[1], job[4]) for job in areas],
+        repeat=repeat
+    ))
+    
+    # Los constructores de gráficas cargan Plotly: se importan solo aquí
+    from utils.plotting import (plot_function, build_integral_figure, build_area_between_curves_figure,
+                                build_riemann_sum_figure)
+    benchmarks.append(Benchmark(
+        "plot_function",
+        [lambda f=f: plot_function(f, (a, b)) for f in functions],
+        repeat=repeat
+    ))
+    benchmarks.append(Benchmark(
+        "build_integral_figure",
+        [lambda job=job: build_integral_figure(*_numeric_bounds(job, 1, 2)) for job in integrals],
+        repeat=repeat
+    ))
+    benchmarks.append(Benchmark(
+        "build_integral_figure[accumulation]",
+        [lambda job=job: build_integral_figure(*_numeric_bounds(job, 1, 2), accumulation=True) for job in integrals],
+        repeat=repeat
+    ))
+    benchmarks.append(Benchmark(
+        "build_area_between_curves_figure",
+        [lambda job=job: build_area_between_curves_figure(*_numeric_bounds(job, 2, 3)) for job in areas],
+        repeat=repeat
+    ))
+    for n in (10, 1000, 10 ** 5):
+        benchmarks.append(Benchmark(
+            f"build_riemann_sum_figure[n={n}]",
+            [lambda f=f, n=n: build_riemann_sum_figure(f, a, b, n, "midpoint") for f in functions],
+            repeat=repeat
+        ))
+    return benchmarks
+
+def _format_time(seconds):
+    if seconds < 1e-3:
+        return f"{seconds * 1e6:8.1f} µs"
+    if seconds < 1:
+        return f"{seconds * 1e3:8.2f} ms"
+    return f"{seconds:8.3f} s "
+
+def _format_memory(size):
+    if size is None:
+        return "       —"
+    return f"{size / 2 ** 20:7.2f} MB"
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks de los motores de cálculo de CalcuMaster")
+    parser.add_argument("-k", "--filter", default=None, help="Ejecutar solo los benchmarks cuyo nombre contiene este texto")
+    parser.add_argument("--quick", action="store_true", help="Suite reducida (sumas de Riemann hasta n=10^5)")
+    parser.add_argument("--repeat", type=int, default=5, help="Repeticiones cronometradas de cada caso")
+    parser.add_argument("--no-memory", action="store_true", help="No medir el pico de memoria")
+    parser.add_argument("--save-baseline", nargs="?", const=DEFAULT_BASELINE, default=None,
+                        help="Guardar los resultados como línea base")
+    parser.add_argument("--compare", nargs="?", const=DEFAULT_BASELINE, default=None,
+                        help="Comparar con una línea base guardada")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="Empeoramiento relativo de p50 o de memoria considerado regresión")
+    args = parser.parse_args(argv)
+    
+    benchmarks = build_benchmarks(quick=args.quick, repeat=args.repeat)
+    if args.filter:
+        benchmarks = [benchmark for benchmark in benchmarks if args.filter in benchmark.name]
+    
+    results = {}
+    print(f"{'benchmark':44} {'p50':>11} {'p90':>11} {'p99':>11} {'memoria':>10}  n")
+    for benchmark in benchmarks:
+        stats = run_benchmark(benchmark, measure_memory=not args.no_memory)
+        results[benchmark.name] = stats
+        if stats["samples"]:
+            print(f"{benchmark.name:44} {_format_time(stats['p50'])} {_format_time(stats['p90'])} "
+                  f"{_format_time(stats['p99'])} {_format_memory(stats['peak_memory'])}  {stats['samples']}"
+                  + (f" ({stats['errors']} casos con error)" if stats["errors"] else ""))
+        else:
+            print(f"{benchmark.name:44} sin casos válidos ({stats['errors']} con error)")
+    
+    if args.save_baseline:
+        save_results(args.save_baseline, results)
+        print(f"Línea base guardada en {args.save_baseline}")
+    
+    if args.compare:
+        comparison = compare_results(results, load_results(args.compare), args.threshold)
+        regressions = [row for row in comparison if row["regression"]]
+        print()
+        for row in comparison:
+            memory = f", memoria x{row['memory_ratio']:.2f}" if row["memory_ratio"] else ""
+            flag = "REGRESIÓN" if row["regression"] else "ok"
+            print(f"{flag:9} {row['name']:44} p50 x{row['ratio']:.2f}{memory}")
+        if regressions:
+            print(f"{len(regressions)} regresiones por encima del {args.threshold:.0%}")
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
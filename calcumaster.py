@@ -0,0 +1,242 @@
+"""
+Headless entry point of CalcuMaster.
+
+Evaluates integral, area-between-curves and Riemann-sum jobs read line by
+line from a JSONL or CSV file and streams one result per job to JSONL or
+CSV, without importing Streamlit or Plotly:
+    
+    python -m calcumaster batch problemas.jsonl -o resultados.jsonl
+
+Each job is a JSON object (or CSV row) with a "type" field ("integral",
+"area" or "riemann"; inferred from the other fields when missing) and
+the fields of the corresponding engine:
+    
+    {"id": "p1", "type": "integral", "function": "x^2", "lower_bound": "0", "upper_bound": "1"}
+    {"id": "p2", "type": "area", "function1": "x^2", "function2": "x", "lower_bound": 0, "upper_bound": 1}
+    {"id": "p3", "type": "riemann", "function": "sin(x)", "lower_bound": 0, "upper_bound": "pi", "n": 1000, "method": "midpoint"}
+    {"id": "p4", "type": "riemann", "function": "x^3", "lower_bound": 0, "upper_bound": 1, "n": 1000000000, "precision": "exact"}
+
+Jobs are processed in chunks of --chunk-size lines so memory use does not
+grow with the size of the input; integral jobs of a chunk are solved
+together with solve_integrals_batch.
+"""
+import argparse
+import csv
+import json
+import sys
+import time
+from itertools import islice
+from utils.area_calculator import area_between_curves_segments
+from utils.batch_integration import solve_integrals_batch
+from utils.calculator import INTEGRATION_MODES, parse_expression
+from utils.riemann_sum import calculate_riemann_sum, RIEMANN_METHODS, RIEMANN_PRECISIONS
+
+# Campos obligatorios de cada tipo de trabajo
+JOB_TYPES = {
+    "integral": ("function", "lower_bound", "upper_bound"),
+    "area": ("function1", "function2", "lower_bound", "upper_bound"),
+    "riemann": ("function", "lower_bound", "upper_bound", "n")
+}
+
+# Columnas de la salida CSV (la salida JSONL incluye además los segmentos del área)
+OUTPUT_FIELDS = ["line", "id", "type", "value", "path", "method", "error_estimate", "elapsed", "error"]
+
+DEFAULT_CHUNK_SIZE = 1000
+
+def _job_type(job):
+    if job.get("type"):
+        return job["type"]
+    if job.get("function2"):
+        return "area"
+    if job.get("n"):
+        return "riemann"
+    return "integral"
+
+def _number(value):
+    # Los límites pueden ser números o expresiones como "pi" o "e/2"
+    if isinstance(value, (int, float)):
+        return float(value)
+    return float(parse_expression(str(value)))
+
+def read_jobs(stream, input_format="jsonl"):
+    """
+    Yield (line_number, job) pairs from a JSONL or CSV stream.
+    
+    Blank lines are skipped; a line that is not valid JSON yields the
+    parsing error message instead of a job dict.
+    """
+    if input_format == "csv":
+        for line_number, row in enumerate(csv.DictReader(stream), start=2):
+            yield line_number, {key: value for key, value in row.items() if value not in (None, "")}
+        return
+    for line_number, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            job = json.loads(line)
+        except json.JSONDecodeError as e:
+            yield line_number, f"JSON inválido: {e}"
+            continue
+        yield line_number, job if isinstance(job, dict) else "Cada línea debe ser un objeto JSON"
+
+def _record(line_number, job, job_type, **fields):
+    record = {"line": line_number, "id": job.get("id") if isinstance(job, dict) else None, "type": job_type}
+    record.update(fields)
+    return record
+
+def _evaluate_area(job):
+    start = time.perf_counter()
+    segments = area_between_curves_segments(job["function1"], job["function2"], job["lower_bound"],
+                                            job["upper_bound"], job.get("variable", "x"))
+    methods = sorted({segment['method'] for segment in segments})
+    return {
+        "value": sum(segment['area'] for segment in segments),
+        "path": "piecewise",
+        "method": "+".join(methods),
+        "elapsed": time.perf_counter() - start,
+        "segments": [
+            {"lower": segment['lower'], "upper": segment['upper'], "area": segment['area']}
+            for segment in segments
+        ]
+    }
+
+def _evaluate_riemann(job):
+    method = job.get("method", "left")
+    if method not in RIEMANN_METHODS:
+        raise ValueError(f"Método de suma de Riemann desconocido: {method}")
+    precision = job.get("precision", "compensated")
+    if precision not in RIEMANN_PRECISIONS:
+        raise ValueError(f"Precisión de suma de Riemann desconocida: {precision}")
+    start = time.perf_counter()
+    # Con precisión exacta los límites se pasan tal cual ("1/3" se mantiene racional)
+    lower_bound, upper_bound = job["lower_bound"], job["upper_bound"]
+    if precision == "compensated":
+        lower_bound, upper_bound = _number(lower_bound), _number(upper_bound)
+    total, result = calculate_riemann_sum(job["function"], lower_bound, upper_bound, int(job["n"]), method,
+                                          job.get("variable", "x"), precision)
+    record = {"value": float(total), "path": "riemann", "method": method, "elapsed": time.perf_counter() - start}
+    if precision != "compensated":
+        record["exact_value" if precision == "exact" else "precise_value"] = str(result.value)
+    return record
+
+def evaluate_jobs(numbered_jobs, mode="auto", workers=None, timeout=None):
+    """
+    Evaluate a chunk of (line_number, job) pairs and yield one result record per job.
+    
+    Integral jobs are solved together with solve_integrals_batch (their
+    records come out in completion order); area and Riemann jobs are
+    evaluated one by one. Errors are reported in the "error" field of the
+    record instead of stopping the run.
+    """
+    integral_jobs = []
+    for line_number, job in numbered_jobs:
+        if not isinstance(job, dict):
+            yield _record(line_number, job, None, error=job)
+            continue
+        job_type = _job_type(job)
+        if job_type not in JOB_TYPES:
+            yield _record(line_number, job, job_type, error=f"Tipo de trabajo desconocido: {job_type}")
+            continue
+        missing = [field for field in JOB_TYPES[job_type] if field not in job]
+        if missing:
+            yield _record(line_number, job, job_type, error=f"Faltan campos: {', '.join(missing)}")
+            continue
+        if job_type == "integral":
+            integral_jobs.append((line_number, job))
+            continue
+        try:
+            fields = _evaluate_area(job) if job_type == "area" else _evaluate_riemann(job)
+        except Exception as e:
+            fields = {"error": str(e)}
+        yield _record(line_number, job, job_type, **fields)
+    
+    if not integral_jobs:
+        return
+    batch = [
+        (job["function"], job["lower_bound"], job["upper_bound"], job.get("variable", "x"))
+        for _, job in integral_jobs
+    ]
+    for item in solve_integrals_batch(batch, workers=workers, mode=mode, timeout=timeout):
+        line_number, job = integral_jobs[item['index']]
+        result = item['result']
+        if result is None:
+            yield _record(line_number, job, "integral", error=item['error'])
+            continue
+        yield _record(line_number, job, "integral", value=float(result.value), path=result.path,
+                      method=result.method, error_estimate=result.error_estimate, elapsed=result.elapsed)
+
+class _JsonlWriter:
+    def __init__(self, stream):
+        self.stream = stream
+    
+    def write(self, record):
+        self.stream.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+class _CsvWriter:
+    def __init__(self, stream):
+        self.writer = csv.DictWriter(stream, fieldnames=OUTPUT_FIELDS, extrasaction="ignore")
+        self.writer.writeheader()
+    
+    def write(self, record):
+        self.writer.writerow(record)
+
+def run_batch(input_stream, output_stream, input_format="jsonl", output_format="jsonl", mode="auto",
+              workers=None, timeout=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Stream jobs from input_stream to result records on output_stream.
+    
+    Returns:
+        dict: Number of jobs processed, number of errors and elapsed seconds
+    """
+    writer = _CsvWriter(output_stream) if output_format == "csv" else _JsonlWriter(output_stream)
+    jobs = read_jobs(input_stream, input_format)
+    processed = errors = 0
+    start = time.perf_counter()
+    while True:
+        chunk = list(islice(jobs, chunk_size))
+        if not chunk:
+            break
+        for record in evaluate_jobs(chunk, mode=mode, workers=workers, timeout=timeout):
+            writer.write(record)
+            processed += 1
+            errors += record.get("error") is not None
+        output_stream.flush()
+    return {"processed": processed, "errors": errors, "elapsed": time.perf_counter() - start}
+
+def _infer_format(path, default="jsonl"):
+    if path and path != "-" and path.lower().endswith(".csv"):
+        return "csv"
+    return default
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="calcumaster", description="CalcuMaster sin interfaz gráfica")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    batch_parser = subparsers.add_parser("batch", help="Evaluar trabajos desde un archivo JSONL o CSV")
+    batch_parser.add_argument("input", help="Archivo de entrada (.jsonl o .csv; '-' para la entrada estándar)")
+    batch_parser.add_argument("-o", "--output", default="-", help="Archivo de salida ('-' para la salida estándar)")
+    batch_parser.add_argument("--input-format", choices=["jsonl", "csv"], help="Formato de entrada (por extensión si se omite)")
+    batch_parser.add_argument("--output-format", choices=["jsonl", "csv"], help="Formato de salida (por extensión si se omite)")
+    batch_parser.add_argument("--mode", choices=INTEGRATION_MODES, default="auto", help="Modo de cálculo de las integrales")
+    batch_parser.add_argument("--workers", type=int, default=None, help="Procesos para la integración simbólica")
+    batch_parser.add_argument("--timeout", type=float, default=None, help="Tiempo límite por integral simbólica (segundos)")
+    batch_parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="Trabajos evaluados juntos")
+    args = parser.parse_args(argv)
+    
+    input_format = args.input_format or _infer_format(args.input)
+    output_format = args.output_format or _infer_format(args.output)
+    input_stream = sys.stdin if args.input == "-" else open(args.input, newline="", encoding="utf-8")
+    output_stream = sys.stdout if args.output == "-" else open(args.output, "w", newline="", encoding="utf-8")
+    try:
+        summary = run_batch(input_stream, output_stream, input_format, output_format, args.mode,
+                            args.workers, args.timeout, args.chunk_size)
+    finally:
+        if input_stream is not sys.stdin:
+            input_stream.close()
+        if output_stream is not sys.stdout:
+            output_stream.close()
+    
+    print(f"{summary['processed']} trabajos, {summary['errors']} errores, {summary['elapsed']:.2f} s", file=sys.stderr)
+    return 1 if summary['errors'] else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,299 @@
+import os
+import threading
+import time
+import streamlit as st
+from utils.calculator import solve_integral
+from utils.area_calculator import (calculate_area_between_curves, area_between_curves_segments,
+                                   find_intersection_points)
+from utils.riemann_sum import calculate_riemann_sum, get_riemann_sum_steps
+from utils.riemann_symbolic import closed_form_riemann_sum
+from utils.riemann_sweep import riemann_sweep
+from utils.fingerprint import shared_expression
+from utils.tracing import span, annotate
+
+# Configuración de la caché de resultados (compartida entre reruns y sesiones)
+CACHE_TTL_SECONDS = int(os.environ.get("CALCUMASTER_CACHE_TTL", 3600))
+CACHE_MAX_ENTRIES = int(os.environ.get("CALCUMASTER_CACHE_MAX_ENTRIES", 500))
+
+_stats_lock = threading.Lock()
+_stats = {}
+
+def _normalize(value):
+    """Cache key component: strings without redundant whitespace, other values as is."""
+    if isinstance(value, str):
+        return " ".join(value.split())
+    return value
+
+def _record_call(name):
+    with _stats_lock:
+        entry = _stats.setdefault(name, {'calls': 0, 'misses': 0, 'keys': {}})
+        entry['calls'] += 1
+
+def _record_miss(name, key):
+    # Se ejecuta solo dentro de las funciones cacheadas, es decir, en cada fallo de caché
+    with _stats_lock:
+        entry = _stats.setdefault(name, {'calls': 0, 'misses': 0, 'keys': {}})
+        entry['misses'] += 1
+        keys = entry['keys']
+        now = time.time()
+        # Reinsertar la clave mantiene el diccionario ordenado por tiempo: las claves caducadas
+        # o que exceden CACHE_MAX_ENTRIES (ya expulsadas por st.cache_data) están al principio
+        keys.pop(key, None)
+        keys[key] = now
+        while keys:
+            oldest = next(iter(keys))
+            if now - keys[oldest] < CACHE_TTL_SECONDS and len(keys) <= CACHE_MAX_ENTRIES:
+                break
+            del keys[oldest]
+    annotate(cache="miss")
+
+def cache_stats():
+    """
+    Report usage statistics of the cached computations of this process.
+    
+    Streamlit does not expose the contents of st.cache_data, so the number of
+    entries is estimated from the distinct keys computed within the TTL,
+    capped at CACHE_MAX_ENTRIES.
+    
+    Returns:
+        dict: For each cached function: calls, hits, misses, hit_rate and entries
+    """
+    now = time.time()
+    report = {}
+    with _stats_lock:
+        for name, entry in _stats.items():
+            live = sum(1 for t in entry['keys'].values() if now - t < CACHE_TTL_SECONDS)
+            hits = entry['calls'] - entry['misses']
+            report[name] = {
+                'calls': entry['calls'],
+                'hits': hits,
+                'misses': entry['misses'],
+                'hit_rate': hits / entry['calls'] if entry['calls'] else 0.0,
+                'entries': min(live, CACHE_MAX_ENTRIES)
+            }
+    return report
+
+def clear_cache():
+    """Empty every cached result and reset the statistics."""
+    st.cache_data.clear()
+    with _stats_lock:
+        _stats.clear()
+
+@st.cache_data(ttl=CACHE_TTL_SECONDS, max_entries=CACHE_MAX_ENTRIES, show_spinner=False)
+def _solve_integral(func_str, lower_bound_str, upper_bound_str, var_str, mode):
+    _record_miss("solve_integral", (func_str, lower_bound_str, upper_bound_str, var_str, mode))
+    return solve_integral(func_str, lower_bound_str, upper_bound_str, var_str, mode)
+
+@st.cache_data(ttl=CACHE_TTL_SECONDS, max_entries=CACHE_MAX_ENTRIES, show_spinner=False)
+def _calculate_area_between_curves(func1_str, func2_str, lower_bound, upper_bound, var_str):
+    _record_miss("calculate_area_between_curves", (func1_str, func2_str, lower_bound, upper_bound, var_str))
+    return calculate_area_between_curves(func1_str, func2_str, lower_bound, upper_bound, var_str)
+
+@st.cache_data(ttl=CACHE_TTL_SECONDS, max_entries=CACHE_MAX_ENTRIES, show_spinner=False)
+def _area_between_curves_segments(func1_str, func2_str, lower_bound, upper_bound, var_str):
+    _record_miss("area_between_curves_segments", (func1_str, func2_str, lower_bound, upper_bound, var_str))
+    return area_between_curves_segments(func1_str, func2_str, lower_bound, upper_bound, var_str)
+
+@st.cache_data(ttl=CACHE_TTL_SECONDS, max_entries=CACHE_MAX_ENTRIES, show_spinner=False)
+def _find_intersection_points(func1_str, func2_str, var_str, domain, method):
+    _record_miss("find_intersection_points", (func1_str, func2_str, var_str, domain, method))
+    return find_intersection_points(func1_str, func2_str, var_str, domain, method)
+
+@st.cache_data(ttl=CACHE_TTL_SECONDS, max_entries=CACHE_MAX_ENTRIES, show_spinner=False)
+def _calculate_riemann_sum(func_str, lower_bound, upper_bound, n, method, var_str, precision):
+    _record_miss("calculate_riemann_sum", (func_str, lower_bound, upper_bound, n, method, var_str, precision))
+    riemann_sum, result = calculate_riemann_sum(func_str, lower_bound, upper_bound, n, method, var_str, precision)
+    steps = get_riemann_sum_steps(func_str, lower_bound, upper_bound, n, method, var_str, result=result)
+    return riemann_sum, result, steps
+
+@st.cache_data(ttl=CACHE_TTL_SECONDS, max_entries=CACHE_MAX_ENTRIES, show_spinner=False)
+def _closed_form_riemann_sum(func_str, lower_bound_str, upper_bound_str, method, var_str):
+    _record_miss("closed_form_riemann_sum", (func_str, lower_bound_str, upper_bound_str, method, var_str))
+    return closed_form_riemann_sum(func_str, lower_bound_str, upper_bound_str, method, var_str)
+
+@st.cache_data(ttl=CACHE_TTL_SECONDS, max_entries=CACHE_MAX_ENTRIES, show_spinner=False)
+def _riemann_sweep(func_str, lower_bound, upper_bound, method, levels, ratio, var_str, reference):
+    _record_miss("riemann_sweep", (func_str, lower_bound, upper_bound, method, levels, ratio, var_str, reference))
+    return riemann_sweep(func_str, lower_bound, upper_bound, method, levels, ratio, var_str, reference)
+
+@st.cache_data(ttl=CACHE_TTL_SECONDS, max_entries=CACHE_MAX_ENTRIES, show_spinner=False)
+def _build_figure(kind, args):
+    _record_miss(f"figure:{kind}", args)
+    # Plotly solo se carga la primera vez que se construye una gráfica
+    from utils.plotting import build_integral_figure, build_area_between_curves_figure, build_riemann_sum_figure
+    builders = {
+        'integral': build_integral_figure,
+        'area_between_curves': build_area_between_curves_figure,
+        'riemann_sum': build_riemann_sum_figure
+    }
+    return builders[kind](*args)
+
+def _shared_figure(kind, args, labels):
+    """
+    Cached figure of the representatives of equivalent expressions, relabelled as typed.
+    
+    Args:
+        kind (str): Builder of _build_figure
+        args (tuple): Builder arguments, with every expression replaced by shared_expression()
+        labels (list): (typed, representative) pairs of the expressions in args
+    """
+    fig = _build_figure(kind, args)
+    replacements = {shared: typed for typed, shared in labels if typed != shared}
+    if replacements:
+        from utils.plotting import relabel_figure
+        fig = relabel_figure(fig, replacements)
+    return fig
+
+def cached_solve_integral(func_str, lower_bound_str, upper_bound_str, var_str="x", mode="symbolic"):
+    """
+    Cached version of utils.calculator.solve_integral.
+    
+    Args:
+        mode (str): "symbolic", "numeric" or "auto" (see utils.calculator.compute_definite_integral)
+    
+    Returns:
+        tuple: (result, steps) as returned by solve_integral
+    """
+    _record_call("solve_integral")
+    with span("cache.solve_integral", cache="hit"):
+        return _solve_integral(_normalize(func_str), _normalize(str(lower_bound_str)),
+                               _normalize(str(upper_bound_str)), _normalize(var_str), mode)
+
+def cached_calculate_area_between_curves(func1_str, func2_str, lower_bound, upper_bound, var_str="x"):
+    """
+    Cached version of utils.area_calculator.calculate_area_between_curves.
+    
+    Returns:
+        tuple: (area, steps) as returned by calculate_area_between_curves
+    """
+    _record_call("calculate_area_between_curves")
+    with span("cache.calculate_area_between_curves", cache="hit"):
+        return _calculate_area_between_curves(_normalize(func1_str), _normalize(func2_str),
+                                              _normalize(lower_bound), _normalize(upper_bound), _normalize(var_str))
+
+def cached_area_between_curves_segments(func1_str, func2_str, lower_bound, upper_bound, var_str="x"):
+    """
+    Cached version of utils.area_calculator.area_between_curves_segments.
+    
+    Returns:
+        list: One dict per segment between consecutive crossings
+    """
+    _record_call("area_between_curves_segments")
+    with span("cache.area_between_curves_segments", cache="hit"):
+        return _area_between_curves_segments(_normalize(func1_str), _normalize(func2_str),
+                                             _normalize(lower_bound), _normalize(upper_bound), _normalize(var_str))
+
+def cached_find_intersection_points(func1_str, func2_str, var_str="x", domain=None, method="numeric"):
+    """
+    Cached version of utils.area_calculator.find_intersection_points.
+    
+    Args:
+        method (str): "numeric", "symbolic" or "auto" (see find_intersection_points)
+    
+    Returns:
+        list: Sorted x-coordinates of the intersection points
+    """
+    _record_call("find_intersection_points")
+    with span("cache.find_intersection_points", cache="hit"):
+        return _find_intersection_points(_normalize(func1_str), _normalize(func2_str), _normalize(var_str),
+                                         tuple(domain) if domain else None, method)
+
+def cached_riemann_sum(func_str, lower_bound, upper_bound, n, method='left', var_str="x", precision='compensated'):
+    """
+    Cached Riemann sum together with its formatted steps.
+    
+    Args:
+        precision (str): 'compensated', 'mpmath' or 'exact' (see utils.riemann_sum.calculate_riemann_sum)
+    
+    Returns:
+        tuple: (riemann_sum, result, steps) where result is the RiemannSumResult
+               and steps the output of get_riemann_sum_steps
+    """
+    _record_call("calculate_riemann_sum")
+    with span("cache.calculate_riemann_sum", cache="hit"):
+        return _calculate_riemann_sum(_normalize(func_str), float(lower_bound), float(upper_bound),
+                                      int(n), method, _normalize(var_str), precision)
+
+def cached_closed_form_riemann_sum(func_str, lower_bound_str, upper_bound_str, method='left', var_str="x"):
+    """
+    Cached closed form of a Riemann sum as a function of n.
+    
+    Returns:
+        ClosedFormRiemannSum: See utils.riemann_symbolic.closed_form_riemann_sum
+    """
+    _record_call("closed_form_riemann_sum")
+    with span("cache.closed_form_riemann_sum", cache="hit"):
+        return _closed_form_riemann_sum(_normalize(func_str), _normalize(str(lower_bound_str)),
+                                        _normalize(str(upper_bound_str)), method, _normalize(var_str))
+
+def cached_riemann_sweep(func_str, lower_bound, upper_bound, method='left', levels=None, ratio=2, var_str="x",
+                         reference=None):
+    """
+    Cached convergence sweep of a Riemann sum.
+    
+    Returns:
+        RiemannSweepResult: See utils.riemann_sweep.riemann_sweep
+    """
+    _record_call("riemann_sweep")
+    with span("cache.riemann_sweep", cache="hit"):
+        return _riemann_sweep(_normalize(func_str), float(lower_bound), float(upper_bound), method,
+                              levels if levels is None else int(levels), int(ratio), _normalize(var_str),
+                              reference if reference is None else float(reference))
+
+def plot_integral(func_str, lower_bound_str, upper_bound_str, var_str="x", accumulation=False):
+    """Display the cached figure of utils.plotting.build_integral_figure (with F(x) overlaid if accumulation)."""
+    _record_call("figure:integral")
+    try:
+        with span("cache.figure:integral", cache="hit"):
+            func_str, var_str = _normalize(func_str), _normalize(var_str)
+            shared = shared_expression(func_str, var_str)
+            fig = _shared_figure('integral', (shared, _normalize(str(lower_bound_str)),
+                                              _normalize(str(upper_bound_str)), var_str, bool(accumulation)),
+                                 [(func_str, shared)])
+        with span("figure.plotly_chart"):
+            st.plotly_chart(fig, use_container_width=True)
+    except Exception as e:
+        st.error(f"Error plotting integral: {str(e)}")
+
+def plot_area_between_curves(func1_str, func2_str, lower_bound, upper_bound, var_str="x"):
+    """Display the cached figure of utils.plotting.build_area_between_curves_figure."""
+    _record_call("figure:area_between_curves")
+    try:
+        with span("cache.figure:area_between_curves", cache="hit"):
+            func1_str, func2_str, var_str = _normalize(func1_str), _normalize(func2_str), _normalize(var_str)
+            shared1, shared2 = shared_expression(func1_str, var_str), shared_expression(func2_str, var_str)
+            fig = _shared_figure('area_between_curves', (shared1, shared2, lower_bound, upper_bound, var_str),
+                                 [(func1_str, shared1), (func2_str, shared2)])
+        with span("figure.plotly_chart"):
+            st.plotly_chart(fig, use_container_width=True)
+    except Exception as e:
+        st.error(f"Error plotting area between curves: {str(e)}")
+
+def plot_riemann_sum(func_str, lower_bound, upper_bound, n, method='left', var_str="x"):
+    """Display the cached figure of utils.plotting.build_riemann_sum_figure."""
+    _record_call("figure:riemann_sum")
+    try:
+        with span("cache.figure:riemann_sum", cache="hit"):
+            func_str, var_str = _normalize(func_str), _normalize(var_str)
+            shared = shared_expression(func_str, var_str)
+            fig = _shared_figure('riemann_sum', (shared, float(lower_bound), float(upper_bound), int(n), method,
+                                                 var_str), [(func_str, shared)])
+        with span("figure.plotly_chart"):
+            st.plotly_chart(fig, use_container_width=True)
+    except Exception as e:
+        st.error(f"Error plotting Riemann sum: {str(e)}")
+
+def plot_riemann_sweep(sweep):
+    """
+    Display utils.plotting.build_riemann_sweep_figure for a sweep from cached_riemann_sweep.
+    
+    The figure is drawn from the sweep already computed for the table, so a
+    cache miss evaluates the function once instead of once per view.
+    """
+    try:
+        from utils.plotting import build_riemann_sweep_figure
+        fig = build_riemann_sweep_figure(sweep)
+        with span("figure.plotly_chart"):
+            st.plotly_chart(fig, use_container_width=True)
+    except Exception as e:
+        st.error(f"Error plotting Riemann sweep: {str(e)}")
@@ -1,5 +1,6 @@
 import streamlit as st
 import sympy as sp
+from utils.calculator import compile_expression
 
 def create_math_input(label, default="", key=None):
     """
@@ -30,8 +31,7 @@ def create_math_input(label, default="", key=None):
     # Display the rendered LaTeX for preview
     try:
         if input_value:
-            expr = sp.sympify(input_value.replace("^", "**"))
-            st.latex(expr)
+            st.latex(compile_expression(input_value).latex)
     except:
         pass
     
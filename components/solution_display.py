@@ -1,7 +1,38 @@
 import streamlit as st
 import sympy as sp
+from utils.latex_steps import render_steps
 
-def display_solution(func_str, lower_bound, upper_bound, result, steps):
+def display_performance_details(trace):
+    """
+    Display the time spent in each stage of a calculation in a collapsed panel.
+    
+    Args:
+        trace (utils.tracing.Trace): Spans collected while computing the solution
+    
+    Returns:
+        None
+    """
+    if trace is None or not trace.spans:
+        return
+    
+    with st.expander("Performance details", expanded=False):
+        rows = []
+        for record in trace.spans:
+            details = ", ".join(f"{key}={value}" for key, value in record.attributes.items())
+            if record.error:
+                details = f"{details}, error={record.error}" if details else f"error={record.error}"
+            rows.append({
+                "Stage": "\u2003" * record.depth + record.name,
+                "Start (ms)": f"{record.start * 1000:.1f}",
+                "Duration (ms)": f"{record.duration * 1000:.1f}" if record.duration is not None else "—",
+                "Details": details
+            })
+        st.table(rows)
+        if trace.duration is not None:
+            st.caption(f"Total: {trace.duration * 1000:.1f} ms. Cached results show up as short "
+                       "cache.* stages with cache=hit and no nested stages.")
+
+def display_solution(func_str, lower_bound, upper_bound, result, steps, trace=None):
     """
     Display the solution to an integral calculation with step-by-step workings.
     
@@ -10,11 +41,15 @@ def display_solution(func_str, lower_bound, upper_bound, result, steps):
         lower_bound (str): Lower bound of integration
         upper_bound (str): Upper bound of integration
         result: Result of the integration
-        steps (list): List of solution steps
+        steps (list): List of solution steps (str or utils.latex_steps.LatexStep)
+        trace (utils.tracing.Trace): Timings shown in the performance details panel (optional)
     
     Returns:
         None
     """
+    # El LaTeX de los pasos se genera aquí, una sola vez para la vista y la descarga
+    steps = render_steps(steps)
+    
     st.markdown("## Solution")
     
     # Display the problem statement
@@ -30,6 +65,8 @@ def display_solution(func_str, lower_bound, upper_bound, result, steps):
         for step in steps:
             st.markdown(step)
     
+    display_performance_details(trace)
+    
     # Add a download button for the solution
     solution_text = f"""
 # Integral Calculation: ∫_{lower_bound}^{upper_bound} {func_str} dx
@@ -48,7 +85,8 @@ def display_solution(func_str, lower_bound, upper_bound, result, steps):
         mime="text/plain"
     )
 
-def display_riemann_sum_solution(func_str, lower_bound, upper_bound, n, method, result, steps, diagram_provided=True):
+def display_riemann_sum_solution(func_str, lower_bound, upper_bound, n, method, result, steps, diagram_provided=True,
+                                 trace=None):
     """
     Display the solution to a Riemann sum calculation with step-by-step workings.
     
@@ -57,10 +95,12 @@ def display_riemann_sum_solution(func_str, lower_bound, upper_bound, n, method,
         lower_bound (float): Lower bound of the interval
         upper_bound (float): Upper bound of the interval
         n (int): Number of subdivisions
-        method (str): Method for selecting sample points ('left', 'right', 'midpoint')
+        method (str): Method for selecting sample points ('left', 'right', 'midpoint',
+            'trapezoid', 'simpson')
         result (float): Result of the Riemann sum calculation
         steps (list): List of solution steps
         diagram_provided (bool): Whether a diagram has been provided separately
+        trace (utils.tracing.Trace): Timings shown in the performance details panel (optional)
     
     Returns:
         None
@@ -80,6 +120,8 @@ def display_riemann_sum_solution(func_str, lower_bound, upper_bound, n, method,
         for step in steps:
             st.markdown(step)
     
+    display_performance_details(trace)
+    
     # Explanation of what the Riemann sum represents
     st.markdown("### What does the Riemann sum represent?")
     
@@ -96,6 +138,10 @@ def display_riemann_sum_solution(func_str, lower_bound, upper_bound, n, method,
         explanation += "- The height of each rectangle is determined by the function value at the **right endpoint** of each subinterval."
     elif method == 'midpoint':
         explanation += "- The height of each rectangle is determined by the function value at the **midpoint** of each subinterval."
+    elif method == 'trapezoid':
+        explanation += "- The height of each rectangle is the average of the function values at **both endpoints** of each subinterval."
+    elif method == 'simpson':
+        explanation += "- The height of each rectangle is the Simpson average (f(left) + 4·f(midpoint) + f(right)) / 6 of each subinterval."
     
     explanation += f"""
     
@@ -136,7 +182,8 @@ by dividing the interval into {n} equal subintervals and calculating the sum of
         mime="text/plain"
     )
 
-def display_area_between_curves_solution(func1_str, func2_str, lower_bound, upper_bound, result, steps, diagram_provided=True):
+def display_area_between_curves_solution(func1_str, func2_str, lower_bound, upper_bound, result, steps,
+                                         diagram_provided=True, trace=None):
     """
     Display the solution to an area between curves calculation with step-by-step workings.
     
@@ -146,12 +193,16 @@ def display_area_between_curves_solution(func1_str, func2_str, lower_bound, uppe
         lower_bound (float): Lower bound of the interval
         upper_bound (float): Upper bound of the interval
         result (float): Result of the area calculation
-        steps (list): List of solution steps
+        steps (list): List of solution steps (str or utils.latex_steps.LatexStep)
         diagram_provided (bool): Whether a diagram has been provided separately
+        trace (utils.tracing.Trace): Timings shown in the performance details panel (optional)
     
     Returns:
         None
     """
+    # El LaTeX de los pasos se genera aquí, una sola vez para la vista y la descarga
+    steps = render_steps(steps)
+    
     st.markdown("## Area Between Curves Solution")
     
     # Display the problem statement
@@ -167,6 +218,8 @@ def display_area_between_curves_solution(func1_str, func2_str, lower_bound, uppe
         for step in steps:
             st.markdown(step)
     
+    display_performance_details(trace)
+    
     # Explanation of what the area represents
     st.markdown("### What does the area between curves represent?")
     
@@ -2,7 +2,9 @@ import streamlit as st
 import sympy as sp
 import numpy as np
 from utils.calculator import evaluate_expression, solve_integral
-from utils.plotting import plot_function, plot_integral, plot_area_between_curves
+from utils.plotting import plot_function
+from components.cached_compute import (cached_solve_integral, cached_calculate_area_between_curves,
+                                       plot_integral, plot_area_between_curves)
 from components.math_input import create_math_input
 from components.solution_display import display_solution, display_area_between_curves_solution
 from assets.examples import engineering_applications_examples
@@ -174,7 +176,7 @@ def show():
             
             if calculation_type == "Definite Integral":
                 # Calculate integral
-                result, steps = solve_integral(function1_input, lower_bound, upper_bound, "t")
+                result, steps = cached_solve_integral(function1_input, lower_bound, upper_bound, "t", mode="auto")
                 
                 # Display the plot
                 plot_integral(function1_input, lower_bound, upper_bound, "t")
@@ -201,7 +203,7 @@ def show():
                 
             else:  # Area Between Curves
                 # Calculate area
-                area, steps = calculate_area_between_curves(function1_input, function2_input, a, b, "t")
+                area, steps = cached_calculate_area_between_curves(function1_input, function2_input, a, b, "t")
                 
                 # Display the plot
                 plot_area_between_curves(function1_input, function2_input, a, b, "t")
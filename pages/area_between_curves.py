@@ -1,10 +1,12 @@
 import streamlit as st
 import sympy as sp
 import numpy as np
-from utils.area_calculator import calculate_area_between_curves, find_intersection_points
-from utils.plotting import plot_area_between_curves
+from utils.area_calculator import calculate_area_between_curves, find_intersection_points, DEFAULT_INTERSECTION_DOMAIN
+from components.cached_compute import (cached_calculate_area_between_curves, cached_area_between_curves_segments,
+                                       cached_find_intersection_points, plot_area_between_curves)
 from components.math_input import create_math_input
 from components.solution_display import display_area_between_curves_solution
+from utils.tracing import collect_trace
 from assets.examples import area_between_curves_examples
 
 def show():
@@ -70,6 +72,8 @@ def show():
             st.session_state.abc_upper = upper_bound
         
         find_intersections = st.checkbox("Find intersection points automatically", value=True)
+        exact_intersections = st.checkbox("Refine intersections with exact symbolic solutions", value=False,
+                                          help="Numeric roots are found in milliseconds; the exact refinement may take a couple of seconds.")
     
     with col2:
         st.markdown("### Example Problems")
@@ -90,7 +94,8 @@ def show():
     # Find intersections if requested
     if find_intersections and st.button("Find Intersection Points", key="find_intersections"):
         try:
-            intersections = find_intersection_points(function1_input, function2_input, "x")
+            intersections = cached_find_intersection_points(function1_input, function2_input, "x",
+                                                            method="auto" if exact_intersections else "numeric")
             
             if intersections:
                 st.success(f"Found {len(intersections)} intersection point(s)")
@@ -104,7 +109,7 @@ def show():
                     for i in range(len(intersections) - 1):
                         st.markdown(f"From x = {intersections[i]:.6f} to x = {intersections[i+1]:.6f}")
             else:
-                st.warning("No intersection points found in the domain")
+                st.warning(f"No intersection points found in the domain [{DEFAULT_INTERSECTION_DOMAIN[0]:g}, {DEFAULT_INTERSECTION_DOMAIN[1]:g}]")
         
         except Exception as e:
             st.error(f"Error finding intersections: {str(e)}")
@@ -118,14 +123,30 @@ def show():
             a = float(lower_bound)
             b = float(upper_bound)
             
-            # Calculate area
-            area, steps = calculate_area_between_curves(func1_str, func2_str, a, b, "x")
+            with collect_trace("area_between_curves") as trace:
+                # Calculate area
+                area, steps = cached_calculate_area_between_curves(func1_str, func2_str, a, b, "x")
+                
+                # Display the plot
+                plot_area_between_curves(func1_str, func2_str, a, b, "x")
+                
+                segments = cached_area_between_curves_segments(func1_str, func2_str, a, b, "x")
             
-            # Display the plot
-            plot_area_between_curves(func1_str, func2_str, a, b, "x")
+            # Display the area of each segment between crossings
+            if len(segments) > 1:
+                st.markdown("### Area by Segment")
+                st.table([
+                    {
+                        "Segment": f"[{segment['lower']:.6g}, {segment['upper']:.6g}]",
+                        "Upper function": f"f{segment['top']}",
+                        "Area": f"{segment['area']:.6f}",
+                        "Method": segment['method']
+                    }
+                    for segment in segments
+                ])
             
             # Display the solution
-            display_area_between_curves_solution(func1_str, func2_str, a, b, area, steps)
+            display_area_between_curves_solution(func1_str, func2_str, a, b, area, steps, trace=trace)
             
         except Exception as e:
             st.error(f"Error calculating area: {str(e)}")
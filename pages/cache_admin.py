@@ -0,0 +1,105 @@
+import streamlit as st
+from components.cached_compute import cache_stats, clear_cache, CACHE_TTL_SECONDS, CACHE_MAX_ENTRIES
+from utils.calculator import expression_cache_info
+from utils.expression_parser import parser_cache_info
+from utils.fingerprint import get_equivalence_index
+from utils.latex_steps import latex_cache_info
+from utils.antiderivative_store import get_antiderivative_store
+from utils.symbolic_worker import get_symbolic_pool, SYMBOLIC_TIMEOUT
+from utils.tracing import stage_metrics, prometheus_metrics, METRICS_PORT
+
+def show():
+    st.title("🗄️ Administración de Caché")
+    
+    st.markdown(f"""
+    Estado de las cachés de este proceso del servidor. Los resultados de integrales, áreas,
+    sumas de Riemann, intersecciones y gráficas se comparten entre todas las sesiones.
+    
+    - **TTL:** {CACHE_TTL_SECONDS} segundos (variable de entorno `CALCUMASTER_CACHE_TTL`)
+    - **Entradas máximas por función:** {CACHE_MAX_ENTRIES} (variable de entorno `CALCUMASTER_CACHE_MAX_ENTRIES`)
+    """)
+    
+    # Resultados cacheados con st.cache_data
+    st.header("Resultados y gráficas")
+    stats = cache_stats()
+    if stats:
+        rows = [
+            {
+                "Función": name,
+                "Llamadas": entry['calls'],
+                "Aciertos": entry['hits'],
+                "Fallos": entry['misses'],
+                "Tasa de aciertos": f"{entry['hit_rate']:.1%}",
+                "Entradas (aprox.)": entry['entries']
+            }
+            for name, entry in sorted(stats.items())
+        ]
+        st.table(rows)
+        
+        total_calls = sum(entry['calls'] for entry in stats.values())
+        total_hits = sum(entry['hits'] for entry in stats.values())
+        col1, col2 = st.columns(2)
+        col1.metric("Llamadas totales", total_calls)
+        col2.metric("Tasa de aciertos global", f"{total_hits / total_calls:.1%}" if total_calls else "—")
+    else:
+        st.info("Todavía no se ha realizado ningún cálculo en este proceso.")
+    
+    # Cachés internas de los módulos de cálculo
+    st.header("Expresiones compiladas")
+    info = expression_cache_info()
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Entradas", f"{info['size']} / {info['maxsize']}")
+    col2.metric("Aciertos / Fallos", f"{info['hits']} / {info['misses']}")
+    col3.metric("Tasa de aciertos", f"{info['hit_rate']:.1%}")
+    parser_info = parser_cache_info()
+    st.caption(f"Analizador: {parser_info['trees']['size']} árboles ({parser_info['trees']['hit_rate']:.1%} de aciertos) "
+               f"y {parser_info['tokens']['size']} secuencias de tokens ({parser_info['tokens']['hit_rate']:.1%} de aciertos)")
+    equivalence_info = get_equivalence_index().info()
+    st.caption(f"Expresiones equivalentes: {equivalence_info['classes']} huellas, {equivalence_info['hits']} formas reutilizadas "
+               f"y {equivalence_info['collisions']} colisiones descartadas")
+    latex_info = latex_cache_info()
+    st.caption(f"Fragmentos LaTeX de los pasos: {latex_info['size']} / {latex_info['maxsize']} "
+               f"({latex_info['hit_rate']:.1%} de aciertos)")
+    
+    st.header("Antiderivadas")
+    store_info = get_antiderivative_store().info()
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Entradas almacenadas", store_info['entries'])
+    col2.metric("Aciertos / Fallos", f"{store_info['hits']} / {store_info['misses']}")
+    col3.metric("Tamaño", f"{store_info['bytes'] / 1024:.1f} KB")
+    st.caption((f"Archivo: {store_info['path']}" if store_info['persistent'] else "Almacén solo en memoria")
+               + f" · {store_info['equivalent_hits']} aciertos por un integrando equivalente")
+    
+    st.header("Procesos de cálculo simbólico")
+    pool_info = get_symbolic_pool().info()
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Procesos activos / máximo", f"{pool_info['idle'] + pool_info['busy']} / {pool_info['size']}")
+    col2.metric("Llamadas", pool_info['calls'])
+    col3.metric("Cancelados por tiempo", pool_info['timeouts'])
+    st.caption(f"Tiempo límite por operación: {SYMBOLIC_TIMEOUT:g} s (variable de entorno `CALCUMASTER_SYMBOLIC_TIMEOUT`)")
+    
+    st.header("Tiempo por etapa")
+    metrics = stage_metrics()
+    if metrics:
+        st.table([
+            {
+                "Etapa": name,
+                "Ejecuciones": entry['calls'],
+                "Errores": entry['errors'],
+                "Tiempo total (s)": f"{entry['seconds']:.3f}",
+                "Tiempo medio (ms)": f"{entry['seconds'] / entry['calls'] * 1000:.2f}"
+            }
+            for name, entry in sorted(metrics.items())
+        ])
+    else:
+        st.info("Todavía no se ha medido ninguna etapa en este proceso.")
+    st.download_button("Descargar métricas (formato Prometheus)", data=prometheus_metrics(),
+                       file_name="calcumaster_metrics.txt", mime="text/plain")
+    st.caption(f"Endpoint /metrics en el puerto {METRICS_PORT}" if METRICS_PORT else
+               "Define `CALCUMASTER_METRICS_PORT` para exponer /metrics a Prometheus; "
+               "`CALCUMASTER_TRACE_LOG=1` escribe cada traza como una línea JSON en stderr.")
+    
+    if st.button("Vaciar caché de resultados", key="clear_result_cache"):
+        clear_cache()
+        st.success("Caché de resultados vaciada.")
+        st.rerun()
@@ -2,9 +2,10 @@ import streamlit as st
 import sympy as sp
 import numpy as np
 from utils.calculator import evaluate_expression, solve_integral
-from utils.plotting import plot_integral
+from components.cached_compute import cached_solve_integral, plot_integral
 from components.math_input import create_math_input
 from components.solution_display import display_solution
+from utils.tracing import collect_trace
 from assets.examples import definite_integral_examples
 
 def show():
@@ -56,6 +57,22 @@ def show():
         
         variable = st.text_input("Variable", st.session_state.variable, key="integral_variable")
         st.session_state.variable = variable
+        
+        mode = st.radio(
+            "Calculation Method",
+            ["symbolic", "auto", "numeric"],
+            format_func=lambda m: {"symbolic": "Symbolic", "auto": "Auto", "numeric": "Numeric"}[m],
+            horizontal=True,
+            key="integral_mode",
+            help="Auto tries the antiderivative for a couple of seconds and falls back to numerical quadrature."
+        )
+        
+        show_accumulation = st.checkbox(
+            "Show accumulation function F(x)",
+            value=False,
+            key="integral_accumulation",
+            help="Overlays F(x) = ∫ from a to x of f(t) dt on the graph of f, with a shared cursor."
+        )
     
     with col2:
         st.markdown("### Example Problems")
@@ -85,14 +102,15 @@ def show():
             b = upper_bound
             var = variable if variable else "x"
             
-            # Calculate integral
-            result, steps = solve_integral(func_str, a, b, var)
-            
-            # Display the plot
-            plot_integral(func_str, a, b, var)
+            with collect_trace("definite_integral") as trace:
+                # Calculate integral
+                result, steps = cached_solve_integral(func_str, a, b, var, mode)
+                
+                # Display the plot
+                plot_integral(func_str, a, b, var, accumulation=show_accumulation)
             
             # Display the solution
-            display_solution(func_str, a, b, result, steps)
+            display_solution(func_str, a, b, result, steps, trace=trace)
             
         except Exception as e:
             st.error(f"Error calculating integral: {str(e)}")
@@ -1,10 +1,14 @@
 import streamlit as st
 import sympy as sp
 import numpy as np
-from utils.riemann_sum import calculate_riemann_sum, get_riemann_sum_steps
-from utils.plotting import plot_riemann_sum
+from utils.riemann_symbolic import n_symbol
+from utils.riemann_sweep import DEFAULT_SWEEP_LEVELS, MAX_SWEEP_POINTS
+from utils.calculator import parse_expression, numeric_definite_integral
+from components.cached_compute import (cached_riemann_sum, cached_closed_form_riemann_sum, cached_riemann_sweep,
+                                       plot_riemann_sum, plot_riemann_sweep)
 from components.math_input import create_math_input
 from components.solution_display import display_riemann_sum_solution
+from utils.tracing import collect_trace
 from assets.examples import riemann_sum_examples
 
 def show():
@@ -25,7 +29,7 @@ def show():
     dividiendo el área en rectángulos.
     
     Esta calculadora te permite:
-    - Calcular sumas de Riemann usando métodos de punto izquierdo, derecho o punto medio
+    - Calcular sumas de Riemann usando métodos de punto izquierdo, derecho, punto medio, trapecio o Simpson
     - Visualizar los rectángulos utilizados en la aproximación
     - Ver soluciones paso a paso
     """)
@@ -56,15 +60,29 @@ def show():
             upper_bound = st.text_input("Límite Superior (b)", st.session_state.get("riemann_upper", "1"), key="riemann_upper_input")
             st.session_state.riemann_upper = upper_bound
         
-        n_subdivisions = st.number_input("Número de Subdivisiones (n)", min_value=1, max_value=100, value=st.session_state.get("riemann_n", 10), key="riemann_n_input")
+        n_subdivisions = st.number_input("Número de Subdivisiones (n)", min_value=1, max_value=100000, value=st.session_state.get("riemann_n", 10), key="riemann_n_input")
         st.session_state.riemann_n = n_subdivisions
         
         method = st.selectbox(
             "Método de Muestreo",
-            ["left", "right", "midpoint"],
+            ["left", "right", "midpoint", "trapezoid", "simpson"],
             index=0,
             key="riemann_method_input"
         )
+        
+        precision_options = {
+            "Estándar (suma compensada)": "compensated",
+            "Alta precisión (mpmath)": "mpmath",
+            "Exacta (solo polinomios)": "exact"
+        }
+        precision_label = st.selectbox(
+            "Precisión",
+            list(precision_options),
+            index=0,
+            key="riemann_precision_input",
+            help="La suma exacta usa fórmulas cerradas (sumas de Faulhaber) y no depende de n."
+        )
+        precision = precision_options[precision_label]
     
     with col2:
         st.markdown("### Problemas de Ejemplo")
@@ -92,21 +110,104 @@ def show():
             b = float(upper_bound) if upper_bound is not None else 1
             n = int(n_subdivisions) if n_subdivisions is not None else 10
             
-            # Calculate Riemann sum
-            riemann_sum, _ = calculate_riemann_sum(func_str, a, b, n, method, "x")
-            
-            # Get step-by-step solution
-            steps = get_riemann_sum_steps(func_str, a, b, n, method, "x")
-            
-            # Display the plot
-            plot_riemann_sum(func_str, a, b, n, method, "x")
+            with collect_trace("riemann_sum") as trace:
+                # Calculate Riemann sum and its step-by-step solution
+                riemann_sum, result, steps = cached_riemann_sum(func_str, a, b, n, method, "x", precision)
+                
+                # Display the plot
+                plot_riemann_sum(func_str, a, b, n, method, "x")
             
             # Display the solution
-            display_riemann_sum_solution(func_str, a, b, n, method, riemann_sum, steps, diagram_provided=True)
+            display_riemann_sum_solution(func_str, a, b, n, method, riemann_sum, steps, diagram_provided=True,
+                                         trace=trace)
             
         except Exception as e:
             st.error(f"Error al calcular la suma de Riemann: {str(e)}")
     
+    # Closed-form convergence analysis
+    with st.expander("Análisis simbólico de convergencia"):
+        st.markdown("""
+        Para polinomios, exponenciales, senos y cosenos la suma $R_n$ se obtiene en forma cerrada como
+        función de $n$. Con ella el error $R_n - \\int_a^b f(x)\\,dx$ se evalúa al instante para cualquier $n$
+        y se calcula cuántas subdivisiones hacen falta para una tolerancia dada.
+        """)
+        tolerance = st.number_input("Tolerancia del error (ε)", min_value=1e-15, max_value=1.0, value=1e-6,
+                                    format="%.1e", key="riemann_tolerance_input")
+        
+        if st.checkbox("Derivar R_n en forma cerrada", key="riemann_closed_form"):
+            try:
+                closed_form = cached_closed_form_riemann_sum(function_input, lower_bound, upper_bound, method, "x")
+                
+                st.latex(f"R_n = {sp.latex(closed_form.closed_form)}")
+                st.latex(f"\\int_{{{sp.latex(closed_form.lower_bound)}}}^{{{sp.latex(closed_form.upper_bound)}}} "
+                         f"f(x)\\,dx = {sp.latex(closed_form.integral)}")
+                if closed_form.is_exact:
+                    st.success("El método es exacto para esta función: R_n coincide con la integral para todo n.")
+                else:
+                    st.latex(f"R_n - \\int_a^b f(x)\\,dx = {sp.latex(closed_form.error)}")
+                    if closed_form.order:
+                        leading = closed_form.coefficient / n_symbol ** closed_form.order
+                        st.latex(f"R_n - \\int_a^b f(x)\\,dx \\sim {sp.latex(leading)} "
+                                 f"\\quad (\\text{{orden }} O(n^{{-{closed_form.order}}}))")
+                st.latex(f"\\lim_{{n \\to \\infty}} R_n = {sp.latex(closed_form.limit)}")
+                
+                n_needed = closed_form.n_for_tolerance(tolerance)
+                st.info(f"Con n = {n_needed} subdivisiones |R_n - ∫f| = {abs(float(closed_form.error_at(n_needed))):.3e}, "
+                        f"menor que ε = {tolerance:.1e}.")
+                
+                st.markdown("### Convergencia")
+                st.table([
+                    {
+                        "n": f"{row['n']:,}",
+                        "R_n": f"{row['value']:.12f}",
+                        "Error": f"{row['error']:.3e}"
+                    }
+                    for row in closed_form.convergence_table([10 ** k for k in range(1, 10)])
+                ])
+            except Exception as e:
+                st.error(f"No se pudo obtener la forma cerrada: {str(e)}")
+    
+    # Convergence sweep
+    with st.expander("Barrido de convergencia"):
+        st.markdown("""
+        Calcula $R_n$ para $n = 1, 2, 4, \\dots$ (o $1, 3, 9, \\dots$) reutilizando las evaluaciones de
+        cada nivel en el siguiente, y acelera la convergencia con la extrapolación de Richardson (Romberg).
+        """)
+        ratio_options = {"Duplicar n (1, 2, 4, ...)": 2, "Triplicar n (1, 3, 9, ...)": 3}
+        ratio_label = st.selectbox("Refinamiento", list(ratio_options), index=0, key="riemann_sweep_ratio",
+                                   help="Con el punto medio, triplicar n reutiliza todos los puntos anteriores.")
+        ratio = ratio_options[ratio_label]
+        levels = st.number_input("Niveles", min_value=1, max_value=int(np.log(MAX_SWEEP_POINTS) / np.log(ratio)),
+                                 value=DEFAULT_SWEEP_LEVELS[ratio], key=f"riemann_sweep_levels_{ratio}")
+        
+        if st.checkbox("Calcular barrido", key="riemann_sweep"):
+            try:
+                a = float(parse_expression(lower_bound))
+                b = float(parse_expression(upper_bound))
+                # La integral numérica sirve de referencia para el error; sin ella se usa la mejor extrapolación
+                try:
+                    reference = numeric_definite_integral(function_input, a, b, "x")[0]
+                except Exception:
+                    reference = None
+                sweep = cached_riemann_sweep(function_input, a, b, method, levels, ratio, "x", reference)
+                
+                st.caption(f"{sweep.evaluations:,} evaluaciones de f en todo el barrido "
+                           f"(frente a {sweep.separate_evaluations:,} calculando cada n por separado).")
+                st.table([
+                    {
+                        "n": f"{row['n']:,}",
+                        "R_n": f"{row['value']:.12f}",
+                        "Error": f"{row['error']:.3e}",
+                        "Romberg": f"{row['extrapolated']:.12f}",
+                        "Error Romberg": f"{row['extrapolated_error']:.3e}",
+                        "Orden observado": f"{row['order']:.2f}" if row['order'] is not None else "—"
+                    }
+                    for row in sweep.table()
+                ])
+                plot_riemann_sweep(sweep)
+            except Exception as e:
+                st.error(f"Error al calcular el barrido: {str(e)}")
+    
     # Theory section
     with st.expander("Aprende sobre las Sumas de Riemann"):
         st.markdown("""
@@ -120,6 +221,8 @@ def show():
         1. **Suma de Riemann Izquierda**: Utiliza el valor de la función en el extremo izquierdo de cada subintervalo.
         2. **Suma de Riemann Derecha**: Utiliza el valor de la función en el extremo derecho de cada subintervalo.
         3. **Suma de Riemann del Punto Medio**: Utiliza el valor de la función en el punto medio de cada subintervalo.
+        4. **Regla del Trapecio**: Promedia los valores de la función en ambos extremos de cada subintervalo.
+        5. **Regla de Simpson**: Combina los extremos y el punto medio de cada subintervalo con pesos 1, 4 y 1.
         
         ### La Fórmula
         
@@ -3,7 +3,8 @@ import sympy as sp
 import numpy as np
 import random
 from utils.calculator import evaluate_expression, solve_integral
-from utils.plotting import plot_function, plot_integral, plot_area_between_curves
+from components.cached_compute import (cached_solve_integral, cached_calculate_area_between_curves,
+                                       plot_integral, plot_area_between_curves)
 from components.math_input import create_math_input
 from components.solution_display import display_solution, display_area_between_curves_solution
 from utils.area_calculator import calculate_area_between_curves
@@ -167,6 +168,8 @@ def show():
                 upper_bound = st.text_input("Límite superior", str(scenario['default_upper']), key="scenario_upper")
             
             variable = st.text_input("Variable", scenario['variable'], key="scenario_variable")
+            show_accumulation = st.checkbox("Mostrar el consumo acumulado F(x)", value=False, key="scenario_accumulation",
+                                            help="Superpone F(x) = ∫ desde el límite inferior hasta x sobre la gráfica")
             
             # Botón para calcular
             if st.button("Calcular Integral", key="calculate_scenario_integral"):
@@ -175,10 +178,10 @@ def show():
                     var_str = str(variable) if variable is not None else "x"
                     
                     # Calcular la integral
-                    result, steps = solve_integral(function_input, lower_bound, upper_bound, var_str)
+                    result, steps = cached_solve_integral(function_input, lower_bound, upper_bound, var_str, mode="auto")
                     
                     # Mostrar la gráfica
-                    plot_integral(function_input, lower_bound, upper_bound, var_str)
+                    plot_integral(function_input, lower_bound, upper_bound, var_str, accumulation=show_accumulation)
                     
                     # Mostrar la solución
                     display_solution(function_input, lower_bound, upper_bound, result, steps)
@@ -217,7 +220,7 @@ def show():
                     var_str = str(variable) if variable is not None else "x"
                     
                     # Calcular área entre curvas
-                    area, steps = calculate_area_between_curves(function1_input, function2_input, float(lower_bound), float(upper_bound), var_str)
+                    area, steps = cached_calculate_area_between_curves(function1_input, function2_input, float(lower_bound), float(upper_bound), var_str)
                     
                     # Mostrar la gráfica
                     plot_area_between_curves(function1_input, function2_input, float(lower_bound), float(upper_bound), var_str)
@@ -0,0 +1,124 @@
+import numpy as np
+from utils.calculator import compile_expression
+from utils.antiderivative_store import get_antiderivative_store
+from utils.compiled_integral import compile_integral
+from utils.sampling import sample_function
+from utils.tracing import span, traced
+
+# Métodos de la función de acumulación: "auto" usa la antiderivada ya almacenada si la hay
+ACCUMULATION_METHODS = ("auto", "antiderivative", "simpson", "trapezoid")
+
+def _interval_integrals(x, y, method):
+    """Integral of the interpolant over each interval [x_i, x_i+1] of a (possibly non-uniform) grid."""
+    h = np.diff(x)
+    trapezoid = h * (y[:-1] + y[1:]) / 2
+    if method == "trapezoid" or x.size < 3:
+        return trapezoid
+    
+    # Parábola por (x_i, x_i+1, x_i+2) integrada sobre su primer intervalo...
+    h0, h1 = h[:-1], h[1:]
+    y0, y1, y2 = y[:-2], y[1:-1], y[2:]
+    forward = h0 * (y0 * (2 * h0 + 3 * h1) / (6 * (h0 + h1)) + y1 * (h0 + 3 * h1) / (6 * h1)
+                    - y2 * h0 ** 2 / (6 * h1 * (h0 + h1)))
+    # ...y sobre el segundo
+    backward = h1 * (y2 * (3 * h0 + 2 * h1) / (6 * (h0 + h1)) + y1 * (3 * h0 + h1) / (6 * h0)
+                     - y0 * h1 ** 2 / (6 * h0 * (h0 + h1)))
+    
+    # Cada intervalo interior tiene dos parábolas (la que empieza y la que acaba en él): se promedian
+    pieces = np.empty(h.size)
+    pieces[:-1] = forward
+    pieces[-1] = backward[-1]
+    pieces[1:-1] = (forward[1:] + backward[:-1]) / 2
+    return pieces
+
+def cumulative_integral(x, y, method="simpson"):
+    """
+    Cumulative integral of sampled values in a single O(n) pass.
+    
+    Each interval is integrated with the quadratic through it and a
+    neighbouring point (averaging both neighbours where there are two),
+    which handles the non-uniform grids of adaptive_sample (the grid may
+    also be decreasing, giving integrals with their sign); "trapezoid" uses
+    straight lines instead. Values after an undefined (NaN) sample are NaN.
+    
+    Args:
+        x (array-like): Monotonic grid
+        y (array-like): Function values at x
+        method (str): "simpson" or "trapezoid"
+    
+    Returns:
+        numpy.ndarray: ∫_{x[0]}^{x[k]} f for every k (starts at 0)
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    result = np.zeros(x.size)
+    if x.size > 1:
+        np.cumsum(_interval_integrals(x, y, method), out=result[1:])
+    return result
+
+def _accumulate_from(x, y, a, f, method):
+    """∫_a^x f on the grid, accumulated outwards from a so a gap on one side does not spoil the other."""
+    i = int(np.searchsorted(x, a))
+    inserted = not (i < x.size and x[i] == a)
+    if inserted:
+        x = np.insert(x, i, a)
+        y = np.insert(y, i, sample_function(f, np.array([a]))[0])
+    right = cumulative_integral(x[i:], y[i:], method)
+    # Hacia la izquierda se recorre la malla al revés: los pasos negativos dan ∫_a^x con su signo
+    left = cumulative_integral(x[i::-1], y[i::-1], method)[::-1]
+    values = np.concatenate([left[:-1], right])
+    return np.delete(values, i) if inserted else values
+
+@traced("integral.accumulation")
+def accumulation_function(func_str, lower_bound, x, var_str="x", method="auto", y=None):
+    """
+    Accumulation function F(x) = ∫_a^x f(t) dt on a whole grid.
+    
+    With "auto", the antiderivative is used if the shared store already has
+    it (nothing is integrated symbolically here), evaluated at all the
+    points at once; points it cannot give (singularities between a and x,
+    non-real values) and integrands without a stored antiderivative use the
+    cumulative Simpson pass over the samples of f.
+    
+    Args:
+        func_str (str): String representation of the function
+        lower_bound (float): Lower limit a (F(a) = 0)
+        x (array-like): Sorted grid where F is evaluated
+        var_str (str): Variable name
+        method (str): One of ACCUMULATION_METHODS
+        y (array-like): Values of f at x, if already sampled (avoids evaluating f again)
+    
+    Returns:
+        tuple: (values, method) where method is the one actually used
+               ("antiderivative", "simpson", "trapezoid" or "antiderivative+simpson")
+    """
+    if method not in ACCUMULATION_METHODS:
+        raise ValueError(f"Método de acumulación desconocido: {method}")
+    x = np.asarray(x, dtype=float)
+    a = float(lower_bound)
+    compiled = compile_expression(func_str, var_str)
+    
+    values = np.full(x.shape, np.nan)
+    valid = np.zeros(x.shape, dtype=bool)
+    if method in ("auto", "antiderivative"):
+        antiderivative = get_antiderivative_store().get(compiled.expr, compiled.var)
+        if antiderivative is None and method == "antiderivative":
+            raise ValueError("La antiderivada no está disponible")
+        if antiderivative is not None:
+            with span("integral.accumulation.antiderivative"):
+                # Ya está en el almacén: compile_integral no integra y conserva F y sus singularidades
+                integral = compile_integral(func_str, var_str)
+                if integral.has_closed_form:
+                    values, valid = integral.closed_form_between(np.full(x.shape, a), x)
+        if valid.all() or method == "antiderivative":
+            return values, "antiderivative"
+    
+    numeric_method = "trapezoid" if method == "trapezoid" else "simpson"
+    with span("integral.accumulation.cumulative", points=int(x.size)):
+        if y is None:
+            y = sample_function(compiled.func, x)
+        cumulative = _accumulate_from(x, np.asarray(y, dtype=float), a, compiled.func, numeric_method)
+    if valid.any():
+        values[~valid] = cumulative[~valid]
+        return values, f"antiderivative+{numeric_method}"
+    return cumulative, numeric_method
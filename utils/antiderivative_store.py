@@ -0,0 +1,374 @@
+import argparse
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+import sympy as sp
+from utils.cache import LRUCache
+from utils.fingerprint import EquivalenceIndex, equivalent, fingerprint
+from utils.symbolic_worker import symbolic_integrate
+
+# Ubicación por defecto del almacén persistente (configurable por variable de entorno)
+DEFAULT_STORE_PATH = os.environ.get(
+    "CALCUMASTER_ANTIDERIVATIVE_STORE",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache", "antiderivatives.sqlite3")
+)
+
+# Límites de tamaño: número de entradas y bytes de texto srepr almacenados
+DEFAULT_MAX_ENTRIES = 5000
+DEFAULT_MAX_BYTES = 32 * 1024 * 1024
+
+class AntiderivativeStore:
+    """
+    Memoization store for antiderivatives backed by a local SQLite file.
+    
+    Entries are keyed on the canonical srepr of the integrand and the
+    integration variable, and also carry its numeric fingerprint: on an
+    exact-key miss, an integrand with the same fingerprint that is confirmed
+    equivalent (x*x for x^2, (x + 1)^2 for x^2 + 2x + 1) reuses its
+    antiderivative. A small in-memory LRU sits in front of the database,
+    and the least recently used rows are evicted whenever the store grows
+    beyond max_entries or max_bytes. If the database cannot be opened (for
+    example on a read-only filesystem) the store keeps working in memory only.
+    """
+    
+    def __init__(self, path=DEFAULT_STORE_PATH, max_entries=DEFAULT_MAX_ENTRIES,
+                 max_bytes=DEFAULT_MAX_BYTES, memory_size=256):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._memory = LRUCache(maxsize=memory_size)
+        self._equivalents = EquivalenceIndex(maxsize=memory_size)
+        self._lock = threading.Lock()
+        self._persistent = path is not None
+        self._hits = 0
+        self._misses = 0
+        self._equivalent_hits = 0
+        if self._persistent:
+            try:
+                self._initialize()
+            except (sqlite3.Error, OSError):
+                self._persistent = False
+    
+    @contextmanager
+    def _connect(self):
+        # Una conexión por operación: confirma la transacción y se cierra siempre
+        conn = sqlite3.connect(self.path, timeout=5)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+    
+    def _initialize(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS antiderivatives ("
+                " key TEXT PRIMARY KEY,"
+                " antiderivative TEXT NOT NULL,"
+                " size INTEGER NOT NULL,"
+                " created REAL NOT NULL,"
+                " last_access REAL NOT NULL)"
+            )
+            # Almacenes creados antes de la columna de huellas se migran en el sitio
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(antiderivatives)")}
+            if "fingerprint" not in columns:
+                conn.execute("ALTER TABLE antiderivatives ADD COLUMN fingerprint TEXT")
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_antiderivatives_last_access"
+                " ON antiderivatives (last_access)"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_antiderivatives_fingerprint"
+                " ON antiderivatives (fingerprint)"
+            )
+    
+    @staticmethod
+    def make_key(expr, var):
+        """Canonical key of an integrand: srepr of the variable and the expression."""
+        return f"{sp.srepr(var)}|{sp.srepr(expr)}"
+    
+    def get(self, expr, var):
+        """
+        Look up a stored antiderivative.
+        
+        When the exact integrand is not stored, the antiderivative of a
+        verified equivalent integrand is returned and stored under this key too.
+        
+        Args:
+            expr (sympy.Expr): Integrand
+            var (sympy.Symbol): Integration variable
+        
+        Returns:
+            sympy.Expr or None: The antiderivative, or None if it is not stored
+        """
+        key = self.make_key(expr, var)
+        antiderivative = self._memory.get(key)
+        if antiderivative is None:
+            antiderivative = self._load(key)
+            if antiderivative is not None:
+                self._memory.put(key, antiderivative)
+        equivalent_hit = False
+        if antiderivative is None:
+            antiderivative = self._find_equivalent(expr, var)
+            if antiderivative is not None:
+                equivalent_hit = True
+                self.put(expr, var, antiderivative)
+        with self._lock:
+            if antiderivative is None:
+                self._misses += 1
+            else:
+                self._hits += 1
+                self._equivalent_hits += equivalent_hit
+        return antiderivative
+    
+    def put(self, expr, var, antiderivative):
+        """Store the antiderivative of expr with respect to var."""
+        key = self.make_key(expr, var)
+        expr_fingerprint = fingerprint(expr, var)
+        self._memory.put(key, antiderivative)
+        self._equivalents.register(expr, expr_fingerprint, antiderivative)
+        self._save(key, antiderivative, expr_fingerprint)
+    
+    def _find_equivalent(self, expr, var):
+        # Mismo fingerprint no basta: cada candidato se confirma con equivalent() antes de usarlo
+        expr_fingerprint = fingerprint(expr, var)
+        antiderivative = self._equivalents.lookup(expr, var, expr_fingerprint)
+        if antiderivative is not None or not self._persistent:
+            return antiderivative
+        try:
+            with self._connect() as conn:
+                rows = conn.execute(
+                    "SELECT key, antiderivative FROM antiderivatives WHERE fingerprint = ?", (expr_fingerprint,)
+                ).fetchall()
+            for key, text in rows:
+                candidate = sp.sympify(key.split("|", 1)[1])
+                if equivalent(candidate, expr, var):
+                    return sp.sympify(text)
+        except (sqlite3.Error, sp.SympifyError):
+            pass
+        return None
+    
+    def integrate(self, expr, var, timeout=None):
+        """
+        Return the antiderivative of expr, computing and storing it on a miss.
+        
+        Misses are integrated in the symbolic worker pool, so a runaway
+        integration is cancelled after timeout seconds.
+        
+        Args:
+            expr (sympy.Expr): Integrand
+            var (sympy.Symbol): Integration variable
+            timeout (float): Deadline for the integration (default SYMBOLIC_TIMEOUT)
+        
+        Returns:
+            sympy.Expr: Antiderivative (without constant of integration)
+        
+        Raises:
+            SymbolicTimeoutError: If the integration exceeds the deadline
+        """
+        antiderivative = self.get(expr, var)
+        if antiderivative is None:
+            antiderivative = symbolic_integrate(expr, var, timeout=timeout)
+            self.put(expr, var, antiderivative)
+        return antiderivative
+    
+    def _load(self, key):
+        if not self._persistent:
+            return None
+        try:
+            with self._connect() as conn:
+                row = conn.execute(
+                    "SELECT antiderivative FROM antiderivatives WHERE key = ?", (key,)
+                ).fetchone()
+                if row is None:
+                    return None
+                conn.execute(
+                    "UPDATE antiderivatives SET last_access = ? WHERE key = ?", (time.time(), key)
+                )
+            return sp.sympify(row[0])
+        except (sqlite3.Error, sp.SympifyError):
+            return None
+    
+    def _save(self, key, antiderivative, expr_fingerprint=None):
+        if not self._persistent:
+            return
+        text = sp.srepr(antiderivative)
+        now = time.time()
+        try:
+            with self._connect() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO antiderivatives"
+                    " (key, antiderivative, size, created, last_access, fingerprint)"
+                    " VALUES (?, ?, ?, ?, ?, ?)",
+                    (key, text, len(key) + len(text), now, now, expr_fingerprint)
+                )
+                self._evict(conn)
+        except sqlite3.Error:
+            pass
+    
+    def _evict(self, conn):
+        # Eliminar las entradas menos usadas hasta respetar ambos límites
+        count, total = conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM antiderivatives"
+        ).fetchone()
+        if count <= self.max_entries and total <= self.max_bytes:
+            return
+        rows = conn.execute(
+            "SELECT key, size FROM antiderivatives ORDER BY last_access ASC"
+        ).fetchall()
+        evicted = []
+        for key, size in rows:
+            if count <= self.max_entries and total <= self.max_bytes:
+                break
+            evicted.append((key,))
+            count -= 1
+            total -= size
+        conn.executemany("DELETE FROM antiderivatives WHERE key = ?", evicted)
+    
+    def info(self):
+        """
+        Report the store statistics.
+        
+        Returns:
+            dict: hits (equivalent_hits of them through an equivalent integrand), misses,
+                  entries and bytes stored on disk, path and whether it is persistent
+        """
+        entries, size = len(self._memory), 0
+        if self._persistent:
+            try:
+                with self._connect() as conn:
+                    entries, size = conn.execute(
+                        "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM antiderivatives"
+                    ).fetchone()
+            except sqlite3.Error:
+                pass
+        with self._lock:
+            return {
+                'hits': self._hits,
+                'misses': self._misses,
+                'equivalent_hits': self._equivalent_hits,
+                'entries': entries,
+                'bytes': size,
+                'path': self.path if self._persistent else None,
+                'persistent': self._persistent
+            }
+    
+    def clear(self):
+        """Remove every stored antiderivative."""
+        self._memory.clear()
+        self._equivalents.clear()
+        if self._persistent:
+            try:
+                with self._connect() as conn:
+                    conn.execute("DELETE FROM antiderivatives")
+            except sqlite3.Error:
+                pass
+
+_default_store = None
+_default_store_lock = threading.Lock()
+
+def get_antiderivative_store():
+    """Return the process-wide antiderivative store, creating it on first use."""
+    global _default_store
+    if _default_store is None:
+        with _default_store_lock:
+            if _default_store is None:
+                _default_store = AntiderivativeStore()
+    return _default_store
+
+def cached_antiderivative(expr, var, timeout=None):
+    """
+    Antiderivative of expr with respect to var, memoized in the shared store.
+    
+    Args:
+        expr (sympy.Expr): Integrand
+        var (sympy.Symbol): Integration variable
+        timeout (float): Deadline for computing it on a miss (default SYMBOLIC_TIMEOUT)
+    
+    Returns:
+        sympy.Expr: Antiderivative (without constant of integration)
+    """
+    return get_antiderivative_store().integrate(expr, var, timeout=timeout)
+
+def warm_up(store=None, verbose=False, timeout=None):
+    """
+    Precompute the antiderivatives of every function in the example catalogs.
+    
+    Covers the functions listed in assets/examples.py (including the
+    differences used for areas between curves) and the catalog used by
+    generate_random_function.
+    
+    Args:
+        store (AntiderivativeStore): Store to fill (default: the shared store)
+        verbose (bool): Print one line per function
+        timeout (float): Deadline for each integration (default SYMBOLIC_TIMEOUT)
+    
+    Returns:
+        int: Number of functions processed
+    """
+    from assets.examples import (riemann_sum_examples, definite_integral_examples,
+                                 area_between_curves_examples, engineering_applications_examples)
+    from utils.calculator import parse_expression
+    from utils.example_generator import get_function_catalog
+    
+    store = store or get_antiderivative_store()
+    
+    # (función, variable sugerida) de todos los catálogos, sin repetir
+    jobs = []
+    for example in riemann_sum_examples.values():
+        jobs.append((example["function"], "x"))
+    for example in definite_integral_examples.values():
+        jobs.append((example["function"], example.get("variable", "x")))
+    for example in area_between_curves_examples.values():
+        jobs.append((f"({example['function1']}) - ({example['function2']})", "x"))
+    for group in engineering_applications_examples.values():
+        for example in group.values():
+            if "function2" in example:
+                jobs.append((f"({example['function1']}) - ({example['function2']})", "t"))
+            else:
+                jobs.append((example["function1"], "t"))
+    for var_str in ("x", "t"):
+        for functions in get_function_catalog(var_str).values():
+            jobs.extend((func_str, var_str) for func_str, _, _ in functions)
+    
+    processed = 0
+    for func_str, var_str in dict.fromkeys(jobs):
+        start = time.perf_counter()
+        try:
+            expr = parse_expression(func_str, var_str)
+            # Algunos ejemplos usan otra variable (p. ej. y); se integra respecto a la que aparece
+            free_symbols = sorted(expr.free_symbols, key=str)
+            var = free_symbols[0] if len(free_symbols) == 1 else sp.Symbol(var_str)
+            store.integrate(expr, var, timeout=timeout)
+            status = "ok"
+        except Exception as e:
+            var = var_str
+            status = f"error: {e}"
+        processed += 1
+        if verbose:
+            print(f"{func_str} d{var}: {status} ({time.perf_counter() - start:.3f}s)")
+    
+    return processed
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Almacén persistente de antiderivadas")
+    parser.add_argument("command", choices=["warmup", "stats", "clear"])
+    parser.add_argument("--path", default=DEFAULT_STORE_PATH, help="Archivo SQLite del almacén")
+    parser.add_argument("--timeout", type=float, default=None, help="Tiempo límite por integral (segundos)")
+    args = parser.parse_args(argv)
+    
+    store = AntiderivativeStore(path=args.path)
+    if args.command == "warmup":
+        count = warm_up(store, verbose=True, timeout=args.timeout)
+        print(f"{count} funciones precalculadas")
+    elif args.command == "clear":
+        store.clear()
+    print(store.info())
+
+if __name__ == "__main__":
+    main()
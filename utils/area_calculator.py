@@ -1,10 +1,147 @@
 import sympy as sp
 import numpy as np
-from sympy import symbols, sympify, integrate, solve
-from scipy import integrate as sp_integrate
-from utils.calculator import parse_expression
+from sympy import symbols, lambdify
+from utils.cache import LRUCache
+from utils.calculator import parse_expression, compile_expression, numeric_definite_integral
+from utils.antiderivative_store import cached_antiderivative
+from utils.fingerprint import shared_expression
+from utils.latex_steps import LatexStep
+from utils.sampling import sample_function
+from utils.symbolic_worker import SymbolicTimeoutError, symbolic_solve
+from utils.tracing import span, traced
 
-def find_intersection_points(func1_str, func2_str, var_str="x", domain=None):
+# Métodos disponibles para buscar intersecciones
+INTERSECTION_METHODS = ("numeric", "symbolic", "auto")
+
+# Dominio usado para buscar intersecciones numéricas cuando no se indica ninguno
+DEFAULT_INTERSECTION_DOMAIN = (-10.0, 10.0)
+
+# Puntos de la malla donde se buscan cambios de signo de f1 - f2
+INTERSECTION_GRID_POINTS = 4001
+
+# Tiempo máximo (segundos) concedido a solve para refinar las raíces de forma exacta
+EXACT_REFINEMENT_TIMEOUT = 2.0
+
+# Tiempo máximo (segundos) para obtener la antiderivada de f1 - f2 al calcular áreas
+AREA_SYMBOLIC_TIMEOUT = 2.0
+
+# Integrales por segmento ya calculadas, compartidas entre llamadas
+AREA_SEGMENT_CACHE_SIZE = 1024
+_segment_cache = LRUCache(maxsize=AREA_SEGMENT_CACHE_SIZE)
+
+def evaluate_curves(func1_str, func2_str, x, var_str="x"):
+    """
+    Evaluate both curves over an array of points with their compiled functions.
+    
+    This is the single numeric evaluation path of the module: each function
+    is evaluated in one vectorized call (see utils.sampling.sample_function)
+    and undefined or non-real values come back as NaN.
+    
+    Args:
+        func1_str (str): String representation of the first function
+        func2_str (str): String representation of the second function
+        x (array-like or float): Points where the curves are evaluated
+        var_str (str): Variable name
+    
+    Returns:
+        tuple: (y1, y2) float arrays shaped like x
+    """
+    x = np.asarray(x, dtype=float)
+    f1 = compile_expression(func1_str, var_str).func
+    f2 = compile_expression(func2_str, var_str).func
+    return sample_function(f1, x), sample_function(f2, x)
+
+def numeric_intersection_points(func1_str, func2_str, var_str="x", domain=None,
+                                grid_points=INTERSECTION_GRID_POINTS):
+    """
+    Find the intersection points of two functions numerically.
+    
+    f1 - f2 is sampled on a uniform grid in a single vectorized call. Every
+    interval where it changes sign is refined with Brent's method, and local
+    minima of |f1 - f2| without a sign change are refined with a bounded
+    minimization to catch curves that only touch. Sign changes across poles
+    (e.g. 1/x) are discarded because the difference does not vanish there.
+    
+    Args:
+        func1_str (str): String representation of the first function
+        func2_str (str): String representation of the second function
+        var_str (str): Variable name
+        domain (tuple): Search interval as (lower, upper) (default DEFAULT_INTERSECTION_DOMAIN)
+        grid_points (int): Number of grid points used to bracket the roots
+    
+    Returns:
+        list: Sorted x-coordinates of the intersection points inside the domain
+    """
+    from scipy import optimize
+    
+    lower, upper = (float(v) for v in (domain or DEFAULT_INTERSECTION_DOMAIN))
+    x = np.linspace(lower, upper, grid_points)
+    y1, y2 = evaluate_curves(func1_str, func2_str, x, var_str)
+    diff = y1 - y2
+    
+    def h(t):
+        v1, v2 = evaluate_curves(func1_str, func2_str, t, var_str)
+        return float(v1 - v2)
+    
+    def is_root(t):
+        # La diferencia debe anularse en relación con el tamaño de las funciones
+        v1, v2 = (float(v) for v in evaluate_curves(func1_str, func2_str, t, var_str))
+        return np.isfinite(v1) and np.isfinite(v2) and abs(v1 - v2) <= 1e-8 * max(1.0, abs(v1), abs(v2))
+    
+    finite = np.isfinite(diff)
+    sign = np.sign(diff)
+    roots = list(x[finite & (diff == 0)])
+    
+    # Cambios de signo entre puntos consecutivos definidos
+    brackets = np.flatnonzero(finite[:-1] & finite[1:] & (sign[:-1] * sign[1:] < 0))
+    for i in brackets:
+        try:
+            root = optimize.brentq(h, x[i], x[i + 1], xtol=1e-14, rtol=4 * np.finfo(float).eps)
+        except (ValueError, RuntimeError):
+            continue
+        if is_root(root):
+            roots.append(root)
+    
+    # Mínimos locales de |f1 - f2| que no cambian de signo (curvas tangentes)
+    magnitude = np.where(finite, np.abs(diff), np.inf)
+    scale = np.maximum(1.0, np.maximum(np.abs(np.nan_to_num(y1)), np.abs(np.nan_to_num(y2))))
+    interior = np.arange(1, x.size - 1)
+    candidates = interior[
+        (magnitude[1:-1] <= magnitude[:-2]) & (magnitude[1:-1] <= magnitude[2:]) &
+        (magnitude[1:-1] > 0) & (magnitude[1:-1] <= 1e-3 * scale[1:-1]) &
+        (sign[:-2] == sign[1:-1]) & (sign[1:-1] == sign[2:])
+    ]
+    for i in candidates:
+        result = optimize.minimize_scalar(lambda t: abs(h(t)), bounds=(x[i - 1], x[i + 1]),
+                                          method='bounded', options={'xatol': 1e-12})
+        if result.success and is_root(result.x):
+            roots.append(result.x)
+    
+    # Eliminar duplicados (raíces en nodos de la malla o encontradas dos veces)
+    roots = sorted(float(r) for r in roots)
+    merge_tol = (upper - lower) / (grid_points - 1) * 1e-3
+    unique_roots = []
+    for root in roots:
+        if not unique_roots or root - unique_roots[-1] > merge_tol:
+            unique_roots.append(root)
+    return unique_roots
+
+def _symbolic_intersection_points(expr1, expr2, var, timeout=None):
+    # Soluciones reales de f1 = f2 obtenidas con solve
+    intersection_points = symbolic_solve(sp.Eq(expr1, expr2), var, timeout=timeout)
+    
+    # Convert complex solutions to real if imaginary part is close to zero
+    real_solutions = []
+    for point in intersection_points:
+        if isinstance(point, sp.Float) or point.is_real:
+            real_solutions.append(float(point))
+        elif hasattr(point, 'as_real_imag'):
+            re, im = point.as_real_imag()
+            if abs(float(im)) < 1e-10:  # Small imaginary part, treat as real
+                real_solutions.append(float(re))
+    return real_solutions
+
+def find_intersection_points(func1_str, func2_str, var_str="x", domain=None, method="numeric"):
     """
     Find the intersection points of two functions.
     
@@ -12,30 +149,44 @@ def find_intersection_points(func1_str, func2_str, var_str="x", domain=None):
         func1_str (str): String representation of the first function
         func2_str (str): String representation of the second function
         var_str (str): Variable name
-        domain (tuple): Optional domain limits as (lower, upper)
+        domain (tuple): Optional domain limits as (lower, upper); the numeric
+            search uses DEFAULT_INTERSECTION_DOMAIN when it is not given
+        method (str): "numeric" (grid bracketing and Brent refinement),
+            "symbolic" (sympy.solve, numeric if it times out) or "auto"
+            (numeric roots replaced by the exact ones that solve finds within
+            EXACT_REFINEMENT_TIMEOUT seconds)
     
     Returns:
         list: List of x-coordinates of intersection points
     """
+    if method not in INTERSECTION_METHODS:
+        raise ValueError(f"Unknown intersection method: {method}")
+    
     try:
+        if method == "numeric":
+            return numeric_intersection_points(func1_str, func2_str, var_str, domain)
+        
         # Parse the functions
         expr1 = parse_expression(func1_str, var_str)
         expr2 = parse_expression(func2_str, var_str)
         var = symbols(var_str)
         
-        # Find where the functions are equal
-        equation = sp.Eq(expr1, expr2)
-        intersection_points = solve(equation, var)
-        
-        # Convert complex solutions to real if imaginary part is close to zero
-        real_solutions = []
-        for point in intersection_points:
-            if isinstance(point, sp.Float) or point.is_real:
-                real_solutions.append(float(point))
-            elif hasattr(point, 'as_real_imag'):
-                re, im = point.as_real_imag()
-                if abs(float(im)) < 1e-10:  # Small imaginary part, treat as real
-                    real_solutions.append(float(re))
+        if method == "symbolic":
+            try:
+                real_solutions = _symbolic_intersection_points(expr1, expr2, var)
+            except SymbolicTimeoutError:
+                # solve no terminó a tiempo: se buscan las raíces numéricamente
+                return numeric_intersection_points(func1_str, func2_str, var_str, domain)
+        else:
+            real_solutions = numeric_intersection_points(func1_str, func2_str, var_str, domain)
+            try:
+                exact_solutions = _symbolic_intersection_points(expr1, expr2, var, timeout=EXACT_REFINEMENT_TIMEOUT)
+            except Exception:
+                exact_solutions = []
+            # Sustituir cada raíz numérica por la exacta cercana y añadir las que falten
+            for exact in exact_solutions:
+                close = [r for r in real_solutions if abs(r - exact) <= 1e-6 * max(1.0, abs(exact))]
+                real_solutions = [r for r in real_solutions if r not in close] + [exact]
         
         # Filter by domain if provided
         if domain:
@@ -50,10 +201,180 @@ def find_intersection_points(func1_str, func2_str, var_str="x", domain=None):
     except Exception as e:
         raise ValueError(f"Error finding intersection points: {str(e)}")
 
+def _parse_area_bound(bound):
+    # Los límites pueden llegar como números o como expresiones ("pi", "e", "sqrt(2)")
+    if isinstance(bound, str):
+        return float(parse_expression(bound))
+    return float(bound)
+
+def _integrate_segment(func1_str, func2_str, var_str, lower, upper, exact_value):
+    """
+    Signed integral of f1 - f2 over one segment where the curves do not cross.
+    
+    The value is always computed numerically; the exact value F(upper) - F(lower)
+    from the antiderivative is preferred when it agrees with it (a disagreement
+    means the antiderivative has a branch cut or jump inside the segment).
+    A segment that cannot be integrated numerically (divergent, or where a
+    curve is undefined) raises ValueError: the exact value alone cannot be
+    trusted there, and masking the bad points would give a wrong finite area.
+    """
+    diff_str = f"({func1_str}) - ({func2_str})"
+    try:
+        value, error, _ = numeric_definite_integral(diff_str, lower, upper, var_str)
+    except Exception as e:
+        raise ValueError(f"No se pudo integrar f₁ - f₂ en [{lower:g}, {upper:g}]: {str(e)}")
+    
+    if exact_value is not None and np.isfinite(exact_value) and (
+            abs(exact_value - value) <= 1e-6 * max(1.0, abs(value)) + 10 * error):
+        return exact_value, None, "symbolic"
+    return value, error, "numeric"
+
+def area_between_curves_segments(func1_str, func2_str, lower_bound, upper_bound, var_str="x"):
+    """
+    Split the area between two curves at their crossings and integrate each piece.
+    
+    The crossings inside [a, b] are found with numeric_intersection_points.
+    On each resulting segment one curve stays above the other, so the area
+    of the segment is the absolute value of the integral of f1 - f2 there.
+    The antiderivative of f1 - f2 is requested once (with a short deadline)
+    and evaluated at every segment edge in one vectorized call; each segment
+    is checked against quadrature and cached on its own, so moving a bound
+    only recomputes the segments that touch it.
+    
+    Args:
+        func1_str (str): String representation of the first function
+        func2_str (str): String representation of the second function
+        lower_bound: Lower bound of the interval (number or expression string)
+        upper_bound: Upper bound of the interval (number or expression string)
+        var_str (str): Variable name
+    
+    Returns:
+        list: One dict per segment with lower, upper, top (1 or 2, the curve
+              above), signed_integral (of f1 - f2), area, method ("symbolic"
+              or "numeric") and error_estimate
+    
+    Raises:
+        ValueError: If a segment diverges or a curve is undefined inside it
+    """
+    a = _parse_area_bound(lower_bound)
+    b = _parse_area_bound(upper_bound)
+    if a > b:
+        a, b = b, a
+    if a == b:
+        return []
+    
+    # Puntos de corte estrictamente interiores
+    edge_tol = (b - a) * 1e-12
+    with span("area.intersections"):
+        crossings = [c for c in numeric_intersection_points(func1_str, func2_str, var_str, (a, b))
+                     if a + edge_tol < c < b - edge_tol]
+    edges = np.array([a] + crossings + [b])
+    
+    exact_values = []
+    
+    def exact_edge_values():
+        # Antiderivada de f1 - f2 evaluada en todos los extremos a la vez (solo si hace falta)
+        if not exact_values:
+            values = np.full(edges.shape, np.nan)
+            with span("area.antiderivative"):
+                try:
+                    var = symbols(var_str)
+                    diff_expr = parse_expression(func1_str, var_str) - parse_expression(func2_str, var_str)
+                    antiderivative = cached_antiderivative(diff_expr, var, timeout=AREA_SYMBOLIC_TIMEOUT)
+                    if not antiderivative.has(sp.Integral):
+                        values = sample_function(lambdify(var, antiderivative, "numpy"), edges)
+                except Exception:
+                    pass
+            exact_values.append(values)
+        return exact_values[0]
+    
+    difference = shared_expression(f"({func1_str}) - ({func2_str})", var_str)
+    segments = []
+    for i, (lower, upper) in enumerate(zip(edges[:-1], edges[1:])):
+        def compute(i=i, lower=lower, upper=upper):
+            values = exact_edge_values()
+            exact = values[i + 1] - values[i]
+            with span("area.segment"):
+                signed, error, method = _integrate_segment(func1_str, func2_str, var_str, float(lower),
+                                                           float(upper), exact if np.isfinite(exact) else None)
+            # Un segmento no finito es un error, nunca se guarda en caché ni se suma al área
+            if not np.isfinite(signed):
+                raise ValueError(f"La integral de f₁ - f₂ en [{lower:g}, {upper:g}] no es finita")
+            return signed, error, method
+        
+        # Diferencias equivalentes (x^2 - x, x*x - x, ...) comparten la integral de cada segmento
+        key = (difference, var_str, float(lower), float(upper))
+        signed, error, method = _segment_cache.get_or_create(key, compute)
+        segments.append({
+            'lower': float(lower),
+            'upper': float(upper),
+            'top': 1 if signed >= 0 else 2,
+            'signed_integral': float(signed),
+            'area': abs(float(signed)),
+            'method': method,
+            'error_estimate': error
+        })
+    
+    return segments
+
+def _area_steps(func1_str, func2_str, lower_bound, upper_bound, var_str, diff_expr, segments, float_result):
+    """Build the steps of calculate_area_between_curves from its segments."""
+    crossings = [segment['lower'] for segment in segments[1:]]
+    
+    # Format the steps (ahora en español)
+    steps = []
+    
+    # Paso 1: Identificar las funciones
+    steps.append(f"Paso 1: Identificar las dos funciones")
+    steps.append(f"f₁({var_str}) = {func1_str}")
+    steps.append(f"f₂({var_str}) = {func2_str}")
+    
+    # Paso 2: Buscar los cortes dentro del intervalo
+    steps.append(f"Paso 2: Buscar los puntos donde las curvas se cortan en el intervalo [{lower_bound}, {upper_bound}]")
+    if crossings:
+        steps.append("Las curvas se cortan en " + ", ".join(f"{var_str} = {c:.6g}" for c in crossings) +
+                     f", por lo que el intervalo se divide en {len(segments)} segmentos.")
+    else:
+        steps.append("Las curvas no se cortan dentro del intervalo: una de ellas queda siempre por encima.")
+    
+    # Paso 3: Configurar la integral
+    steps.append(f"Paso 3: Configurar la integral para el área entre curvas")
+    steps.append(f"Área = ∫_{{{lower_bound}}}^{{{upper_bound}}} |f₁({var_str}) - f₂({var_str})| d{var_str}")
+    pieces = [
+        f"∫_{{{segment['lower']:.6g}}}^{{{segment['upper']:.6g}}} [f{segment['top']} - f{3 - segment['top']}] d{var_str}"
+        for segment in segments
+    ]
+    if pieces:
+        steps.append("Área = " + " + ".join(pieces))
+    
+    # Paso 4: Simplificar el integrando
+    steps.append(f"Paso 4: Simplificar el integrando")
+    steps.append(LatexStep(f"f₁({var_str}) - f₂({var_str}) = ", diff_expr))
+    
+    # Paso 5: Calcular cada segmento
+    steps.append(f"Paso 5: Calcular la integral en cada segmento")
+    method_names = {'symbolic': "antiderivada", 'numeric': "cuadratura numérica"}
+    for k, segment in enumerate(segments, start=1):
+        steps.append(
+            f"Segmento {k}: [{segment['lower']:.6g}, {segment['upper']:.6g}], f{segment['top']} está por encima: "
+            f"área = |{segment['signed_integral']:.6f}| = {segment['area']:.6f} ({method_names[segment['method']]})"
+        )
+    
+    # Paso 6: Calcular el resultado final
+    steps.append(f"Paso 6: Sumar las áreas de los segmentos")
+    if len(segments) > 1:
+        steps.append("Área = " + " + ".join(f"{segment['area']:.6f}" for segment in segments))
+    steps.append(f"Área = {float_result:.6f} unidades cuadradas")
+    return steps
+
+@traced("calculate_area_between_curves")
 def calculate_area_between_curves(func1_str, func2_str, lower_bound, upper_bound, var_str="x"):
     """
     Calculate the area between two curves.
     
+    The interval is split at the points where the curves cross and |f1 - f2|
+    is integrated piecewise (see area_between_curves_segments).
+    
     Args:
         func1_str (str): String representation of the first function
         func2_str (str): String representation of the second function
@@ -63,219 +384,21 @@ def calculate_area_between_curves(func1_str, func2_str, lower_bound, upper_bound
     
     Returns:
         tuple: (area, steps) where area is the calculated area and steps is a list of solution steps
+               (str or utils.latex_steps.LatexStep; see render_steps)
     """
     try:
         # Parse the functions
-        expr1 = parse_expression(func1_str, var_str)
-        expr2 = parse_expression(func2_str, var_str)
-        var = symbols(var_str)
-        
-        # Determinar qué función está arriba de manera más robusta
-        # Verificar en múltiples puntos en lugar de solo el punto medio
-        try:
-            # Convertir límites a float si son strings
-            if isinstance(lower_bound, str):
-                try:
-                    # Intentar manejar expresiones simbólicas como "pi" o "e"
-                    lower_bound_expr = sympify(lower_bound)
-                    lower_bound = float(lower_bound_expr)
-                except:
-                    # Si falla, usar un valor predeterminado
-                    lower_bound = 0.0
-                    
-            if isinstance(upper_bound, str):
-                try:
-                    upper_bound_expr = sympify(upper_bound)
-                    upper_bound = float(upper_bound_expr)
-                except:
-                    # Si falla, usar un valor predeterminado
-                    upper_bound = 1.0
-                
-            # Asegurar que lower_bound y upper_bound son números
-            lower_bound_val = float(lower_bound)
-            upper_bound_val = float(upper_bound)
-                
-            # Crear una secuencia de puntos para muestreo manualmente para evitar problemas de tipos
-            delta = (upper_bound_val - lower_bound_val) / 4
-            sample_points = [lower_bound_val + i * delta for i in range(5)]
-            
-            # Evaluar ambas funciones en los puntos de muestra
-            values1 = []
-            values2 = []
-            
-            for point in sample_points:
-                try:
-                    val1 = float(expr1.subs(var, point))
-                    val2 = float(expr2.subs(var, point))
-                    values1.append(val1)
-                    values2.append(val2)
-                except:
-                    # Si hay error en algún punto, continuar con el siguiente
-                    continue
-            
-            # Contar cuántas veces cada función está arriba
-            func1_on_top_count = sum(1 for v1, v2 in zip(values1, values2) if v1 > v2)
-            func2_on_top_count = sum(1 for v1, v2 in zip(values1, values2) if v2 > v1)
-            
-            # Determinar cuál función está arriba la mayoría del tiempo
-            if func1_on_top_count >= func2_on_top_count:
-                top_expr = expr1
-                bottom_expr = expr2
-                top_func_str = func1_str
-                bottom_func_str = func2_str
-                top_idx = 1
-                bottom_idx = 2
-            else:
-                top_expr = expr2
-                bottom_expr = expr1
-                top_func_str = func2_str
-                bottom_func_str = func1_str
-                top_idx = 2
-                bottom_idx = 1
-                
-        except Exception as e:
-            # En caso de error, usar el punto medio como fallback
-            try:
-                # Asegurarse de que los valores son numéricos
-                lb = float(lower_bound) if not isinstance(lower_bound, str) else 0
-                ub = float(upper_bound) if not isinstance(upper_bound, str) else 1
-                midpoint = (lb + ub) / 2
-            except:
-                # Si todo falla, usar un valor predeterminado
-                midpoint = 0.5
-            
-            # Intentar evaluar en el punto medio
-            try:
-                val1 = float(expr1.subs(var, midpoint))
-                val2 = float(expr2.subs(var, midpoint))
-                
-                if val1 > val2:
-                    top_expr = expr1
-                    bottom_expr = expr2
-                    top_func_str = func1_str
-                    bottom_func_str = func2_str
-                    top_idx = 1
-                    bottom_idx = 2
-                else:
-                    top_expr = expr2
-                    bottom_expr = expr1
-                    top_func_str = func2_str
-                    bottom_func_str = func1_str
-                    top_idx = 2
-                    bottom_idx = 1
-            except:
-                # Si todo falla, asumir que la primera función está arriba
-                top_expr = expr1
-                bottom_expr = expr2
-                top_func_str = func1_str
-                bottom_func_str = func2_str
-                top_idx = 1
-                bottom_idx = 2
-        
-        # Calcular la diferencia de expresiones
-        diff_expr = top_expr - bottom_expr
+        with span("area.parse"):
+            expr1 = compile_expression(func1_str, var_str).expr
+            expr2 = compile_expression(func2_str, var_str).expr
+            diff_expr = expr1 - expr2
         
-        # Intentar calcular la integral simbólicamente
-        try:
-            # Usar la integración simbólica
-            integral = integrate(diff_expr, (var, lower_bound, upper_bound))
-            float_result = float(integral)
-        except Exception as int_e:
-            # Si falla la integración simbólica, intentar con integración numérica
-            try:
-                # Convertir límites a float para integración numérica
-                try:
-                    lb = float(lower_bound)
-                    ub = float(upper_bound)
-                except:
-                    # Si la conversión falla, usar valores predeterminados
-                    lb = 0.0
-                    ub = 1.0
-                
-                # Crear funciones numéricas a partir de expresiones simbólicas
-                func_top = sp.lambdify(var, top_expr, modules=["numpy"])
-                func_bottom = sp.lambdify(var, bottom_expr, modules=["numpy"])
-                
-                # Función diferencia para integración
-                def diff_func(x):
-                    try:
-                        return func_top(x) - func_bottom(x)
-                    except:
-                        return 0
-                
-                # Calcular la integral numéricamente
-                float_result, _ = sp_integrate.quad(diff_func, lb, ub)
-                integral = float_result
-            except Exception as num_e:
-                # Si también falla la integración numérica, usar aproximación rectangular simple
-                n_steps = 100
-                
-                # Asegurar que los límites son numéricos
-                try:
-                    lb_val = float(lower_bound)
-                    ub_val = float(upper_bound)
-                except:
-                    lb_val = 0.0
-                    ub_val = 1.0
-                    
-                # Crear puntos de muestreo manualmente
-                delta = (ub_val - lb_val) / n_steps
-                x_vals = [lb_val + i * delta for i in range(n_steps + 1)]
-                dx = delta
-                
-                # Calcular la suma de Riemann
-                area_sum = 0
-                for x in x_vals:
-                    try:
-                        top_val = float(top_expr.subs(var, x))
-                        bottom_val = float(bottom_expr.subs(var, x))
-                        area_sum += (top_val - bottom_val) * dx
-                    except:
-                        continue
-                
-                float_result = area_sum
-                integral = float_result
-        
-        # Format the steps (ahora en español)
-        steps = []
-        
-        # Paso 1: Identificar las funciones
-        steps.append(f"Paso 1: Identificar las dos funciones")
-        steps.append(f"f₁({var_str}) = {func1_str}")
-        steps.append(f"f₂({var_str}) = {func2_str}")
-        
-        # Paso 2: Determinar qué función está arriba
-        steps.append(f"Paso 2: Determinar qué función tiene valores mayores en el intervalo [{lower_bound}, {upper_bound}]")
-        steps.append(f"Según el análisis del intervalo, f{top_idx} está por encima de f{bottom_idx} en la mayoría de los puntos.")
-        
-        # Paso 3: Configurar la integral
-        steps.append(f"Paso 3: Configurar la integral para el área entre curvas")
-        steps.append(f"Área = ∫_{{{lower_bound}}}^{{{upper_bound}}} [función_superior - función_inferior] d{var_str}")
-        steps.append(f"Área = ∫_{{{lower_bound}}}^{{{upper_bound}}} [{top_func_str} - ({bottom_func_str})] d{var_str}")
-        
-        # Paso 4: Simplificar el integrando
-        steps.append(f"Paso 4: Simplificar el integrando")
-        steps.append(f"Área = ∫_{{{lower_bound}}}^{{{upper_bound}}} [{sp.latex(diff_expr)}] d{var_str}")
-        
-        # Paso 5: Calcular la integral
-        steps.append(f"Paso 5: Calcular la integral")
-        
-        # Intentar mostrar los pasos de cálculo si es posible
-        try:
-            antiderivative = integrate(diff_expr, var)
-            steps.append(f"Área = [{sp.latex(antiderivative)}]_{{{lower_bound}}}^{{{upper_bound}}}")
-            
-            # Paso 6: Evaluar en los límites
-            upper_result = antiderivative.subs(var, upper_bound)
-            lower_result = antiderivative.subs(var, lower_bound)
-            steps.append(f"Área = {sp.latex(upper_result)} - ({sp.latex(lower_result)})")
-        except:
-            # Si no se puede mostrar el proceso paso a paso
-            steps.append(f"Área = ∫_{{{lower_bound}}}^{{{upper_bound}}} [{sp.latex(diff_expr)}] d{var_str}")
+        segments = area_between_curves_segments(func1_str, func2_str, lower_bound, upper_bound, var_str)
+        float_result = sum(segment['area'] for segment in segments)
         
-        # Paso 7: Calcular el resultado final
-        steps.append(f"Paso 7: Calcular el resultado final")
-        steps.append(f"Área = {float_result:.6f} unidades cuadradas")
+        with span("area.steps"):
+            steps = _area_steps(func1_str, func2_str, lower_bound, upper_bound, var_str, diff_expr,
+                                segments, float_result)
         
         return float_result, steps
     
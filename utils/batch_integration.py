@@ -0,0 +1,174 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import numpy as np
+import sympy as sp
+from sympy import symbols
+from utils.calculator import (parse_expression, numeric_definite_integral, IntegralResult, INTEGRATION_MODES,
+                              AUTO_SYMBOLIC_TIMEOUT, _strip_integral_sign, _parse_bound)
+from utils.antiderivative_store import get_antiderivative_store
+from utils.compiled_integral import CompiledIntegral
+from utils.symbolic_worker import SymbolicWorkerPool, SymbolicTimeoutError
+
+def _normalize_job(job):
+    # Un trabajo puede ser un diccionario o una tupla (función, a, b[, variable])
+    if isinstance(job, dict):
+        return job["function"], job["lower_bound"], job["upper_bound"], job.get("variable", "x")
+    func_str, lower_bound, upper_bound, *rest = job
+    return func_str, lower_bound, upper_bound, rest[0] if rest else "x"
+
+def _integrate_with_timing(pool, expr, var, timeout):
+    start = time.perf_counter()
+    antiderivative = pool.run(sp.integrate, expr, var, timeout=timeout)
+    return antiderivative, time.perf_counter() - start
+
+def _evaluate_group(group, mode, antiderivative=None, symbolic_elapsed=0.0, reason=None):
+    """
+    Yield the result of every job of one integrand.
+    
+    With an antiderivative, F is compiled once (CompiledIntegral) and
+    evaluated at all the bounds of the group in a single vectorized call;
+    jobs where F(b) - F(a) is not valid (not finite, or a singularity inside
+    the interval) and every job when there is no antiderivative are
+    integrated numerically.
+    """
+    entries = group['jobs']
+    values = np.full(len(entries), np.nan)
+    bounds_ok = np.zeros(len(entries), dtype=bool)
+    # Motivo del cálculo numérico de cada trabajo (un límite mal escrito solo afecta a su trabajo)
+    reasons = [reason] * len(entries)
+    
+    if antiderivative is not None:
+        integral = CompiledIntegral(group['func_str'], group['var_str'], group['expr'], group['var'], antiderivative)
+        if integral.has_closed_form:
+            start = time.perf_counter()
+            lower = np.full(len(entries), np.nan)
+            upper = np.full(len(entries), np.nan)
+            for i, entry in enumerate(entries):
+                try:
+                    lower[i] = float(_parse_bound(entry[2]))
+                    upper[i] = float(_parse_bound(entry[3]))
+                except Exception as e:
+                    # NaN en los límites: closed_form_between marca el trabajo como no válido
+                    lower[i] = upper[i] = np.nan
+                    reasons[i] = reason or str(e)
+            try:
+                values, bounds_ok = integral.closed_form_between(lower, upper)
+            except Exception as e:
+                reasons = [job_reason or str(e) for job_reason in reasons]
+            symbolic_elapsed += (time.perf_counter() - start) / len(entries)
+        else:
+            reasons = [reason or integral.fallback_reason] * len(entries)
+    
+    for (index, job, lower_bound, upper_bound), value, ok, job_reason in zip(entries, values, bounds_ok, reasons):
+        if ok and np.isfinite(value):
+            yield {
+                'index': index,
+                'job': job,
+                'result': IntegralResult(float(value), "symbolic", symbolic_elapsed, antiderivative=antiderivative),
+                'error': None
+            }
+            continue
+        if mode == "symbolic" and job_reason is None:
+            job_reason = "el resultado simbólico no es finito"
+        start = time.perf_counter()
+        try:
+            value, error, method = numeric_definite_integral(group['func_str'], lower_bound, upper_bound,
+                                                             group['var_str'])
+        except Exception as e:
+            yield {'index': index, 'job': job, 'result': None, 'error': str(e)}
+            continue
+        elapsed = symbolic_elapsed + time.perf_counter() - start
+        yield {
+            'index': index,
+            'job': job,
+            'result': IntegralResult(value, "numeric", elapsed, error_estimate=error, method=method,
+                                     fallback_reason=job_reason),
+            'error': None
+        }
+
+def solve_integrals_batch(jobs, workers=None, mode="auto", timeout=None):
+    """
+    Solve many definite integrals, streaming each result as soon as it is ready.
+    
+    Jobs with the same integrand (same canonical SymPy form and variable)
+    share a single antiderivative, which is evaluated at all their bounds in
+    one vectorized call. Antiderivatives already in the persistent store are
+    used directly; the remaining unique integrands are integrated in parallel
+    in a dedicated pool of worker processes, each call with a deadline. If
+    an integration fails or times out, the jobs of that integrand are
+    integrated numerically instead, as in compute_definite_integral.
+    
+    Args:
+        jobs (iterable): Dicts with "function", "lower_bound", "upper_bound"
+            and optional "variable", or tuples (function, a, b[, variable])
+        workers (int): Number of worker processes (default: number of CPUs)
+        mode (str): "symbolic", "numeric" or "auto" (see compute_definite_integral)
+        timeout (float): Deadline of each symbolic integration (default
+            AUTO_SYMBOLIC_TIMEOUT in "auto" mode and SYMBOLIC_TIMEOUT otherwise)
+    
+    Yields:
+        dict: index (position in jobs), job, result (IntegralResult or None)
+              and error (message or None), in completion order
+    """
+    if mode not in INTEGRATION_MODES:
+        raise ValueError(f"Modo de integración desconocido: {mode}")
+    if timeout is None and mode == "auto":
+        timeout = AUTO_SYMBOLIC_TIMEOUT
+    store = get_antiderivative_store()
+    
+    # Agrupar los trabajos por integrando canónico
+    groups = {}
+    for index, job in enumerate(jobs):
+        try:
+            func_str, lower_bound, upper_bound, var_str = _normalize_job(job)
+            func_str = _strip_integral_sign(func_str)
+            expr = parse_expression(func_str, var_str)
+            var = symbols(var_str)
+            key = store.make_key(expr, var)
+        except Exception as e:
+            yield {'index': index, 'job': job, 'result': None, 'error': str(e)}
+            continue
+        group = groups.setdefault(key, {'expr': expr, 'var': var, 'func_str': func_str,
+                                        'var_str': var_str, 'jobs': []})
+        group['jobs'].append((index, job, lower_bound, upper_bound))
+    
+    # Integrandos ya resueltos (o que no necesitan antiderivada) primero
+    pending = []
+    for group in groups.values():
+        if mode == "numeric":
+            yield from _evaluate_group(group, mode)
+            continue
+        antiderivative = store.get(group['expr'], group['var'])
+        if antiderivative is not None:
+            yield from _evaluate_group(group, mode, antiderivative)
+        else:
+            pending.append(group)
+    if not pending:
+        return
+    
+    pool = SymbolicWorkerPool(size=min(workers or os.cpu_count() or 1, len(pending)))
+    try:
+        with ThreadPoolExecutor(max_workers=pool.size) as executor:
+            futures = {
+                executor.submit(_integrate_with_timing, pool, group['expr'], group['var'], timeout): group
+                for group in pending
+            }
+            for future in as_completed(futures):
+                group = futures[future]
+                try:
+                    antiderivative, elapsed = future.result()
+                except SymbolicTimeoutError as e:
+                    yield from _evaluate_group(group, mode, reason=str(e))
+                    continue
+                except Exception as e:
+                    if mode == "symbolic":
+                        for index, job, _, _ in group['jobs']:
+                            yield {'index': index, 'job': job, 'result': None, 'error': str(e)}
+                    else:
+                        yield from _evaluate_group(group, mode, reason=str(e) or type(e).__name__)
+                    continue
+                store.put(group['expr'], group['var'], antiderivative)
+                yield from _evaluate_group(group, mode, antiderivative, elapsed)
+    finally:
+        pool.shutdown()
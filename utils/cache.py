@@ -0,0 +1,83 @@
+import threading
+from collections import OrderedDict
+
+class LRUCache:
+    """
+    Bounded, thread-safe least-recently-used cache with hit/miss statistics.
+    
+    A single instance can be shared by every Streamlit session of the process:
+    lookups and insertions are guarded by a lock, while the values themselves
+    are computed outside of it so a slow entry never blocks other readers.
+    """
+    
+    def __init__(self, maxsize=256):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+    
+    def get(self, key, default=None):
+        """Return the cached value for key (marking it as recently used) or default."""
+        with self._lock:
+            try:
+                value = self._data[key]
+            except KeyError:
+                self._misses += 1
+                return default
+            self._data.move_to_end(key)
+            self._hits += 1
+            return value
+    
+    def put(self, key, value):
+        """Store value under key, evicting the least recently used entries if needed."""
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+    
+    def get_or_create(self, key, factory):
+        """
+        Return the cached value for key, calling factory() to build it on a miss.
+        
+        Exceptions raised by factory are propagated and nothing is cached.
+        """
+        sentinel = _MISSING
+        value = self.get(key, sentinel)
+        if value is sentinel:
+            value = factory()
+            self.put(key, value)
+        return value
+    
+    def clear(self):
+        """Remove every entry and reset the statistics."""
+        with self._lock:
+            self._data.clear()
+            self._hits = 0
+            self._misses = 0
+    
+    def info(self):
+        """
+        Report the cache statistics.
+        
+        Returns:
+            dict: hits, misses, size, maxsize and hit_rate
+        """
+        with self._lock:
+            total = self._hits + self._misses
+            return {
+                'hits': self._hits,
+                'misses': self._misses,
+                'size': len(self._data),
+                'maxsize': self.maxsize,
+                'hit_rate': self._hits / total if total else 0.0
+            }
+    
+    def __len__(self):
+        return len(self._data)
+    
+    def __contains__(self, key):
+        return key in self._data
+
+_MISSING = object()
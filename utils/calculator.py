@@ -1,44 +1,95 @@
+import time
+import warnings
+from functools import lru_cache
 import sympy as sp
 import numpy as np
-from sympy import symbols, sympify, integrate, diff, N, Rational
+from sympy import symbols, diff, lambdify
+from utils.cache import LRUCache
+from utils.expression_parser import parse_math
+from utils.antiderivative_store import cached_antiderivative
+from utils.latex_steps import LatexStep
+from utils.symbolic_worker import SymbolicTimeoutError
+from utils.tracing import span
 
-def parse_expression(expr_str, var_str="x"):
+# Caché compartida por todo el proceso (todas las sesiones de Streamlit)
+EXPRESSION_CACHE_SIZE = 256
+_expression_cache = LRUCache(maxsize=EXPRESSION_CACHE_SIZE)
+
+class CompiledExpression:
+    """
+    A parsed expression together with its numeric callable and LaTeX form.
+    
+    The lambdified function and the LaTeX string are built on first access
+    and then kept, so every module that needs them shares the same objects.
     """
-    Parse a string expression into a SymPy expression.
+    
+    def __init__(self, expr, var):
+        self.expr = expr
+        self.var = var
+        self._func = None
+        self._latex = None
+    
+    @property
+    def func(self):
+        """callable: NumPy-vectorized function of the variable."""
+        if self._func is None:
+            self._func = lambdify(self.var, self.expr, "numpy")
+        return self._func
+    
+    @property
+    def latex(self):
+        """str: LaTeX representation of the expression."""
+        if self._latex is None:
+            self._latex = sp.latex(self.expr)
+        return self._latex
+
+def _normalize_expression_key(expr_str, var_str):
+    return " ".join(str(expr_str).split()), var_str
+
+def compile_expression(expr_str, var_str="x"):
+    """
+    Parse an expression once and return its cached compiled form.
+    
+    Results are kept in a bounded LRU cache keyed on the whitespace-normalized
+    input and the variable name, shared by every module and session.
     
     Args:
         expr_str (str): String representation of the mathematical expression
         var_str (str): The variable used in the expression
     
     Returns:
-        sympy.Expr: SymPy expression
+        CompiledExpression: Parsed expression, numeric callable and LaTeX string
     """
+    key = _normalize_expression_key(expr_str, var_str)
     try:
-        # Handle common input issues
-        expr_str = expr_str.replace("^", "**")  # Reemplazar ^ por **
-        
-        # Manejar nombres especiales que pueden causar conflictos
-        expr_str = expr_str.replace("Exp", "exp")  # Normalizar Exp a exp
-        
-        # Evitar problemas con el operador e (Euler)
-        if "e" in expr_str and not any(s in expr_str for s in ["exp(", "sec(", "ceiling("]):
-            expr_str = expr_str.replace("e", "E")
-        
-        # Manejo especial para expresiones con log(n)/n para evitar división por cero
-        if "log" in expr_str and var_str in expr_str and f"log({var_str})/{var_str}" in expr_str.replace(" ", ""):
-            expr_str = expr_str.replace(f"log({var_str})", f"log({var_str}+0.0001)")
-            expr_str = expr_str.replace(f"/{var_str}", f"/({var_str}+0.0001)")
-        
-        # Define the symbol
-        var = symbols(var_str)
-        
-        # Parse the expression
-        expr = sympify(expr_str)
-        
-        return expr
+        return _expression_cache.get_or_create(
+            key, lambda: CompiledExpression(parse_math(key[0]), symbols(var_str))
+        )
     except Exception as e:
         raise ValueError(f"Error al analizar la expresión: {str(e)}")
 
+def expression_cache_info():
+    """
+    Report hit/miss statistics of the shared expression cache.
+    
+    Returns:
+        dict: hits, misses, size, maxsize and hit_rate
+    """
+    return _expression_cache.info()
+
+def parse_expression(expr_str, var_str="x"):
+    """
+    Parse a string expression into a SymPy expression.
+    
+    Args:
+        expr_str (str): String representation of the mathematical expression
+        var_str (str): The variable used in the expression
+    
+    Returns:
+        sympy.Expr: SymPy expression
+    """
+    return compile_expression(expr_str, var_str).expr
+
 def evaluate_expression(expr_str, var_str="x", var_value=None):
     """
     Evaluate a mathematical expression.
@@ -75,7 +126,367 @@ def evaluate_expression(expr_str, var_str="x", var_value=None):
     except Exception as e:
         raise ValueError(f"Error al evaluar la expresión: {str(e)}")
 
-def solve_integral(func_str, lower_bound_str, upper_bound_str, var_str="x"):
+# Modos de cálculo de integrales definidas
+INTEGRATION_MODES = ("symbolic", "numeric", "auto")
+
+# Tiempo máximo (segundos) que el modo "auto" concede a la integración simbólica
+AUTO_SYMBOLIC_TIMEOUT = 2.0
+
+# Órdenes de la cuadratura de Gauss-Legendre usada para integrandos suaves
+GAUSS_LEGENDRE_ORDERS = (32, 64)
+
+# Error relativo a partir del cual un resultado de quad con advertencia se considera divergente
+QUAD_DIVERGENCE_TOLERANCE = 1e-6
+
+# Singularidades reales por integrando, compartidas por la vía simbólica y CompiledIntegral
+SINGULARITY_CACHE_SIZE = 256
+_singularity_cache = LRUCache(maxsize=SINGULARITY_CACHE_SIZE)
+
+class DivergentIntegralError(ValueError):
+    """Raised when the numeric quadrature of an integral does not converge."""
+
+class IntegralResult:
+    """
+    Outcome of a definite integral, including how it was obtained.
+    
+    Attributes:
+        value: Numeric value (float) or exact SymPy result if it cannot be converted
+        path (str): "symbolic" or "numeric"
+        elapsed (float): Wall-clock seconds spent computing the integral
+        error_estimate (float): Absolute error estimate (None for exact results)
+        method (str): Numeric method used ("gauss-legendre" or "quad"), None for symbolic
+        fallback_reason (str): Why "auto" fell back to the numeric path, if it did
+        antiderivative, upper_result, lower_result, exact_result: Symbolic pieces
+            of the Fundamental Theorem of Calculus (None on the numeric path)
+    """
+    
+    def __init__(self, value, path, elapsed, error_estimate=None, method=None, fallback_reason=None,
+                 antiderivative=None, upper_result=None, lower_result=None, exact_result=None):
+        self.value = value
+        self.path = path
+        self.elapsed = elapsed
+        self.error_estimate = error_estimate
+        self.method = method
+        self.fallback_reason = fallback_reason
+        self.antiderivative = antiderivative
+        self.upper_result = upper_result
+        self.lower_result = lower_result
+        self.exact_result = exact_result
+
+def _strip_integral_sign(func_str):
+    # Reemplazar el símbolo de integral por el texto "integrate"
+    if "∫" in func_str:
+        # Extraer solo la función dentro del símbolo de integral
+        if func_str.startswith("∫(") and func_str.endswith(")"):
+            func_str = func_str[2:-1].strip()
+        else:
+            func_str = func_str.replace("∫", "").strip()
+            # Eliminar paréntesis si están presentes
+            if func_str.startswith("(") and func_str.endswith(")"):
+                func_str = func_str[1:-1].strip()
+    return func_str
+
+def _parse_bound(bound_str):
+    # Convert bounds to numerical values if possible
+    try:
+        return float(bound_str)
+    except (TypeError, ValueError):
+        return parse_expression(str(bound_str))
+
+@lru_cache(maxsize=None)
+def _gauss_legendre(order):
+    return np.polynomial.legendre.leggauss(order)
+
+def numeric_definite_integral(func_str, lower_bound, upper_bound, var_str="x"):
+    """
+    Evaluate a definite integral numerically with the cached lambdified function.
+    
+    Finite intervals are first tried with fixed Gauss-Legendre rules of two
+    orders evaluated in one vectorized call each; when both agree the
+    integrand is smooth enough and their difference is the error estimate.
+    Otherwise (or for infinite bounds, or when the integrand has a real
+    singularity inside the interval) scipy.integrate.quad is used, split at
+    those singularities.
+    
+    Args:
+        func_str (str): String representation of the function to integrate
+        lower_bound: Lower bound (number or expression convertible to float)
+        upper_bound: Upper bound (number or expression convertible to float)
+        var_str (str): The variable of integration
+    
+    Returns:
+        tuple: (value, error_estimate, method)
+    
+    Raises:
+        DivergentIntegralError: If quad reports divergence or cannot reach an accurate value
+        ValueError: If the integrand is undefined (NaN) somewhere inside the interval
+    """
+    f = compile_expression(func_str, var_str).func
+    a = float(_parse_bound(lower_bound))
+    b = float(_parse_bound(upper_bound))
+    
+    # Singularidades reales del integrando dentro del intervalo: allí ni Gauss-Legendre (cuyos nodos
+    # simétricos cancelan 1/x en [-1, 1]) ni F(b) - F(a) son fiables
+    singular = inside = np.array([])
+    if np.isfinite(a) and np.isfinite(b):
+        compiled = compile_expression(func_str, var_str)
+        singular = singular_points_between(real_singularities(compiled.expr, compiled.var), min(a, b), max(a, b))
+        inside = singular[(singular > min(a, b)) & (singular < max(a, b))]
+    
+    if np.isfinite(a) and np.isfinite(b) and inside.size == 0:
+        estimates = []
+        with np.errstate(all='ignore'):
+            for order in GAUSS_LEGENDRE_ORDERS:
+                nodes, weights = _gauss_legendre(order)
+                points = (b - a) / 2 * nodes + (a + b) / 2
+                try:
+                    values = np.broadcast_to(np.asarray(f(points), dtype=float), points.shape)
+                except (TypeError, ValueError):
+                    break
+                if not np.all(np.isfinite(values)):
+                    break
+                estimates.append((b - a) / 2 * float(np.dot(weights, values)))
+        if len(estimates) == len(GAUSS_LEGENDRE_ORDERS):
+            error = abs(estimates[-1] - estimates[-2])
+            if error <= 1e-10 * max(1.0, abs(estimates[-1])):
+                return estimates[-1], error, "gauss-legendre"
+    
+    # SciPy se importa solo cuando hace falta: tarda más que SymPy y NumPy juntos
+    from scipy import integrate as sp_integrate
+    
+    # Se integra por separado a cada lado de las singularidades interiores: así QUADPACK las ve
+    # en un extremo y diagnostica la divergencia en lugar de cancelarla (tan en [1, 2])
+    breaks = [a, *(inside if a < b else inside[::-1]), b]
+    
+    value = error = 0.0
+    for lower, upper in zip(breaks[:-1], breaks[1:]):
+        piece, piece_error = _quad_piece(sp_integrate, f, lower, upper, singular)
+        value += piece
+        error += piece_error
+    return value, error, "quad"
+
+def _sample_value(f, t, singular):
+    """
+    Value of f at one quadrature node.
+    
+    An infinite value exactly at a known singular point (1/0 at the
+    singularity itself) is an isolated point that does not change the
+    integral and counts as 0; QUADPACK still diagnoses the divergence around
+    it. Anywhere else a non-finite value means the integrand is undefined
+    (log(x) for x < 0) or infinite at an unknown point, and raises ValueError.
+    """
+    with np.errstate(all='ignore'):
+        value = float(f(np.float64(t)))
+    if np.isfinite(value):
+        return value
+    if np.isinf(value) and np.any(singular == t):
+        return 0.0
+    if np.isnan(value):
+        raise ValueError(f"la función no está definida en {t:g} (dentro del intervalo de integración)")
+    raise DivergentIntegralError(f"la función es infinita en {t:g} (la integral probablemente es divergente)")
+
+def _quad_piece(sp_integrate, f, a, b, singular):
+    """scipy quad over [a, b]; raises DivergentIntegralError when QUADPACK reports divergence or no accuracy."""
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter("always", sp_integrate.IntegrationWarning)
+        value, error = sp_integrate.quad(lambda t: _sample_value(f, t, singular), a, b, limit=200)
+    messages = [str(w.message) for w in caught if issubclass(w.category, sp_integrate.IntegrationWarning)]
+    if not (np.isfinite(value) and np.isfinite(error)) or any("divergent" in m for m in messages) or (
+            messages and error > QUAD_DIVERGENCE_TOLERANCE * max(1.0, abs(value))):
+        raise DivergentIntegralError(f"la integral no converge en [{a:g}, {b:g}] (probablemente es divergente)")
+    return value, error
+
+def real_singularities(expr, var, antiderivative=None):
+    """
+    Real singularities of an integrand and of its antiderivative (cached by integrand).
+    
+    Args:
+        expr (sympy.Expr): Integrand
+        var (sympy.Symbol): Variable of integration
+        antiderivative (sympy.Expr): Its antiderivative F, if known
+    
+    Returns:
+        sympy.Set: The singular points (may be infinite, as for tan); EmptySet
+                   if they cannot be determined
+    """
+    def compute():
+        try:
+            points = sp.singularities(expr, var, sp.S.Reals)
+            if antiderivative is not None:
+                points = sp.Union(points, sp.singularities(antiderivative, var, sp.S.Reals))
+            return points
+        except Exception:
+            return sp.S.EmptySet
+    
+    return _singularity_cache.get_or_create((expr, var, antiderivative), compute)
+
+def singular_points_between(singular_set, lower, upper):
+    """
+    Sorted points of a singularity set in [lower, upper] as floats.
+    
+    Returns an empty array when there are none or they cannot be listed.
+    """
+    if singular_set is sp.S.EmptySet:
+        return np.array([])
+    if isinstance(singular_set, sp.FiniteSet):
+        # Caso habitual (1/x, log(x)): se filtra con NumPy sin construir la intersección en SymPy
+        points = _finite_points(singular_set)
+        return points[(points >= lower) & (points <= upper)]
+    points = sp.Intersection(singular_set, sp.Interval(lower, upper))
+    if not isinstance(points, sp.FiniteSet):
+        return np.array([])
+    return np.sort(np.array([float(p) for p in points]))
+
+@lru_cache(maxsize=SINGULARITY_CACHE_SIZE)
+def _finite_points(singular_set):
+    try:
+        return np.sort(np.array([float(p) for p in singular_set]))
+    except (TypeError, ValueError):
+        return np.array([])
+
+def _interior_singularity(func, antiderivative, var, lower_bound, upper_bound):
+    """First singular point strictly between the bounds (where F(b) - F(a) is not valid), or None."""
+    try:
+        lo, hi = sorted((float(lower_bound), float(upper_bound)))
+    except (TypeError, ValueError):
+        return None
+    if not (np.isfinite(lo) and np.isfinite(hi)):
+        return None
+    points = singular_points_between(real_singularities(func, var, antiderivative), lo, hi)
+    inside = points[(points > lo) & (points < hi)]
+    return float(inside[0]) if inside.size else None
+
+def _symbolic_definite_integral(func, var, lower_bound, upper_bound, timeout=None):
+    with span("integral.antiderivative"):
+        antiderivative = cached_antiderivative(func, var, timeout=timeout)
+    with span("integral.subs"):
+        upper_result = antiderivative.subs(var, upper_bound)
+        lower_result = antiderivative.subs(var, lower_bound)
+    return antiderivative, upper_result, lower_result, upper_result - lower_result
+
+def compute_definite_integral(func_str, lower_bound_str, upper_bound_str, var_str="x", mode="auto",
+                              timeout=None):
+    """
+    Compute a definite integral symbolically, numerically or whichever finishes usefully.
+    
+    The antiderivative is computed in the symbolic worker pool with a
+    deadline; when it expires the worker is killed and the integral is
+    evaluated numerically instead, in every mode. The same happens when a
+    real singularity of the integrand or of F lies strictly inside the
+    interval (1/x^2 on [-1, 1]), where F(b) - F(a) is not the integral; a
+    divergent integral then raises DivergentIntegralError.
+    
+    Args:
+        func_str (str): String representation of the function to integrate
+        lower_bound_str (str): Lower bound of integration
+        upper_bound_str (str): Upper bound of integration
+        var_str (str): The variable of integration
+        mode (str): "symbolic" (Fundamental Theorem of Calculus), "numeric"
+            (quadrature only) or "auto" (symbolic within timeout seconds, numeric
+            with an error estimate if it times out or gives no finite number)
+        timeout (float): Deadline for the symbolic path (default AUTO_SYMBOLIC_TIMEOUT
+            in "auto" mode and SYMBOLIC_TIMEOUT in "symbolic" mode)
+    
+    Returns:
+        IntegralResult: Value of the integral and the path taken
+    """
+    if mode not in INTEGRATION_MODES:
+        raise ValueError(f"Modo de integración desconocido: {mode}")
+    
+    start = time.perf_counter()
+    func_str = _strip_integral_sign(func_str)
+    
+    if mode == "numeric":
+        with span("integral.numeric"):
+            value, error, method = numeric_definite_integral(func_str, lower_bound_str, upper_bound_str, var_str)
+        return IntegralResult(value, "numeric", time.perf_counter() - start, error_estimate=error, method=method)
+    
+    func = parse_expression(func_str, var_str)
+    var = symbols(var_str)
+    lower_bound = _parse_bound(lower_bound_str)
+    upper_bound = _parse_bound(upper_bound_str)
+    if timeout is None and mode == "auto":
+        timeout = AUTO_SYMBOLIC_TIMEOUT
+    
+    try:
+        antiderivative, upper_result, lower_result, final_result = _symbolic_definite_integral(
+            func, var, lower_bound, upper_bound, timeout)
+        # Misma comprobación que CompiledIntegral: con una singularidad dentro, F(b) - F(a) no vale
+        with span("integral.singularities"):
+            singular = _interior_singularity(func, antiderivative, var, lower_bound, upper_bound)
+        if singular is not None:
+            reason = f"{var_str} = {singular:g} es una singularidad dentro del intervalo"
+        else:
+            try:
+                value = float(final_result)
+            except (TypeError, ValueError):
+                if mode == "auto":
+                    raise ValueError("el resultado simbólico no es numérico")
+                value = final_result
+            if mode == "auto" and not np.isfinite(value):
+                raise ValueError("el resultado simbólico no es finito")
+            return IntegralResult(value, "symbolic", time.perf_counter() - start,
+                                  antiderivative=antiderivative, upper_result=upper_result,
+                                  lower_result=lower_result, exact_result=final_result)
+    except SymbolicTimeoutError as e:
+        reason = str(e)
+    except Exception as e:
+        if mode == "symbolic":
+            raise
+        reason = str(e) or type(e).__name__
+    
+    with span("integral.numeric", fallback=True):
+        value, error, method = numeric_definite_integral(func_str, lower_bound_str, upper_bound_str, var_str)
+    return IntegralResult(value, "numeric", time.perf_counter() - start, error_estimate=error,
+                          method=method, fallback_reason=reason)
+
+def _integral_steps(func, var_str, lower_bound, upper_bound, integral):
+    """Build the steps of solve_integral for the path the integral took (LaTeX is printed lazily)."""
+    # Steps for the solution
+    steps = []
+    
+    # Step 1: Set up the integral
+    steps.append(LatexStep(f"Paso 1: Configurar la integral definida:\n$\\int_{{{lower_bound}}}^{{{upper_bound}}} ", func,
+                           f" \\, d{var_str}$"))
+    
+    if integral.path == "numeric":
+        method_name = "cuadratura de Gauss-Legendre" if integral.method == "gauss-legendre" else "cuadratura adaptativa (QUADPACK)"
+        reason = f" (la vía simbólica no se usó: {integral.fallback_reason})" if integral.fallback_reason else ""
+        steps.append(LatexStep(f"Paso 2: Evaluar la integral numéricamente con {method_name}{reason}:\n$\\int_{{{lower_bound}}}^{{{upper_bound}}} ",
+                               func, f" \\, d{var_str} \\approx {integral.value}$"))
+        steps.append(f"Paso 3: Estimación del error absoluto:\n$|\\varepsilon| \\lesssim {integral.error_estimate:.3e}$")
+        return steps
+    
+    antiderivative = integral.antiderivative
+    upper_result = integral.upper_result
+    lower_result = integral.lower_result
+    final_result = integral.exact_result
+    
+    # Step 2: Find the antiderivative
+    steps.append(LatexStep("Paso 2: Encontrar la antiderivada:\n$\\int ", func, f" \\, d{var_str} = ", antiderivative, " + C$"))
+    
+    # Step 3: Evaluate at the bounds
+    steps.append(LatexStep(f"Paso 3: Aplicar el Teorema Fundamental del Cálculo:\n$\\int_{{{lower_bound}}}^{{{upper_bound}}} ", func,
+                           f" \\, d{var_str} = [", antiderivative, f"]_{{{lower_bound}}}^{{{upper_bound}}}$"))
+    
+    # Step 4: Substitute the upper bound
+    steps.append(LatexStep("Paso 4: Sustituir el límite superior:\n$", antiderivative,
+                           f"\\|_{{{var_str}={upper_bound}}} = ", upper_result, "$"))
+    
+    # Step 5: Substitute the lower bound
+    steps.append(LatexStep("Paso 5: Sustituir el límite inferior:\n$", antiderivative,
+                           f"\\|_{{{var_str}={lower_bound}}} = ", lower_result, "$"))
+    
+    # Step 6: Subtract to get the final result
+    steps.append(LatexStep("Paso 6: Restar para obtener el resultado final:\n$", upper_result, " - (", lower_result, ") = ",
+                           final_result, "$"))
+    
+    # Convert to float if possible for display
+    if isinstance(integral.value, float):
+        steps.append(f"Paso 7: Simplificar:\n$= {integral.value}$")
+    return steps
+
+def solve_integral(func_str, lower_bound_str, upper_bound_str, var_str="x", mode="symbolic"):
     """
     Solve a definite integral and provide step-by-step solution.
     
@@ -84,69 +495,26 @@ def solve_integral(func_str, lower_bound_str, upper_bound_str, var_str="x"):
         lower_bound_str (str): Lower bound of integration
         upper_bound_str (str): Upper bound of integration
         var_str (str): The variable of integration
+        mode (str): "symbolic", "numeric" or "auto" (see compute_definite_integral)
     
     Returns:
-        tuple: (result, steps) where result is the value of the integral and steps is a list of solution steps
+        tuple: (result, steps) where result is the value of the integral and steps is a list of
+               solution steps (str or utils.latex_steps.LatexStep; see render_steps)
     """
     try:
-        # Reemplazar el símbolo de integral por el texto "integrate"
-        if "∫" in func_str:
-            # Extraer solo la función dentro del símbolo de integral
-            if func_str.startswith("∫(") and func_str.endswith(")"):
-                func_str = func_str[2:-1].strip()
-            else:
-                func_str = func_str.replace("∫", "").strip()
-                # Eliminar paréntesis si están presentes
-                if func_str.startswith("(") and func_str.endswith(")"):
-                    func_str = func_str[1:-1].strip()
-        
-        # Parse inputs
-        func = parse_expression(func_str, var_str)
-        var = symbols(var_str)
-        
-        # Convert bounds to numerical values if possible
-        try:
-            lower_bound = float(lower_bound_str)
-        except ValueError:
-            lower_bound = parse_expression(lower_bound_str)
-        
-        try:
-            upper_bound = float(upper_bound_str)
-        except ValueError:
-            upper_bound = parse_expression(upper_bound_str)
-        
-        # Steps for the solution
-        steps = []
-        
-        # Step 1: Set up the integral
-        steps.append(f"Paso 1: Configurar la integral definida:\n$\\int_{{{lower_bound}}}^{{{upper_bound}}} {sp.latex(func)} \\, d{var_str}$")
-        
-        # Step 2: Find the antiderivative
-        antiderivative = integrate(func, var)
-        steps.append(f"Paso 2: Encontrar la antiderivada:\n$\\int {sp.latex(func)} \\, d{var_str} = {sp.latex(antiderivative)} + C$")
-        
-        # Step 3: Evaluate at the bounds
-        steps.append(f"Paso 3: Aplicar el Teorema Fundamental del Cálculo:\n$\\int_{{{lower_bound}}}^{{{upper_bound}}} {sp.latex(func)} \\, d{var_str} = [{sp.latex(antiderivative)}]_{{{lower_bound}}}^{{{upper_bound}}}$")
-        
-        # Step 4: Substitute the upper bound
-        upper_result = antiderivative.subs(var, upper_bound)
-        steps.append(f"Paso 4: Sustituir el límite superior:\n${sp.latex(antiderivative)}\|_{{{var_str}={upper_bound}}} = {sp.latex(upper_result)}$")
-        
-        # Step 5: Substitute the lower bound
-        lower_result = antiderivative.subs(var, lower_bound)
-        steps.append(f"Paso 5: Sustituir el límite inferior:\n${sp.latex(antiderivative)}\|_{{{var_str}={lower_bound}}} = {sp.latex(lower_result)}$")
-        
-        # Step 6: Subtract to get the final result
-        final_result = upper_result - lower_result
-        steps.append(f"Paso 6: Restar para obtener el resultado final:\n${sp.latex(upper_result)} - ({sp.latex(lower_result)}) = {sp.latex(final_result)}$")
-        
-        # Convert to float if possible for display
-        try:
-            numeric_result = float(final_result)
-            steps.append(f"Paso 7: Simplificar:\n$= {numeric_result}$")
-            return numeric_result, steps
-        except:
-            return final_result, steps
+        with span("solve_integral", mode=mode):
+            func_str = _strip_integral_sign(func_str)
+            
+            # Parse inputs
+            with span("solve_integral.parse"):
+                func = parse_expression(func_str, var_str)
+                lower_bound = _parse_bound(lower_bound_str)
+                upper_bound = _parse_bound(upper_bound_str)
+            
+            integral = compute_definite_integral(func_str, lower_bound_str, upper_bound_str, var_str, mode)
+            
+            with span("solve_integral.steps", path=integral.path):
+                return integral.value, _integral_steps(func, var_str, lower_bound, upper_bound, integral)
     
     except Exception as e:
         raise ValueError(f"Error al resolver la integral: {str(e)}")
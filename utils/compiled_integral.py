@@ -0,0 +1,217 @@
+import numpy as np
+import sympy as sp
+from sympy import lambdify
+from utils.cache import LRUCache
+from utils.calculator import (compile_expression, numeric_definite_integral, real_singularities,
+                              singular_points_between, INTEGRATION_MODES, AUTO_SYMBOLIC_TIMEOUT,
+                              _normalize_expression_key, _strip_integral_sign)
+from utils.antiderivative_store import cached_antiderivative
+from utils.sampling import sample_function
+from utils.symbolic_worker import SymbolicTimeoutError
+from utils.tracing import span, traced
+
+# Integrales compiladas por (función, variable, modo), compartidas por todas las sesiones
+COMPILED_INTEGRAL_CACHE_SIZE = 128
+_compiled_cache = LRUCache(maxsize=COMPILED_INTEGRAL_CACHE_SIZE)
+
+# Parte imaginaria relativa admitida en F(b) - F(a) cuando F solo es real en forma compleja
+COMPLEX_TOLERANCE = 1e-10
+
+# Puntos de ramificación calculados por intervalo de límites (por integral compilada)
+BRANCH_POINT_CACHE_SIZE = 32
+
+class CompiledIntegral:
+    """
+    An integrand with its antiderivative F compiled once for many definite integrals.
+    
+    between(a, b) evaluates F(b) - F(a) over whole arrays of bounds with a
+    single vectorized call of F. Windows where that is not valid are
+    integrated numerically instead: when F(b) - F(a) is not finite or not
+    real (F may be complex at both bounds with a real difference, as
+    log(x^2 - 1) on (0, 1)), when a bound is infinite, and when a real singularity of the
+    integrand or of F lies strictly inside the window (1/x^2 on [-1, 1],
+    tan(x) across π/2), where F(b) - F(a) would silently jump across a branch.
+    
+    Attributes:
+        func_str (str): The integrand as typed
+        var_str (str): Variable name
+        expr (sympy.Expr): Parsed integrand
+        antiderivative (sympy.Expr): F, or None if there is no closed form
+        fallback_reason (str): Why there is no usable antiderivative (or None)
+        quadrature_windows (int): Windows integrated numerically so far
+    """
+    
+    def __init__(self, func_str, var_str, expr, var, antiderivative=None, fallback_reason=None):
+        self.func_str = func_str
+        self.var_str = var_str
+        self.expr = expr
+        self.var = var
+        if antiderivative is not None and antiderivative.has(sp.Integral):
+            antiderivative = None
+            fallback_reason = fallback_reason or "la antiderivada no tiene forma cerrada"
+        self.antiderivative = antiderivative
+        self.fallback_reason = fallback_reason
+        self.quadrature_windows = 0
+        self._F = None
+        self._singularities = None
+        self._branch_points = LRUCache(maxsize=BRANCH_POINT_CACHE_SIZE)
+    
+    @property
+    def has_closed_form(self):
+        """bool: True when F(b) - F(a) can be used (at least for some windows)."""
+        return self.antiderivative is not None and self._compiled() is not None
+    
+    def _compiled(self):
+        # SciPy aporta erf, fresnel, Si/Ci...; si ni así se puede generar código, no hay forma cerrada usable
+        if self._F is None and self.antiderivative is not None:
+            try:
+                self._F = lambdify(self.var, self.antiderivative, ["scipy", "numpy"])
+            except Exception as e:
+                self.antiderivative = None
+                self.fallback_reason = f"la antiderivada no se puede evaluar numéricamente: {e}"
+        return self._F
+    
+    def __call__(self, x):
+        """Values of F at x (NaN where undefined or not real); requires a closed form."""
+        if not self.has_closed_form:
+            raise ValueError(f"No hay antiderivada en forma cerrada: {self.fallback_reason}")
+        return sample_function(self._F, x)
+    
+    def _complex_difference(self, a, b):
+        # F(b) - F(a) con aritmética compleja: log(x^2 - 1) en (0, 1) tiene la misma parte
+        # imaginaria (iπ) en ambos extremos y la diferencia es real
+        with np.errstate(all='ignore'):
+            try:
+                difference = (np.asarray(self._F(b.astype(complex)), dtype=complex)
+                              - np.asarray(self._F(a.astype(complex)), dtype=complex))
+            except Exception:
+                return np.full(a.shape, np.nan)
+        difference = np.broadcast_to(difference, a.shape)
+        real = difference.real.copy()
+        real[~(np.abs(difference.imag) <= COMPLEX_TOLERANCE * np.maximum(1.0, np.abs(real)))] = np.nan
+        return real
+    
+    def _singular_set(self):
+        # Singularidades reales del integrando y de F (puede ser un conjunto infinito, p. ej. tan)
+        if self._singularities is None:
+            self._singularities = real_singularities(self.expr, self.var, self.antiderivative)
+        return self._singularities
+    
+    def branch_points(self, lower, upper):
+        """
+        Sorted real singularities of the integrand and of F in [lower, upper].
+        
+        Args:
+            lower (float): Start of the range
+            upper (float): End of the range
+        
+        Returns:
+            numpy.ndarray: The points (empty if none, or if they cannot be determined)
+        """
+        return self._branch_points.get_or_create(
+            (float(lower), float(upper)), lambda: singular_points_between(self._singular_set(), lower, upper))
+    
+    def closed_form_between(self, a, b):
+        """
+        F(b) - F(a) for arrays of bounds, and where it is valid.
+        
+        Args:
+            a (array-like): Lower bounds
+            b (array-like): Upper bounds (broadcast against a)
+        
+        Returns:
+            tuple: (values, valid) arrays; values are NaN where valid is False
+        """
+        a, b = np.broadcast_arrays(np.asarray(a, dtype=float), np.asarray(b, dtype=float))
+        values = np.full(a.shape, np.nan)
+        if not self.has_closed_form or a.size == 0:
+            return values, np.zeros(a.shape, dtype=bool)
+        
+        lo, hi = np.minimum(a, b), np.maximum(a, b)
+        valid = np.isfinite(lo) & np.isfinite(hi)
+        values = np.array(self(b) - self(a), dtype=float).reshape(a.shape)
+        retry = valid & ~np.isfinite(values)
+        if retry.any():
+            values[retry] = self._complex_difference(a[retry], b[retry])
+        valid &= np.isfinite(values)
+        if valid.any():
+            points = self.branch_points(lo[valid].min(), hi[valid].max())
+            if points.size:
+                # Ventanas con una singularidad estrictamente dentro: cuántos puntos caen en (lo, hi)
+                inside = np.searchsorted(points, hi, side='left') - np.searchsorted(points, lo, side='right')
+                valid &= inside <= 0
+        values[~valid] = np.nan
+        return values, valid
+    
+    def between(self, a, b):
+        """
+        Definite integrals ∫_a^b f for arrays of bounds.
+        
+        Args:
+            a (array-like): Lower bounds
+            b (array-like): Upper bounds (broadcast against a)
+        
+        Returns:
+            numpy.ndarray: The integrals (a float for scalar bounds); NaN where
+                even the quadrature fails, as for divergent windows (tan on [1, 2])
+        """
+        with span("integral.between", windows=int(np.size(a))):
+            values, valid = self.closed_form_between(a, b)
+            a, b = np.broadcast_arrays(np.asarray(a, dtype=float), np.asarray(b, dtype=float))
+            fallback = np.flatnonzero(~valid)
+            if fallback.size:
+                with span("integral.between.quadrature", windows=int(fallback.size)):
+                    flat_values = values.reshape(-1)
+                    for i, lower, upper in zip(fallback, a.reshape(-1)[fallback], b.reshape(-1)[fallback]):
+                        try:
+                            flat_values[i] = numeric_definite_integral(self.func_str, lower, upper, self.var_str)[0]
+                        except Exception:
+                            flat_values[i] = np.nan
+                    values = flat_values.reshape(values.shape)
+                self.quadrature_windows += int(fallback.size)
+            return values if values.ndim else float(values)
+
+@traced("integral.compile")
+def compile_integral(func_str, var_str="x", mode="auto", timeout=None):
+    """
+    Compile an integrand for evaluating many definite integrals (cached).
+    
+    The antiderivative comes from the shared antiderivative store; in
+    "auto" mode a symbolic integration that times out or fails leaves the
+    object without a closed form, so every window is integrated numerically.
+    
+    Args:
+        func_str (str): String representation of the function to integrate
+        var_str (str): The variable of integration
+        mode (str): "symbolic", "numeric" (quadrature only) or "auto"
+        timeout (float): Deadline of the symbolic integration (default
+            AUTO_SYMBOLIC_TIMEOUT in "auto" mode and SYMBOLIC_TIMEOUT otherwise)
+    
+    Returns:
+        CompiledIntegral: The compiled integral
+    """
+    if mode not in INTEGRATION_MODES:
+        raise ValueError(f"Modo de integración desconocido: {mode}")
+    func_str = _strip_integral_sign(func_str)
+    if timeout is None and mode == "auto":
+        timeout = AUTO_SYMBOLIC_TIMEOUT
+    
+    def compute():
+        compiled = compile_expression(func_str, var_str)
+        if mode == "numeric":
+            return CompiledIntegral(func_str, var_str, compiled.expr, compiled.var)
+        try:
+            with span("integral.antiderivative"):
+                antiderivative = cached_antiderivative(compiled.expr, compiled.var, timeout=timeout)
+        except SymbolicTimeoutError as e:
+            if mode == "symbolic":
+                raise
+            return CompiledIntegral(func_str, var_str, compiled.expr, compiled.var, fallback_reason=str(e))
+        except Exception as e:
+            if mode == "symbolic":
+                raise
+            return CompiledIntegral(func_str, var_str, compiled.expr, compiled.var,
+                                    fallback_reason=str(e) or type(e).__name__)
+        return CompiledIntegral(func_str, var_str, compiled.expr, compiled.var, antiderivative)
+    
+    return _compiled_cache.get_or_create(_normalize_expression_key(func_str, var_str) + (mode,), compute)
@@ -3,16 +3,16 @@ import sympy as sp
 import numpy as np
 from sympy import symbols, sympify, integrate, sin, cos, exp, log, sqrt, Rational, pi, E, Float
 
-def generate_random_function(complexity="medium", var_str="x"):
+def get_function_catalog(var_str="x"):
     """
-    Genera una función matemática aleatoria.
+    Devuelve el catálogo de funciones usado por el generador de ejemplos.
     
     Args:
-        complexity (str): Nivel de complejidad ("simple", "medium", "complex")
         var_str (str): Variable a utilizar
     
     Returns:
-        tuple: (func_str, latex_form, description) - Cadena de función, formato LaTeX, descripción
+        dict: Listas de tuplas (func_str, expresión SymPy, descripción) por nivel
+              de complejidad ("simple", "medium", "complex")
     """
     var = symbols(var_str)
     
@@ -52,13 +52,32 @@ def generate_random_function(complexity="medium", var_str="x"):
         (f"(exp({var_str}) - exp(-{var_str}))/2", (exp(var) - exp(-var))/2, "función seno hiperbólico"),
     ]
     
+    return {
+        "simple": simple_functions,
+        "medium": medium_functions,
+        "complex": complex_functions
+    }
+
+def generate_random_function(complexity="medium", var_str="x"):
+    """
+    Genera una función matemática aleatoria.
+    
+    Args:
+        complexity (str): Nivel de complejidad ("simple", "medium", "complex")
+        var_str (str): Variable a utilizar
+    
+    Returns:
+        tuple: (func_str, latex_form, description) - Cadena de función, formato LaTeX, descripción
+    """
+    catalog = get_function_catalog(var_str)
+    
     # Seleccionar funciones según complejidad
     if complexity == "simple":
-        func_collection = simple_functions
+        func_collection = catalog["simple"]
     elif complexity == "complex":
-        func_collection = complex_functions
+        func_collection = catalog["complex"]
     else:  # medium
-        func_collection = medium_functions
+        func_collection = catalog["medium"]
     
     # Seleccionar función aleatoria
     func_str, func_expr, func_desc = random.choice(func_collection)
@@ -0,0 +1,254 @@
+import re
+from collections import namedtuple
+import sympy as sp
+from utils.cache import LRUCache
+from utils.symbolic_worker import run_symbolic
+
+# Cachés del flujo de tokens y del árbol SymPy, indexadas por el texto de la expresión
+TOKEN_CACHE_SIZE = 1024
+TREE_CACHE_SIZE = 1024
+_token_cache = LRUCache(maxsize=TOKEN_CACHE_SIZE)
+_tree_cache = LRUCache(maxsize=TREE_CACHE_SIZE)
+
+def _with_deadline(operation):
+    # integrate, diff y limit pueden no terminar nunca (integrate(exp(x^x))): se ejecutan en el grupo de
+    # procesos simbólicos con su tiempo límite en lugar de en el proceso que analiza la expresión
+    def call(*arguments):
+        return run_symbolic(operation, *arguments)
+    return call
+
+# Funciones reconocidas (incluye los nombres que inserta el teclado matemático)
+FUNCTIONS = {
+    'sin': sp.sin, 'cos': sp.cos, 'tan': sp.tan, 'csc': sp.csc, 'sec': sp.sec, 'cot': sp.cot,
+    'asin': sp.asin, 'acos': sp.acos, 'atan': sp.atan, 'acsc': sp.acsc, 'asec': sp.asec, 'acot': sp.acot,
+    'arcsin': sp.asin, 'arccos': sp.acos, 'arctan': sp.atan,
+    'sinh': sp.sinh, 'cosh': sp.cosh, 'tanh': sp.tanh, 'csch': sp.csch, 'sech': sp.sech, 'coth': sp.coth,
+    'asinh': sp.asinh, 'acosh': sp.acosh, 'atanh': sp.atanh,
+    'exp': sp.exp, 'Exp': sp.exp, 'log': sp.log, 'ln': sp.log, 'sqrt': sp.sqrt, 'cbrt': sp.cbrt, 'root': sp.root,
+    'abs': sp.Abs, 'Abs': sp.Abs, 'sign': sp.sign, 'floor': sp.floor, 'ceiling': sp.ceiling, 'ceil': sp.ceiling,
+    'factorial': sp.factorial, 'gamma': sp.gamma, 'erf': sp.erf, 'Heaviside': sp.Heaviside,
+    'Min': sp.Min, 'Max': sp.Max, 'min': sp.Min, 'max': sp.Max,
+    'diff': _with_deadline(sp.diff), 'integrate': _with_deadline(sp.integrate), 'limit': _with_deadline(sp.limit)
+}
+
+# Constantes: e es siempre el número de Euler (no un símbolo), π y ∞ se aceptan en Unicode
+CONSTANTS = {'pi': sp.pi, 'π': sp.pi, 'e': sp.E, 'E': sp.E, 'oo': sp.oo, 'inf': sp.oo, '∞': sp.oo, 'I': sp.I}
+
+# Operadores Unicode equivalentes a los de ASCII
+_OPERATOR_ALIASES = {'×': '*', '·': '*', '÷': '/', '−': '-', '**': '^'}
+
+_TOKEN_RE = re.compile(r"""
+    (?P<space>\s+)
+  | (?P<number>(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?)
+  | (?P<name>[A-Za-z_][A-Za-z_0-9]*|[π∞])
+  | (?P<op>\*\*|[-+*/^(),!×·÷−√²³])
+""", re.VERBOSE)
+
+Token = namedtuple("Token", ["kind", "value", "position", "spaced"])
+
+_END = Token("end", None, None, False)
+
+class ExpressionSyntaxError(ValueError):
+    """Raised when an expression does not follow the calculator grammar."""
+
+def tokenize(text):
+    """
+    Split an expression into number, name and operator tokens (cached).
+    
+    Args:
+        text (str): Expression as typed by the user
+    
+    Returns:
+        tuple: Token(kind, value, position, spaced) items; operators are normalized
+               to ASCII and spaced tells whether whitespace precedes the token
+    """
+    return _token_cache.get_or_create(text, lambda: _tokenize(text))
+
+def _tokenize(text):
+    tokens = []
+    position = 0
+    spaced = False
+    while position < len(text):
+        match = _TOKEN_RE.match(text, position)
+        if match is None:
+            raise ExpressionSyntaxError(f"Carácter no válido '{text[position]}' en la posición {position + 1}")
+        kind = match.lastgroup
+        value = match.group()
+        if kind != "space":
+            tokens.append(Token(kind, _OPERATOR_ALIASES.get(value, value), position + 1, spaced))
+        spaced = kind == "space"
+        position = match.end()
+    return tuple(tokens)
+
+class _Parser:
+    """
+    Recursive-descent parser that builds the SymPy tree while it reads.
+    
+    Grammar (lowest to highest precedence):
+        expression := term (('+' | '-') term)*
+        term       := unary (('*' | '/' | implicit) unary)*
+        unary      := ('+' | '-') unary | power
+        power      := postfix ('^' unary)?            right-associative
+        postfix    := atom ('!' | '²' | '³')*
+        atom       := number | constant | symbol | function '(' arguments ')'
+                      | '(' expression ')' | '√' postfix
+    Implicit multiplication only covers a number used as a coefficient
+    (2x, 3sin(x), 2√x) and an operand followed by '(' (x(x+1), (x+1)(x-1)),
+    always without whitespace in between; anything else ("x y", "2 x",
+    "x^2y") is reported as a missing operator.
+    """
+    
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.index = 0
+    
+    def peek(self):
+        return self.tokens[self.index] if self.index < len(self.tokens) else _END
+    
+    def advance(self):
+        token = self.peek()
+        self.index += 1
+        return token
+    
+    def expect(self, value, context):
+        token = self.advance()
+        if token.value != value:
+            found = "el final" if token.kind == "end" else f"'{token.value}' (posición {token.position})"
+            raise ExpressionSyntaxError(f"Se esperaba '{value}' {context}, se encontró {found}")
+    
+    def parse(self):
+        if not self.tokens:
+            raise ExpressionSyntaxError("La expresión está vacía")
+        result = self.expression()
+        token = self.peek()
+        if token.kind != "end":
+            raise ExpressionSyntaxError(f"Símbolo inesperado '{token.value}' en la posición {token.position}")
+        return result
+    
+    def expression(self):
+        result = self.term()
+        while self.peek().value in ('+', '-'):
+            if self.advance().value == '+':
+                result = result + self.term()
+            else:
+                result = result - self.term()
+        return result
+    
+    def _starts_operand(self, token):
+        return token.kind in ("number", "name") or token.value in ('(', '√')
+    
+    def _check_implicit_product(self, start, token):
+        # El operando anterior es un coeficiente si, sin contar los signos, es un solo número
+        first = start
+        while self.tokens[first].value in ('+', '-'):
+            first += 1
+        coefficient = self.index - first == 1 and self.tokens[first].kind == "number"
+        allowed = token.value == '(' or (coefficient and (token.kind == "name" or token.value == '√'))
+        if token.spaced or not allowed:
+            raise ExpressionSyntaxError(f"Falta un operador antes de '{token.value}' en la posición {token.position}")
+    
+    def term(self):
+        start = self.index
+        result = self.unary()
+        while True:
+            token = self.peek()
+            if token.value in ('*', '/'):
+                self.advance()
+                start = self.index
+                operand = self.unary()
+                result = result * operand if token.value == '*' else result / operand
+            elif self._starts_operand(token):
+                self._check_implicit_product(start, token)
+                start = self.index
+                result = result * self.unary()
+            else:
+                return result
+    
+    def unary(self):
+        token = self.peek()
+        if token.value == '-':
+            self.advance()
+            return -self.unary()
+        if token.value == '+':
+            self.advance()
+            return self.unary()
+        return self.power()
+    
+    def power(self):
+        base = self.postfix()
+        if self.peek().value == '^':
+            self.advance()
+            return base ** self.unary()
+        return base
+    
+    def postfix(self):
+        result = self.atom()
+        while self.peek().value in ('!', '²', '³'):
+            operator = self.advance().value
+            if operator == '!':
+                result = sp.factorial(result)
+            else:
+                result = result ** (2 if operator == '²' else 3)
+        return result
+    
+    def atom(self):
+        token = self.advance()
+        if token.kind == "number":
+            if any(c in token.value for c in ".eE"):
+                return sp.Float(token.value)
+            return sp.Integer(token.value)
+        
+        if token.kind == "name":
+            if token.value in FUNCTIONS:
+                self.expect('(', f"después de {token.value}")
+                arguments = [self.expression()]
+                while self.peek().value == ',':
+                    self.advance()
+                    arguments.append(self.expression())
+                self.expect(')', f"para cerrar {token.value}(")
+                return FUNCTIONS[token.value](*arguments)
+            if token.value in CONSTANTS:
+                return CONSTANTS[token.value]
+            return sp.Symbol(token.value)
+        
+        if token.value == '(':
+            result = self.expression()
+            self.expect(')', "para cerrar el paréntesis")
+            return result
+        
+        if token.value == '√':
+            return sp.sqrt(self.postfix())
+        
+        if token.kind == "end":
+            raise ExpressionSyntaxError("La expresión termina de forma incompleta")
+        raise ExpressionSyntaxError(f"Símbolo inesperado '{token.value}' en la posición {token.position}")
+
+def parse_math(text):
+    """
+    Parse a calculator expression directly into a SymPy tree (cached).
+    
+    Unlike sympify, nothing is evaluated as Python: ^ and ** are powers,
+    e is Euler's number and products may be implicit (2x, 3sin(x)).
+    integrate, diff and limit run in the symbolic worker pool and raise
+    SymbolicTimeoutError when they exceed SYMBOLIC_TIMEOUT.
+    
+    Args:
+        text (str): Expression as typed by the user
+    
+    Returns:
+        sympy.Expr: The parsed expression
+    """
+    return _tree_cache.get_or_create(text, lambda: _Parser(tokenize(text)).parse())
+
+def parser_cache_info():
+    """
+    Report hit/miss statistics of the token and tree caches.
+    
+    Returns:
+        dict: {"tokens": ..., "trees": ...} with the LRUCache.info() of each
+    """
+    return {"tokens": _token_cache.info(), "trees": _tree_cache.info()}
+
+def clear_parser_caches():
+    _token_cache.clear()
+    _tree_cache.clear()
@@ -0,0 +1,242 @@
+import hashlib
+import threading
+import numpy as np
+import sympy as sp
+from sympy import lambdify
+from utils.cache import LRUCache
+
+# Puntos complejos fijos (en todo el plano, lejos de 0 y del eje real negativo exacto) donde se
+# evalúa cada expresión para su huella; otra semilla da los puntos de verificación de colisiones
+FINGERPRINT_SEED = 20240611
+VERIFICATION_SEED = 977
+FINGERPRINT_POINTS = 8
+VERIFICATION_POINTS = 16
+
+# Cifras significativas con que se redondean los valores antes de calcular el hash
+FINGERPRINT_DIGITS = 9
+
+# Tolerancia relativa con que dos expresiones se consideran iguales en los puntos de verificación
+VERIFICATION_TOLERANCE = 1e-9
+
+# Tamaño máximo (operaciones) de una expresión para expandirla al calcular su forma canónica
+CANONICAL_MAX_OPS = 200
+
+# Huellas por texto de expresión y clases de equivalencia conocidas
+FINGERPRINT_CACHE_SIZE = 1024
+EQUIVALENCE_INDEX_SIZE = 1024
+_fingerprint_cache = LRUCache(maxsize=FINGERPRINT_CACHE_SIZE)
+_representative_cache = LRUCache(maxsize=FINGERPRINT_CACHE_SIZE)
+
+def _sample_points(seed, count):
+    rng = np.random.default_rng(seed)
+    modulus = rng.uniform(0.3, 2.5, count)
+    angle = rng.uniform(-np.pi, np.pi, count)
+    return modulus * np.exp(1j * angle)
+
+_FINGERPRINT_POINTS = _sample_points(FINGERPRINT_SEED, FINGERPRINT_POINTS)
+_VERIFICATION_POINTS = _sample_points(VERIFICATION_SEED, VERIFICATION_POINTS)
+
+def canonical_form(expr):
+    """
+    Canonical SymPy form used to compare expressions structurally.
+    
+    Small expressions are expanded, so (x + 1)^2 and x^2 + 2x + 1 share it;
+    larger ones are kept as parsed to avoid an expensive expansion.
+    """
+    if sp.count_ops(expr) > CANONICAL_MAX_OPS:
+        return expr
+    return sp.expand(expr)
+
+def _values_at(expr, var, points, func=None):
+    """Values of expr at complex points (NaN where undefined), or None if it cannot be evaluated."""
+    f = func or lambdify(var, expr, "numpy")
+    try:
+        with np.errstate(all='ignore'):
+            values = np.asarray(f(points), dtype=complex)
+    except Exception:
+        return None
+    values = np.broadcast_to(values, points.shape).copy()
+    values[~np.isfinite(values)] = np.nan
+    return values
+
+def _rounded(value):
+    # Redondeo relativo al módulo: una parte imaginaria residual (1e-17i) se anula
+    if np.isnan(value) or value == 0:
+        return str(value)
+    # El exponente se toma del módulo ya redondeado (0.9999999999 cuenta como 1)
+    exponent = int(f"{abs(value):.{FINGERPRINT_DIGITS - 1}e}".split("e")[1]) - FINGERPRINT_DIGITS + 1
+    scale = 10.0 ** exponent
+    return f"{round(value.real / scale)},{round(value.imag / scale)}e{exponent}"
+
+def fingerprint(expr, var, func=None):
+    """
+    Numeric fingerprint of an expression as a function of var.
+    
+    The expression is evaluated at FINGERPRINT_POINTS fixed complex points
+    spread over the whole plane (so sqrt(x^2) and x, which only agree for
+    Re(x) > 0, get different fingerprints), the values are rounded to
+    FINGERPRINT_DIGITS significant digits of their modulus and hashed
+    together with the variable name. Expressions that cannot be evaluated there (other free
+    symbols, functions without complex support) are fingerprinted by their
+    canonical form instead.
+    
+    Args:
+        expr (sympy.Expr): Expression
+        var (sympy.Symbol): Its variable
+        func (callable): Already lambdified function of expr (optional)
+    
+    Returns:
+        str: Hex digest; equal for equivalent expressions (up to rounding at
+             the last digit) and, with high probability, different otherwise
+    """
+    values = None
+    if expr.free_symbols <= {var}:
+        values = _values_at(expr, var, _FINGERPRINT_POINTS, func)
+    if values is None or np.isnan(values).all():
+        text = "s|" + sp.srepr(canonical_form(expr))
+    else:
+        text = "n|" + ";".join(_rounded(v) for v in values)
+    return hashlib.blake2b(f"{var}|{text}".encode("utf-8"), digest_size=16).hexdigest()
+
+def expression_fingerprint(expr_str, var_str="x"):
+    """Fingerprint of an expression string (parsed with compile_expression, cached by text)."""
+    # Importación diferida: calculator importa antiderivative_store, que usa este módulo
+    from utils.calculator import compile_expression, _normalize_expression_key
+    
+    key = _normalize_expression_key(expr_str, var_str)
+    
+    def compute():
+        compiled = compile_expression(expr_str, var_str)
+        return fingerprint(compiled.expr, compiled.var, compiled.func)
+    
+    return _fingerprint_cache.get_or_create(key, compute)
+
+def equivalent(expr1, expr2, var):
+    """
+    Collision check: whether two expressions with equal fingerprints really are the same function.
+    
+    True when their canonical forms coincide or their values agree at
+    VERIFICATION_POINTS independent points (NaN in the same places).
+    """
+    if expr1 == expr2 or canonical_form(expr1) == canonical_form(expr2):
+        return True
+    if not (expr1.free_symbols | expr2.free_symbols) <= {var}:
+        return False
+    values1 = _values_at(expr1, var, _VERIFICATION_POINTS)
+    values2 = _values_at(expr2, var, _VERIFICATION_POINTS)
+    if values1 is None or values2 is None:
+        return False
+    undefined = np.isnan(values1)
+    if not np.array_equal(undefined, np.isnan(values2)) or undefined.all():
+        return False
+    scale = np.maximum(1.0, np.abs(values1[~undefined]))
+    return bool(np.all(np.abs(values1[~undefined] - values2[~undefined]) <= VERIFICATION_TOLERANCE * scale))
+
+class EquivalenceIndex:
+    """
+    Bounded map from equivalence classes of expressions to a shared value.
+    
+    Lookups go through the fingerprint and every candidate with the same
+    fingerprint is confirmed with equivalent() before it is trusted; a
+    fingerprint shared by non-equivalent expressions is counted as a
+    collision and both are kept apart.
+    """
+    
+    def __init__(self, maxsize=EQUIVALENCE_INDEX_SIZE):
+        self._classes = LRUCache(maxsize=maxsize)
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._collisions = 0
+    
+    def lookup(self, expr, var, key):
+        """
+        Value registered for an expression equivalent to expr, or None.
+        
+        Args:
+            expr (sympy.Expr): Expression
+            var (sympy.Symbol): Its variable
+            key (str): Fingerprint of expr
+        """
+        candidates = self._classes.get(key) or []
+        collision = False
+        for candidate, value in candidates:
+            if equivalent(candidate, expr, var):
+                with self._lock:
+                    self._hits += 1
+                return value
+            collision = True
+        with self._lock:
+            self._misses += 1
+            self._collisions += collision
+        return None
+    
+    def register(self, expr, key, value):
+        """Remember value for the class of expr (fingerprint key)."""
+        with self._lock:
+            candidates = list(self._classes.get(key) or [])
+            candidates.append((expr, value))
+            self._classes.put(key, candidates)
+    
+    def resolve(self, expr, var, key, value):
+        """Value of an equivalent expression if one is registered; otherwise register and return value."""
+        shared = self.lookup(expr, var, key)
+        if shared is None:
+            self.register(expr, key, value)
+            return value
+        return shared
+    
+    def info(self):
+        """
+        Report the index statistics.
+        
+        Returns:
+            dict: hits, misses, collisions and classes (fingerprints stored)
+        """
+        with self._lock:
+            return {
+                'hits': self._hits,
+                'misses': self._misses,
+                'collisions': self._collisions,
+                'classes': len(self._classes)
+            }
+    
+    def clear(self):
+        """Forget every class and reset the statistics."""
+        with self._lock:
+            self._classes.clear()
+            self._hits = self._misses = self._collisions = 0
+
+_default_index = EquivalenceIndex()
+
+def get_equivalence_index():
+    """Return the process-wide index used by shared_expression."""
+    return _default_index
+
+def shared_expression(expr_str, var_str="x"):
+    """
+    Representative text of the equivalence class of an expression.
+    
+    The first expression seen in a class represents it: "x*x", "(x)^2" and
+    "x**2" all return whichever of them was passed first, so caches keyed on
+    the returned text are shared by equivalent inputs. Expressions that do
+    not parse are returned unchanged (the cached computation reports the error).
+    
+    Args:
+        expr_str (str): Expression as typed
+        var_str (str): Variable name
+    
+    Returns:
+        str: The representative expression text
+    """
+    from utils.calculator import compile_expression, _normalize_expression_key
+    
+    def compute():
+        compiled = compile_expression(expr_str, var_str)
+        key = expression_fingerprint(expr_str, var_str)
+        return _default_index.resolve(compiled.expr, compiled.var, key, expr_str)
+    
+    try:
+        return _representative_cache.get_or_create(_normalize_expression_key(expr_str, var_str), compute)
+    except ValueError:
+        return expr_str
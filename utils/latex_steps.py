@@ -0,0 +1,105 @@
+import sympy as sp
+from utils.cache import LRUCache
+from utils.tracing import span
+
+# Fragmentos LaTeX ya generados, compartidos por todos los pasos del proceso
+LATEX_CACHE_SIZE = 512
+_latex_cache = LRUCache(maxsize=LATEX_CACHE_SIZE)
+
+# Longitud máxima (caracteres) de un fragmento; las sumas más largas se recortan con \cdots
+LATEX_MAX_CHARS = 3000
+
+# Expresiones con más operaciones que esto se recortan sin imprimirlas enteras
+LATEX_MAX_OPS = 400
+
+def _elided_sum(expr):
+    """First terms of a long sum followed by \\cdots and the number of omitted terms."""
+    terms = expr.as_ordered_terms()
+    parts = []
+    length = 0
+    for term in terms:
+        text = latex_fragment(term)
+        if parts and length + len(text) > LATEX_MAX_CHARS // 2:
+            break
+        parts.append(text)
+        length += len(text)
+    omitted = len(terms) - len(parts)
+    text = " + ".join(parts).replace("+ -", "- ")
+    if omitted:
+        text += f" + \\cdots \\; \\text{{({omitted} términos más)}}"
+    return text
+
+def _render(expr):
+    if isinstance(expr, sp.Add) and sp.count_ops(expr) > LATEX_MAX_OPS:
+        return _elided_sum(expr)
+    text = sp.latex(expr)
+    if len(text) <= LATEX_MAX_CHARS:
+        return text
+    if isinstance(expr, sp.Add):
+        return _elided_sum(expr)
+    return f"\\text{{(expresión de {len(text)} caracteres omitida)}}"
+
+def latex_fragment(expr):
+    """
+    LaTeX of a SymPy expression, memoized and capped at LATEX_MAX_CHARS.
+    
+    Long sums keep their first terms and end in \\cdots; other oversized
+    expressions are replaced by a note with their length.
+    
+    Args:
+        expr (sympy.Basic): Expression to print
+    
+    Returns:
+        str: The LaTeX fragment (without $ delimiters)
+    """
+    return _latex_cache.get_or_create(expr, lambda: _render(expr))
+
+class LazyLatex:
+    """A SymPy expression printed as LaTeX only when it is converted to str."""
+    
+    def __init__(self, expr):
+        self.expr = expr
+    
+    def __str__(self):
+        return latex_fragment(self.expr)
+    
+    def __repr__(self):
+        return f"LazyLatex({self.expr!r})"
+
+class LatexStep:
+    """
+    One solution step made of plain text and LaTeX fragments.
+    
+    The step is joined into a string the first time str() is called and
+    then kept; until then no LaTeX is printed. Only the expressions are
+    stored, so steps can be pickled by st.cache_data.
+    """
+    
+    def __init__(self, *parts):
+        self.parts = tuple(LazyLatex(p) if isinstance(p, sp.Basic) else p for p in parts)
+        self._text = None
+    
+    def __str__(self):
+        if self._text is None:
+            self._text = "".join(str(part) for part in self.parts)
+        return self._text
+    
+    def __repr__(self):
+        return f"LatexStep({str(self)!r})"
+
+def render_steps(steps):
+    """
+    Materialize a list of steps (strings or LatexStep) as strings.
+    
+    Args:
+        steps (list): Steps as returned by solve_integral or calculate_area_between_curves
+    
+    Returns:
+        list: The steps as str
+    """
+    with span("steps.render", steps=len(steps)):
+        return [str(step) for step in steps]
+
+def latex_cache_info():
+    """Report the statistics of the LaTeX fragment cache (see LRUCache.info)."""
+    return _latex_cache.info()
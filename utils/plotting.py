@@ -1,11 +1,17 @@
+import re
 import numpy as np
-import matplotlib.pyplot as plt
 import plotly.graph_objects as go
 import sympy as sp
-import streamlit as st
-from sympy import symbols, sympify, lambdify
-from utils.calculator import parse_expression
+from utils.accumulation import accumulation_function
+from utils.calculator import compile_expression
+from utils.riemann_sum import calculate_riemann_sum
+from utils.sampling import adaptive_sample, adaptive_sample_many
+from utils.tracing import span, traced
 
+# Número de rectángulos a partir del cual se dibujan bloques agregados
+RIEMANN_MAX_RECTANGLES = 200
+
+@traced("figure.function")
 def plot_function(func_str, x_range=(-10, 10), var_str="x", title=None, color='blue'):
     """
     Plot a function using Plotly.
@@ -21,26 +27,14 @@ def plot_function(func_str, x_range=(-10, 10), var_str="x", title=None, color='b
         plotly.graph_objects.Figure: Plotly figure object
     """
     try:
-        # Parse the function
-        expr = parse_expression(func_str, var_str)
-        var = symbols(var_str)
-        
-        # Create a numeric function using lambdify
-        f = lambdify(var, expr, "numpy")
+        # Parsed expression and numeric function come from the shared cache
+        f = compile_expression(func_str, var_str).func
         
         # Generate x values
         x_min, x_max = x_range
-        x = np.linspace(x_min, x_max, 1000)
         
-        # Calculate y values safely
-        y = np.zeros_like(x)
-        for i, x_val in enumerate(x):
-            try:
-                y_val = f(x_val)
-                if np.isfinite(y_val) and not np.isnan(y_val):
-                    y[i] = y_val
-            except:
-                pass  # Skip points where evaluation fails
+        # Calculate y values adaptively (undefined points become gaps)
+        x, y = adaptive_sample(f, x_min, x_max)
         
         # Create plot
         fig = go.Figure()
@@ -51,7 +45,7 @@ def plot_function(func_str, x_range=(-10, 10), var_str="x", title=None, color='b
             fig.update_layout(title=title)
         else:
             fig.update_layout(title=f"Graph of f({var_str}) = {func_str}")
-            
+        
         fig.update_layout(
             xaxis_title=var_str,
             yaxis_title=f"f({var_str})",
@@ -78,8 +72,7 @@ def plot_function(func_str, x_range=(-10, 10), var_str="x", title=None, color='b
         return fig
     
     except Exception as e:
-        st.error(f"Error plotting function: {str(e)}")
-        # Return empty figure
+        # Return empty figure with the error message
         fig = go.Figure()
         fig.update_layout(
             title="Error plotting function",
@@ -94,117 +87,142 @@ def plot_function(func_str, x_range=(-10, 10), var_str="x", title=None, color='b
         )
         return fig
 
-def plot_integral(func_str, lower_bound_str, upper_bound_str, var_str="x"):
+@traced("figure.integral")
+def build_integral_figure(func_str, lower_bound_str, upper_bound_str, var_str="x", accumulation=False):
     """
-    Plot a function and shade the area under the curve for a definite integral.
+    Build a figure of a function with the area under the curve shaded for a definite integral.
+    
+    With accumulation, the accumulation function F(x) = ∫_a^x f(t) dt is
+    overlaid on a second y axis. It is computed from the same samples as
+    the curve of f (see utils.accumulation.accumulation_function), and a
+    unified hover with a vertical spike shows f and F at the same x.
     
     Args:
         func_str (str): String representation of the function
         lower_bound_str (str): Lower bound of integration
         upper_bound_str (str): Upper bound of integration
         var_str (str): Variable name
+        accumulation (bool): Overlay the accumulation function F
     
     Returns:
-        None: Displays the plot using Streamlit
+        plotly.graph_objects.Figure: Plotly figure object
     """
-    try:
-        # Parse the function
-        expr = parse_expression(func_str, var_str)
-        var = symbols(var_str)
-        
-        # Convert bounds to float
-        lower_bound = float(lower_bound_str)
-        upper_bound = float(upper_bound_str)
-        
-        # Create a numeric function using lambdify
-        f = lambdify(var, expr, "numpy")
-        
-        # Generate x values
-        x_range = (min(lower_bound, upper_bound) - 1, max(lower_bound, upper_bound) + 1)
-        x = np.linspace(x_range[0], x_range[1], 1000)
-        
-        # Calculate y values
-        y = np.array([float(f(x_val)) for x_val in x])
-        
-        # Create plot
-        fig = go.Figure()
-        
-        # Add function curve
-        fig.add_trace(go.Scatter(
-            x=x, 
-            y=y, 
-            mode='lines', 
-            name=func_str,
-            line=dict(color='blue', width=2)
+    # Parsed expression and numeric function come from the shared cache
+    f = compile_expression(func_str, var_str).func
+    
+    # Convert bounds to float
+    lower_bound = float(lower_bound_str)
+    upper_bound = float(upper_bound_str)
+    
+    # Generate x values
+    x_range = (min(lower_bound, upper_bound) - 1, max(lower_bound, upper_bound) + 1)
+    
+    # Calculate y values adaptively
+    with span("figure.sample"):
+        x, y = adaptive_sample(f, x_range[0], x_range[1])
+    
+    # Traces, shapes and layout are collected first and passed to a single go.Figure
+    # call: plotly validates the figure once instead of once per add_trace/update_layout
+    traces = [go.Scatter(
+        x=x,
+        y=y,
+        mode='lines',
+        name=func_str,
+        line=dict(color='blue', width=2)
+    )]
+    
+    # Add filled area for the integral
+    with span("figure.sample"):
+        x_fill, y_fill = adaptive_sample(f, lower_bound, upper_bound, max_points=500)
+    
+    # Create fill from function down to x-axis
+    traces.append(go.Scatter(
+        x=x_fill,
+        y=y_fill,
+        fill='tozeroy',
+        fillcolor='rgba(30, 136, 229, 0.3)',
+        line=dict(color='rgba(0,0,0,0)'),
+        name=f'Integral from {lower_bound} to {upper_bound}'
+    ))
+    
+    # Vertical lines at bounds
+    shapes = [
+        dict(type="line", x0=lower_bound, y0=0, x1=lower_bound, y1=np.nan_to_num(y_fill[0]),
+             line=dict(color="red", width=2, dash="dash")),
+        dict(type="line", x0=upper_bound, y0=0, x1=upper_bound, y1=np.nan_to_num(y_fill[-1]),
+             line=dict(color="red", width=2, dash="dash"))
+    ]
+    
+    # Ajustes del eje secundario y del cursor compartido
+    accumulation_layout = {}
+    spikes = {}
+    if accumulation:
+        with span("figure.accumulation"):
+            F, method = accumulation_function(func_str, lower_bound, x, var_str, y=y)
+        traces.append(go.Scatter(
+            x=x,
+            y=F,
+            mode='lines',
+            name=f"F({var_str}) = ∫ from {lower_bound} to {var_str}",
+            line=dict(color='darkorange', width=2),
+            yaxis='y2',
+            hovertemplate=f"F = %{{y:.6g}} ({method})<extra></extra>"
         ))
-        
-        # Add filled area for the integral
-        x_fill = np.linspace(lower_bound, upper_bound, 500)
-        y_fill = np.array([float(f(x_val)) for x_val in x_fill])
-        
-        # Create fill from function down to x-axis
-        fig.add_trace(go.Scatter(
-            x=x_fill,
-            y=y_fill,
-            fill='tozeroy',
-            fillcolor='rgba(30, 136, 229, 0.3)',
-            line=dict(color='rgba(0,0,0,0)'),
-            name=f'Integral from {lower_bound} to {upper_bound}'
+        traces.append(go.Scatter(
+            x=[upper_bound],
+            y=[np.interp(upper_bound, x, F)],
+            mode='markers',
+            name=f"F({upper_bound})",
+            marker=dict(color='darkorange', size=10, symbol='diamond'),
+            yaxis='y2'
         ))
-        
-        # Add vertical lines at bounds
-        fig.add_shape(
-            type="line",
-            x0=lower_bound, y0=0, x1=lower_bound, y1=f(lower_bound),
-            line=dict(color="red", width=2, dash="dash"),
-        )
-        
-        fig.add_shape(
-            type="line",
-            x0=upper_bound, y0=0, x1=upper_bound, y1=f(upper_bound),
-            line=dict(color="red", width=2, dash="dash"),
-        )
-        
-        # Update layout
-        fig.update_layout(
-            title=f"Definite Integral of f({var_str}) = {func_str} from {lower_bound} to {upper_bound}",
-            xaxis_title=var_str,
-            yaxis_title=f"f({var_str})",
-            autosize=True,
-            margin=dict(l=0, r=0, t=40, b=0),
-            plot_bgcolor='rgba(240,242,246,0.8)',
-            paper_bgcolor='rgba(0,0,0,0)',
-            xaxis=dict(
-                showgrid=True,
-                gridcolor='rgba(200,200,200,0.8)',
-                zeroline=True,
-                zerolinecolor='rgba(0,0,0,0.5)',
-                zerolinewidth=1.5
-            ),
-            yaxis=dict(
-                showgrid=True,
-                gridcolor='rgba(200,200,200,0.8)',
-                zeroline=True,
-                zerolinecolor='rgba(0,0,0,0.5)',
-                zerolinewidth=1.5
-            ),
-            legend=dict(
-                yanchor="top",
-                y=0.99,
-                xanchor="left",
-                x=0.01
-            )
+        accumulation_layout = dict(
+            hovermode='x unified',
+            yaxis2=dict(title=f"F({var_str})", overlaying='y', side='right', showgrid=False, zeroline=False)
         )
-        
-        # Display the plot in Streamlit
-        st.plotly_chart(fig, use_container_width=True)
-        
-    except Exception as e:
-        st.error(f"Error plotting integral: {str(e)}")
+        spikes = dict(showspikes=True, spikemode='across', spikesnap='cursor', spikethickness=1,
+                      spikedash='dot', spikecolor='gray')
+    
+    # Layout
+    fig = go.Figure(data=traces, layout=dict(
+        title=f"Definite Integral of f({var_str}) = {func_str} from {lower_bound} to {upper_bound}",
+        xaxis_title=var_str,
+        yaxis_title=f"f({var_str})",
+        autosize=True,
+        margin=dict(l=0, r=0, t=40, b=0),
+        plot_bgcolor='rgba(240,242,246,0.8)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        shapes=shapes,
+        xaxis=dict(
+            showgrid=True,
+            gridcolor='rgba(200,200,200,0.8)',
+            zeroline=True,
+            zerolinecolor='rgba(0,0,0,0.5)',
+            zerolinewidth=1.5,
+            **spikes
+        ),
+        yaxis=dict(
+            showgrid=True,
+            gridcolor='rgba(200,200,200,0.8)',
+            zeroline=True,
+            zerolinecolor='rgba(0,0,0,0.5)',
+            zerolinewidth=1.5
+        ),
+        legend=dict(
+            yanchor="top",
+            y=0.99,
+            xanchor="left",
+            x=0.01
+        ),
+        **accumulation_layout
+    ))
+    
+    return fig
 
-def plot_area_between_curves(func1_str, func2_str, lower_bound, upper_bound, var_str="x"):
+@traced("figure.area_between_curves")
+def build_area_between_curves_figure(func1_str, func2_str, lower_bound, upper_bound, var_str="x"):
     """
-    Plot two functions and shade the area between them.
+    Build a figure of two functions with the area between them shaded.
     
     Args:
         func1_str (str): String representation of the first function
@@ -214,239 +232,336 @@ def plot_area_between_curves(func1_str, func2_str, lower_bound, upper_bound, var
         var_str (str): Variable name
     
     Returns:
-        None: Displays the plot using Streamlit
+        plotly.graph_objects.Figure: Plotly figure object
     """
-    try:
-        # Parse the functions
-        expr1 = parse_expression(func1_str, var_str)
-        expr2 = parse_expression(func2_str, var_str)
-        var = symbols(var_str)
-        
-        # Create numeric functions using lambdify
-        f1 = lambdify(var, expr1, "numpy")
-        f2 = lambdify(var, expr2, "numpy")
-        
-        # Generate x values
-        x_range = (min(lower_bound, upper_bound) - 1, max(lower_bound, upper_bound) + 1)
-        x = np.linspace(x_range[0], x_range[1], 1000)
-        
-        # Calculate y values
-        y1 = np.array([float(f1(x_val)) for x_val in x])
-        y2 = np.array([float(f2(x_val)) for x_val in x])
-        
-        # Create plot
-        fig = go.Figure()
-        
-        # Add function curves
-        fig.add_trace(go.Scatter(
-            x=x, 
-            y=y1, 
-            mode='lines', 
-            name=func1_str,
-            line=dict(color='blue', width=2)
-        ))
-        
-        fig.add_trace(go.Scatter(
-            x=x, 
-            y=y2, 
-            mode='lines', 
-            name=func2_str,
-            line=dict(color='green', width=2)
-        ))
-        
-        # Add filled area between curves
-        x_fill = np.linspace(lower_bound, upper_bound, 500)
-        y1_fill = np.array([float(f1(x_val)) for x_val in x_fill])
-        y2_fill = np.array([float(f2(x_val)) for x_val in x_fill])
-        
-        # Add top curve
-        fig.add_trace(go.Scatter(
-            x=x_fill,
-            y=y1_fill,
-            mode='lines',
-            line=dict(width=0),
-            showlegend=False
-        ))
-        
-        # Add bottom curve and fill
-        fig.add_trace(go.Scatter(
-            x=x_fill,
-            y=y2_fill,
-            mode='lines',
-            line=dict(width=0),
-            fill='tonexty',
-            fillcolor='rgba(30, 136, 229, 0.3)',
-            name=f'Area between curves'
-        ))
-        
-        # Add vertical lines at bounds
-        fig.add_shape(
-            type="line",
-            x0=lower_bound, y0=min(f1(lower_bound), f2(lower_bound)), 
-            x1=lower_bound, y1=max(f1(lower_bound), f2(lower_bound)),
-            line=dict(color="red", width=2, dash="dash"),
-        )
-        
-        fig.add_shape(
-            type="line",
-            x0=upper_bound, y0=min(f1(upper_bound), f2(upper_bound)), 
-            x1=upper_bound, y1=max(f1(upper_bound), f2(upper_bound)),
-            line=dict(color="red", width=2, dash="dash"),
-        )
-        
-        # Update layout
-        fig.update_layout(
-            title=f"Area Between Curves: {func1_str} and {func2_str} from {lower_bound} to {upper_bound}",
-            xaxis_title=var_str,
-            yaxis_title=f"y",
-            autosize=True,
-            margin=dict(l=0, r=0, t=40, b=0),
-            plot_bgcolor='rgba(240,242,246,0.8)',
-            paper_bgcolor='rgba(0,0,0,0)',
-            xaxis=dict(
-                showgrid=True,
-                gridcolor='rgba(200,200,200,0.8)',
-                zeroline=True,
-                zerolinecolor='rgba(0,0,0,0.5)',
-                zerolinewidth=1.5
-            ),
-            yaxis=dict(
-                showgrid=True,
-                gridcolor='rgba(200,200,200,0.8)',
-                zeroline=True,
-                zerolinecolor='rgba(0,0,0,0.5)',
-                zerolinewidth=1.5
-            ),
-            legend=dict(
-                yanchor="top",
-                y=0.99,
-                xanchor="left",
-                x=0.01
-            )
+    # Parsed expressions and numeric functions come from the shared cache
+    f1 = compile_expression(func1_str, var_str).func
+    f2 = compile_expression(func2_str, var_str).func
+    
+    # Generate x values
+    x_range = (min(lower_bound, upper_bound) - 1, max(lower_bound, upper_bound) + 1)
+    
+    # Calculate y values adaptively on a shared grid
+    with span("figure.sample"):
+        x, (y1, y2) = adaptive_sample_many([f1, f2], x_range[0], x_range[1])
+    
+    # Create plot
+    fig = go.Figure()
+    
+    # Add function curves
+    fig.add_trace(go.Scatter(
+        x=x,
+        y=y1,
+        mode='lines',
+        name=func1_str,
+        line=dict(color='blue', width=2)
+    ))
+    
+    fig.add_trace(go.Scatter(
+        x=x,
+        y=y2,
+        mode='lines',
+        name=func2_str,
+        line=dict(color='green', width=2)
+    ))
+    
+    # Add filled area between curves
+    with span("figure.sample"):
+        x_fill, (y1_fill, y2_fill) = adaptive_sample_many([f1, f2], lower_bound, upper_bound, max_points=500)
+    
+    # Add top curve
+    fig.add_trace(go.Scatter(
+        x=x_fill,
+        y=y1_fill,
+        mode='lines',
+        line=dict(width=0),
+        showlegend=False
+    ))
+    
+    # Add bottom curve and fill
+    fig.add_trace(go.Scatter(
+        x=x_fill,
+        y=y2_fill,
+        mode='lines',
+        line=dict(width=0),
+        fill='tonexty',
+        fillcolor='rgba(30, 136, 229, 0.3)',
+        name=f'Area between curves'
+    ))
+    
+    # Add vertical lines at bounds
+    fig.add_shape(
+        type="line",
+        x0=lower_bound, y0=np.nanmin([y1_fill[0], y2_fill[0], 0]),
+        x1=lower_bound, y1=np.nanmax([y1_fill[0], y2_fill[0], 0]),
+        line=dict(color="red", width=2, dash="dash"),
+    )
+    
+    fig.add_shape(
+        type="line",
+        x0=upper_bound, y0=np.nanmin([y1_fill[-1], y2_fill[-1], 0]),
+        x1=upper_bound, y1=np.nanmax([y1_fill[-1], y2_fill[-1], 0]),
+        line=dict(color="red", width=2, dash="dash"),
+    )
+    
+    # Update layout
+    fig.update_layout(
+        title=f"Area Between Curves: {func1_str} and {func2_str} from {lower_bound} to {upper_bound}",
+        xaxis_title=var_str,
+        yaxis_title=f"y",
+        autosize=True,
+        margin=dict(l=0, r=0, t=40, b=0),
+        plot_bgcolor='rgba(240,242,246,0.8)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        xaxis=dict(
+            showgrid=True,
+            gridcolor='rgba(200,200,200,0.8)',
+            zeroline=True,
+            zerolinecolor='rgba(0,0,0,0.5)',
+            zerolinewidth=1.5
+        ),
+        yaxis=dict(
+            showgrid=True,
+            gridcolor='rgba(200,200,200,0.8)',
+            zeroline=True,
+            zerolinecolor='rgba(0,0,0,0.5)',
+            zerolinewidth=1.5
+        ),
+        legend=dict(
+            yanchor="top",
+            y=0.99,
+            xanchor="left",
+            x=0.01
         )
-        
-        # Display the plot in Streamlit
-        st.plotly_chart(fig, use_container_width=True)
-        
-    except Exception as e:
-        st.error(f"Error plotting area between curves: {str(e)}")
+    )
+    
+    return fig
 
-def plot_riemann_sum(func_str, lower_bound, upper_bound, n, method='left', var_str="x"):
+def riemann_rectangle_blocks(result, max_rectangles=RIEMANN_MAX_RECTANGLES):
     """
-    Plot a function with Riemann sum rectangles.
+    Reduce the rectangles of a Riemann sum to at most max_rectangles blocks.
+    
+    Consecutive rectangles are merged into blocks whose height is the mean of
+    their heights, so each block keeps the total area of the rectangles it
+    replaces. With n <= max_rectangles the rectangles are returned unchanged.
+    
+    Args:
+        result (RiemannSumResult): Result of calculate_riemann_sum
+        max_rectangles (int): Maximum number of blocks to draw
+    
+    Returns:
+        tuple: (x_edges, heights) with len(x_edges) == len(heights) + 1
+    """
+    heights = np.nan_to_num(result.function_values, nan=0.0, posinf=0.0, neginf=0.0)
+    indices = np.arange(result.n + 1)
+    if result.n > max_rectangles:
+        indices = np.unique(np.linspace(0, result.n, max_rectangles + 1).round().astype(int))
+        heights = np.add.reduceat(heights, indices[:-1]) / np.diff(indices)
+    return result.lower_bound + indices * result.delta_x, heights
+
+def rectangle_polygons(x_edges, heights):
+    """
+    Build the vertices of many rectangles as one NaN-separated polygon list.
+    
+    Args:
+        x_edges (numpy.ndarray): Edges of the rectangles (one more than heights)
+        heights (numpy.ndarray): Height of each rectangle
+    
+    Returns:
+        tuple: (x, y) arrays with 6 entries per rectangle (5 vertices and a NaN gap)
+    """
+    left, right = x_edges[:-1], x_edges[1:]
+    zeros = np.zeros_like(heights)
+    gaps = np.full_like(heights, np.nan)
+    x = np.column_stack([left, right, right, left, left, gaps]).ravel()
+    y = np.column_stack([zeros, zeros, heights, heights, zeros, gaps]).ravel()
+    return x, y
+
+@traced("figure.riemann_sum")
+def build_riemann_sum_figure(func_str, lower_bound, upper_bound, n, method='left', var_str="x", max_rectangles=RIEMANN_MAX_RECTANGLES):
+    """
+    Build a figure of a function with its Riemann sum rectangles.
     
     Args:
         func_str (str): String representation of the function
         lower_bound (float): Lower bound of the interval
         upper_bound (float): Upper bound of the interval
         n (int): Number of subdivisions
-        method (str): Method for selecting sample points ('left', 'right', 'midpoint')
+        method (str): Method for selecting sample points ('left', 'right', 'midpoint',
+            'trapezoid', 'simpson')
         var_str (str): Variable name
+        max_rectangles (int): Number of rectangles above which they are drawn as
+            aggregated blocks
     
     Returns:
-        None: Displays the plot using Streamlit
+        plotly.graph_objects.Figure: Plotly figure object
     """
-    try:
-        # Parse the function
-        expr = parse_expression(func_str, var_str)
-        var = symbols(var_str)
-        
-        # Create a numeric function using lambdify
-        f = lambdify(var, expr, "numpy")
-        
-        # Generate x values for the function curve
-        x_range = (min(lower_bound, upper_bound) - 1, max(lower_bound, upper_bound) + 1)
-        x_curve = np.linspace(x_range[0], x_range[1], 1000)
-        
-        # Calculate y values for the function curve
-        y_curve = np.array([float(f(x_val)) for x_val in x_curve])
-        
-        # Calculate Riemann sum rectangles
-        width = (upper_bound - lower_bound) / n
-        rectangles = []
-        
-        for i in range(n):
-            x_left = lower_bound + i * width
-            x_right = lower_bound + (i + 1) * width
-            
-            if method == 'left':
-                sample_point = x_left
-            elif method == 'right':
-                sample_point = x_right
-            elif method == 'midpoint':
-                sample_point = (x_left + x_right) / 2
-            else:
-                raise ValueError(f"Unknown method: {method}")
-            
-            height = f(sample_point)
-            
-            # Rectangle vertices
-            rectangles.append({
-                'x': [x_left, x_right, x_right, x_left, x_left],
-                'y': [0, 0, height, height, 0],
-                'height': height
-            })
-        
-        # Create plot
-        fig = go.Figure()
-        
-        # Add rectangles
-        for i, rect in enumerate(rectangles):
-            fig.add_trace(go.Scatter(
-                x=rect['x'],
-                y=rect['y'],
-                fill="toself",
-                fillcolor=f'rgba(30, 136, 229, 0.4)',
-                line=dict(color='rgba(30, 136, 229, 0.8)'),
-                name=f'Rectangle {i+1} (h={rect["height"]:.4f})',
-                showlegend=False
-            ))
-        
-        # Add function curve
-        fig.add_trace(go.Scatter(
-            x=x_curve, 
-            y=y_curve, 
-            mode='lines', 
-            name=func_str,
-            line=dict(color='blue', width=2)
-        ))
-        
-        # Calculate the Riemann sum
-        riemann_sum = sum(rect['height'] * width for rect in rectangles)
-        
-        # Update layout
-        fig.update_layout(
-            title=f"Riemann Sum ({method}) of f({var_str}) = {func_str} with {n} subdivisions<br>Sum = {riemann_sum:.6f}",
-            xaxis_title=var_str,
-            yaxis_title=f"f({var_str})",
-            autosize=True,
-            margin=dict(l=0, r=0, t=60, b=0),
-            plot_bgcolor='rgba(240,242,246,0.8)',
-            paper_bgcolor='rgba(0,0,0,0)',
-            xaxis=dict(
-                showgrid=True,
-                gridcolor='rgba(200,200,200,0.8)',
-                zeroline=True,
-                zerolinecolor='rgba(0,0,0,0.5)',
-                zerolinewidth=1.5
-            ),
-            yaxis=dict(
-                showgrid=True,
-                gridcolor='rgba(200,200,200,0.8)',
-                zeroline=True,
-                zerolinecolor='rgba(0,0,0,0.5)',
-                zerolinewidth=1.5
-            ),
-            legend=dict(
-                yanchor="top",
-                y=0.99,
-                xanchor="left",
-                x=0.01
-            )
+    # Parsed expression and numeric function come from the shared cache
+    f = compile_expression(func_str, var_str).func
+    
+    # Generate x values for the function curve
+    x_range = (min(lower_bound, upper_bound) - 1, max(lower_bound, upper_bound) + 1)
+    
+    # Calculate y values for the function curve adaptively
+    with span("figure.sample"):
+        x_curve, y_curve = adaptive_sample(f, x_range[0], x_range[1])
+    
+    # Calculate Riemann sum rectangles with the vectorized engine
+    riemann_sum, result = calculate_riemann_sum(func_str, lower_bound, upper_bound, n, method, var_str)
+    
+    # Above max_rectangles, consecutive rectangles are merged into area-preserving blocks
+    x_edges, heights = riemann_rectangle_blocks(result, max_rectangles)
+    aggregated = heights.size < n
+    rect_x, rect_y = rectangle_polygons(x_edges, heights)
+    
+    # Create plot
+    fig = go.Figure()
+    
+    # Add all rectangles as a single NaN-separated trace
+    fig.add_trace(go.Scatter(
+        x=rect_x,
+        y=rect_y,
+        fill="toself",
+        fillcolor='rgba(30, 136, 229, 0.4)',
+        line=dict(color='rgba(30, 136, 229, 0.8)'),
+        name=f'{heights.size} blocks of {n} rectangles' if aggregated else f'{n} rectangles',
+        hoverinfo='skip',
+        showlegend=False
+    ))
+    
+    # Add function curve
+    fig.add_trace(go.Scatter(
+        x=x_curve,
+        y=y_curve,
+        mode='lines',
+        name=func_str,
+        line=dict(color='blue', width=2)
+    ))
+    
+    # Update layout
+    fig.update_layout(
+        title=(f"Riemann Sum ({method}) of f({var_str}) = {func_str} with {n} subdivisions<br>Sum = {riemann_sum:.6f}"
+               + (f" (showing {heights.size} aggregated blocks)" if aggregated else "")),
+        xaxis_title=var_str,
+        yaxis_title=f"f({var_str})",
+        autosize=True,
+        margin=dict(l=0, r=0, t=60, b=0),
+        plot_bgcolor='rgba(240,242,246,0.8)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        xaxis=dict(
+            showgrid=True,
+            gridcolor='rgba(200,200,200,0.8)',
+            zeroline=True,
+            zerolinecolor='rgba(0,0,0,0.5)',
+            zerolinewidth=1.5
+        ),
+        yaxis=dict(
+            showgrid=True,
+            gridcolor='rgba(200,200,200,0.8)',
+            zeroline=True,
+            zerolinecolor='rgba(0,0,0,0.5)',
+            zerolinewidth=1.5
+        ),
+        legend=dict(
+            yanchor="top",
+            y=0.99,
+            xanchor="left",
+            x=0.01
         )
-        
-        # Display the plot in Streamlit
-        st.plotly_chart(fig, use_container_width=True)
-        
-    except Exception as e:
-        st.error(f"Error plotting Riemann sum: {str(e)}")
+    )
+    
+    return fig
+
+@traced("figure.riemann_sweep")
+def build_riemann_sweep_figure(sweep):
+    """
+    Build a log-log figure of the error of a Riemann sweep against n.
+    
+    The sweep is passed already computed (see utils.riemann_sweep.riemann_sweep),
+    so drawing it does not evaluate the function again.
+    
+    Args:
+        sweep (RiemannSweepResult): Sums, extrapolations and errors of the sweep
+    
+    Returns:
+        plotly.graph_objects.Figure: Plotly figure object
+    """
+    method, var_str, func_str = sweep.method, sweep.var_str, sweep.func_str
+    
+    # Los errores nulos no se pueden dibujar en escala logarítmica
+    errors = np.where(sweep.errors > 0, sweep.errors, np.nan)
+    extrapolated_errors = np.where(sweep.extrapolated_errors > 0, sweep.extrapolated_errors, np.nan)
+    
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(
+        x=sweep.n,
+        y=errors,
+        mode='lines+markers',
+        name=f'|R_n - I| ({method})',
+        line=dict(color='rgba(30, 136, 229, 1)', width=2)
+    ))
+    fig.add_trace(go.Scatter(
+        x=sweep.n,
+        y=extrapolated_errors,
+        mode='lines+markers',
+        name='Richardson / Romberg',
+        line=dict(color='red', width=2, dash='dash')
+    ))
+    
+    reference_label = "exact integral" if sweep.reference_given else "best extrapolation"
+    fig.update_layout(
+        title=f"Convergence of the {method} rule for f({var_str}) = {func_str}<br>Error against the {reference_label}",
+        xaxis_title="n",
+        yaxis_title="Absolute error",
+        autosize=True,
+        margin=dict(l=0, r=0, t=60, b=0),
+        plot_bgcolor='rgba(240,242,246,0.8)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        xaxis=dict(
+            type='log',
+            showgrid=True,
+            gridcolor='rgba(200,200,200,0.8)'
+        ),
+        yaxis=dict(
+            type='log',
+            exponentformat='e',
+            showgrid=True,
+            gridcolor='rgba(200,200,200,0.8)'
+        ),
+        legend=dict(
+            yanchor="bottom",
+            y=0.01,
+            xanchor="left",
+            x=0.01
+        )
+    )
+    
+    return fig
+
+def relabel_figure(fig, replacements):
+    """
+    Copy of a figure with some expression labels replaced.
+    
+    Cached figures are built for the representative of a class of
+    equivalent expressions; this shows the expression as the user typed it
+    in trace names and in the title.
+    
+    Args:
+        fig (plotly.graph_objects.Figure): Figure to relabel
+        replacements (dict): {label in the figure: label to show}
+    
+    Returns:
+        plotly.graph_objects.Figure: The relabelled copy
+    """
+    fig = go.Figure(fig)
+    for trace in fig.data:
+        if trace.name in replacements:
+            trace.name = replacements[trace.name]
+    title = fig.layout.title.text
+    if title:
+        for old, new in replacements.items():
+            # Solo donde la expresión aparece completa: tras "= ", ": " o "and " y antes de " from", " and", " with" o "<br>"
+            pattern = rf"(?:(?<== )|(?<=: )|(?<=and )){re.escape(old)}(?= from| and| with|<br>|$)"
+            title = re.sub(pattern, lambda match: new, title)
+        fig.update_layout(title=title)
+    return fig
@@ -1,9 +1,316 @@
+import math
+from functools import lru_cache
 import numpy as np
 import sympy as sp
-from sympy import symbols, sympify, lambdify
-from utils.calculator import parse_expression
+from sympy import symbols, lambdify
+from utils.calculator import parse_expression, compile_expression
+from utils.tracing import span, traced
 
-def calculate_riemann_sum(func_str, lower_bound, upper_bound, n, method='left', var_str="x"):
+# Métodos soportados por el motor vectorizado
+RIEMANN_METHODS = ('left', 'right', 'midpoint', 'trapezoid', 'simpson')
+
+# Número máximo de rectángulos que se detallan en la vista paso a paso
+MAX_DETAILED_STEPS = 100
+
+# Modos de precisión: suma compensada en float64, mpmath o forma cerrada exacta (polinomios)
+RIEMANN_PRECISIONS = ('compensated', 'mpmath', 'exact')
+
+# Dígitos decimales usados por defecto en el modo mpmath
+MPMATH_DEFAULT_DPS = 50
+
+# Tamaño de los bloques que np.sum suma por pares antes de combinarlos con math.fsum
+COMPENSATED_BLOCK_SIZE = 4096
+
+# Posición del punto de muestra (fracción de Δx) y peso de cada suma desplazada por método
+_EXACT_SHIFTS = {
+    'left': ((sp.Integer(0), sp.Integer(1)),),
+    'right': ((sp.Integer(1), sp.Integer(1)),),
+    'midpoint': ((sp.Rational(1, 2), sp.Integer(1)),),
+    'trapezoid': ((sp.Integer(0), sp.Rational(1, 2)), (sp.Integer(1), sp.Rational(1, 2))),
+    'simpson': ((sp.Integer(0), sp.Rational(1, 6)), (sp.Rational(1, 2), sp.Rational(2, 3)),
+                (sp.Integer(1), sp.Rational(1, 6)))
+}
+
+_faulhaber_n = symbols('n', integer=True, positive=True)
+
+class RiemannSumResult:
+    """
+    Columnar result of a Riemann sum.
+    
+    Heights and running sums are stored as NumPy arrays; the remaining columns
+    (endpoints, sample points and areas) are derived on demand from the
+    interval, so memory stays at two float arrays regardless of the method.
+    Indexing or iterating yields the per-rectangle dictionaries used by the
+    step view, built lazily one rectangle at a time.
+    
+    When the sum itself was obtained without the heights (the exact path for
+    polynomials), the arrays are only evaluated from func_str the first time
+    a column is needed, so a huge n costs nothing until the rectangles are
+    inspected.
+    """
+    
+    def __init__(self, lower_bound, upper_bound, n, method, function_values=None, running_sum=None,
+                 value=None, precision="compensated", func_str=None, var_str="x"):
+        self.lower_bound = lower_bound
+        self.upper_bound = upper_bound
+        self.n = n
+        self.method = method
+        self.delta_x = (upper_bound - lower_bound) / n
+        self.value = value
+        self.precision = precision
+        self.func_str = func_str
+        self.var_str = var_str
+        self._function_values = function_values
+        self._running_sum = running_sum
+    
+    @property
+    def function_values(self):
+        """numpy.ndarray: Effective height of every subinterval."""
+        if self._function_values is None:
+            f = compile_expression(self.func_str, self.var_str).func
+            self._function_values = riemann_heights(f, self.lower_bound, self.upper_bound, self.n, self.method)
+        return self._function_values
+    
+    @property
+    def running_sum(self):
+        """numpy.ndarray: Sum of the areas of the first k rectangles, for every k."""
+        if self._running_sum is None:
+            self._running_sum = np.cumsum(self.function_values * self.delta_x)
+        return self._running_sum
+    
+    @property
+    def total(self):
+        """float: The value of the Riemann sum."""
+        if self.value is not None:
+            return float(self.value)
+        return float(self.running_sum[-1])
+    
+    @property
+    def x_left(self):
+        return self.lower_bound + np.arange(self.n) * self.delta_x
+    
+    @property
+    def x_right(self):
+        return self.lower_bound + np.arange(1, self.n + 1) * self.delta_x
+    
+    @property
+    def sample_points(self):
+        return self.lower_bound + (np.arange(self.n) + _sample_offset(self.method)) * self.delta_x
+    
+    @property
+    def rectangle_areas(self):
+        return self.function_values * self.delta_x
+    
+    def __len__(self):
+        return self.n
+    
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self.n))]
+        if index < 0:
+            index += self.n
+        if not 0 <= index < self.n:
+            raise IndexError("Riemann sum index out of range")
+        
+        if self._function_values is None and self.precision == 'exact':
+            function_value, running_sum = self._exact_rectangle(index)
+        else:
+            function_value, running_sum = self.function_values[index], self.running_sum[index]
+        return {
+            'subinterval_index': index + 1,
+            'x_left': self.lower_bound + index * self.delta_x,
+            'x_right': self.lower_bound + (index + 1) * self.delta_x,
+            'sample_point': self.lower_bound + (index + _sample_offset(self.method)) * self.delta_x,
+            'function_value': function_value,
+            'rectangle_area': function_value * self.delta_x,
+            'running_sum': running_sum
+        }
+    
+    def _exact_rectangle(self, index):
+        """Height and running sum of one rectangle without evaluating all n heights."""
+        compiled = compile_expression(self.func_str, self.var_str)
+        x_left = self.lower_bound + index * self.delta_x
+        height = riemann_heights(compiled.func, x_left, x_left + self.delta_x, 1, self.method)[0]
+        # La suma acumulada es la suma exacta de los index + 1 primeros subintervalos
+        running_sum = exact_riemann_sum(compiled.expr, compiled.var, self.lower_bound,
+                                        self.lower_bound + (index + 1) * self.delta_x, index + 1, self.method)
+        return float(height), float(running_sum)
+    
+    def __iter__(self):
+        for i in range(self.n):
+            yield self[i]
+
+def _sample_offset(method):
+    """Position of the sample point inside each subinterval, as a fraction of Δx."""
+    if method == 'left':
+        return 0.0
+    if method == 'right':
+        return 1.0
+    # midpoint, trapezoid and simpson report the midpoint as representative point
+    return 0.5
+
+def _evaluate_on_grid(f, points):
+    """
+    Evaluate a lambdified function over an array of points in one call.
+    
+    Constant functions return a scalar from lambdify, so the result is
+    broadcast to the shape of the grid.
+    """
+    with np.errstate(all='ignore'):
+        try:
+            values = np.asarray(f(points), dtype=float)
+        except (TypeError, ValueError):
+            # Expresiones que no aceptan arreglos (p. ej. Piecewise complejos)
+            values = np.array([float(f(p)) for p in points], dtype=float)
+    return np.broadcast_to(values, points.shape).astype(float, copy=False)
+
+def riemann_heights(f, lower_bound, upper_bound, n, method='left'):
+    """
+    Compute the effective height of every subinterval in one vectorized pass.
+    
+    Args:
+        f (callable): Vectorized numeric function
+        lower_bound (float): Lower bound of the interval
+        upper_bound (float): Upper bound of the interval
+        n (int): Number of subdivisions
+        method (str): One of RIEMANN_METHODS
+    
+    Returns:
+        numpy.ndarray: Array of n heights such that height * Δx is the area of each subinterval
+    """
+    if method not in RIEMANN_METHODS:
+        raise ValueError(f"Unknown method: {method}")
+    
+    delta_x = (upper_bound - lower_bound) / n
+    
+    if method in ('left', 'right', 'midpoint'):
+        points = lower_bound + (np.arange(n) + _sample_offset(method)) * delta_x
+        return _evaluate_on_grid(f, points)
+    
+    # Los métodos compuestos reutilizan los n + 1 nodos para ambos extremos
+    nodes = _evaluate_on_grid(f, lower_bound + np.arange(n + 1) * delta_x)
+    if method == 'trapezoid':
+        return (nodes[:-1] + nodes[1:]) / 2
+    
+    # Simpson en cada subintervalo usando su punto medio
+    midpoints = _evaluate_on_grid(f, lower_bound + (np.arange(n) + 0.5) * delta_x)
+    return (nodes[:-1] + 4 * midpoints + nodes[1:]) / 6
+
+def compensated_sum(values, block_size=COMPENSATED_BLOCK_SIZE):
+    """
+    Sum a float array with an error that does not grow with its length.
+    
+    Blocks of block_size values are summed pairwise by np.sum (error of a
+    few ulps per block) and the block sums are then added exactly with
+    math.fsum, so the rounding error stays at a few ulps of the result for
+    any n, at close to the speed of np.sum. A naive running sum loses about
+    log10(n) digits instead.
+    
+    Args:
+        values (numpy.ndarray): Values to add
+        block_size (int): Length of the pairwise-summed blocks
+    
+    Returns:
+        float: The sum
+    """
+    values = np.asarray(values, dtype=float).reshape(-1)
+    full = values.size - values.size % block_size
+    partial = values[:full].reshape(-1, block_size).sum(axis=1).tolist() if full else []
+    return math.fsum(partial + [float(values[full:].sum())])
+
+def _exact_bound(value):
+    """Exact SymPy number for a bound: decimals as typed (0.1 -> 1/10), strings parsed."""
+    if isinstance(value, sp.Basic):
+        return value
+    if isinstance(value, (int, np.integer)):
+        return sp.Integer(int(value))
+    if isinstance(value, (float, np.floating)):
+        return sp.Rational(repr(float(value)))
+    return parse_expression(str(value))
+
+@lru_cache(maxsize=64)
+def _faulhaber(k):
+    """Polynomial in n equal to 0^k + 1^k + ... + (n - 1)^k (Faulhaber's formula)."""
+    bernoulli = sp.expand(sp.bernoulli(k + 1, _faulhaber_n))
+    return sp.Poly((bernoulli - bernoulli.subs(_faulhaber_n, 0)) / (k + 1), _faulhaber_n)
+
+def exact_riemann_sum(expr, var, lower_bound, upper_bound, n, method='left'):
+    """
+    Exact value of the Riemann sum of a polynomial, in time independent of n.
+    
+    With h = (b - a) / n, every sum of the methods is a combination of the
+    shifted sums Σ_{i=0}^{n-1} p(a + (i + c)h) for c in {0, 1/2, 1}. p(a + (i + c)h)
+    is expanded as a polynomial in i and each power Σ i^k is replaced by its
+    Faulhaber polynomial evaluated at n, so the cost depends only on the degree.
+    
+    Args:
+        expr (sympy.Expr): Polynomial in var
+        var (sympy.Symbol): Variable of the polynomial
+        lower_bound: Lower bound (number, string or SymPy expression)
+        upper_bound: Upper bound (number, string or SymPy expression)
+        n (int): Number of subdivisions
+        method (str): One of RIEMANN_METHODS
+    
+    Returns:
+        sympy.Expr: The exact sum (a Rational for rational bounds)
+    """
+    if method not in RIEMANN_METHODS:
+        raise ValueError(f"Unknown method: {method}")
+    if not expr.is_polynomial(var):
+        raise ValueError("El modo exacto solo admite funciones polinómicas")
+    
+    a = _exact_bound(lower_bound)
+    b = _exact_bound(upper_bound)
+    h = (b - a) / n
+    i = sp.Dummy('i')
+    total = sp.Integer(0)
+    for shift, weight in _EXACT_SHIFTS[method]:
+        shifted = sp.Poly(sp.expand(expr.subs(var, a + (i + shift) * h)), i)
+        for (k,), coefficient in shifted.terms():
+            total += weight * coefficient * _faulhaber(k).eval(n)
+    return sp.expand(total * h)
+
+def mpmath_riemann_sum(expr, var, lower_bound, upper_bound, n, method='left', dps=MPMATH_DEFAULT_DPS):
+    """
+    Riemann sum evaluated and accumulated with mpmath at dps decimal digits.
+    
+    Args:
+        expr (sympy.Expr): Function to sum
+        var (sympy.Symbol): Variable of the function
+        lower_bound: Lower bound (number, string or SymPy expression)
+        upper_bound: Upper bound (number, string or SymPy expression)
+        n (int): Number of subdivisions
+        method (str): One of RIEMANN_METHODS
+        dps (int): Decimal digits of precision
+    
+    Returns:
+        sympy.Float: The sum, with dps significant digits
+    """
+    import mpmath
+    
+    if method not in RIEMANN_METHODS:
+        raise ValueError(f"Unknown method: {method}")
+    
+    f = lambdify(var, expr, "mpmath")
+    with mpmath.workdps(dps):
+        a = mpmath.mpf(str(sp.N(_exact_bound(lower_bound), dps + 5)))
+        b = mpmath.mpf(str(sp.N(_exact_bound(upper_bound), dps + 5)))
+        h = (b - a) / n
+        shifts = _EXACT_SHIFTS[method]
+        # Los extremos izquierdo y derecho comparten los n + 1 nodos
+        nodes = [f(a + k * h) for k in range(n + 1)] if any(shift != sp.S.Half for shift, _ in shifts) else None
+        total = mpmath.mpf(0)
+        for shift, weight in shifts:
+            if shift == sp.S.Half:
+                values = [f(a + (k + mpmath.mpf(0.5)) * h) for k in range(n)]
+            else:
+                values = nodes[:-1] if shift == 0 else nodes[1:]
+            total += mpmath.mpf(weight.p) / weight.q * mpmath.fsum(values)
+        return sp.Float(total * h, dps)
+
+@traced("calculate_riemann_sum")
+def calculate_riemann_sum(func_str, lower_bound, upper_bound, n, method='left', var_str="x",
+                          precision='compensated', dps=MPMATH_DEFAULT_DPS):
     """
     Calculate the Riemann sum for a function.
     
@@ -12,67 +319,63 @@ def calculate_riemann_sum(func_str, lower_bound, upper_bound, n, method='left',
         lower_bound (float): Lower bound of the interval
         upper_bound (float): Upper bound of the interval
         n (int): Number of subdivisions
-        method (str): Method for selecting sample points ('left', 'right', 'midpoint')
+        method (str): Method for selecting sample points ('left', 'right', 'midpoint',
+            'trapezoid', 'simpson')
         var_str (str): Variable name
+        precision (str): 'compensated' (float64 heights, error-free summation),
+            'mpmath' (evaluation and summation with dps digits) or 'exact'
+            (closed form for polynomials, constant time in n)
+        dps (int): Decimal digits used by the 'mpmath' precision
     
     Returns:
-        tuple: (riemann_sum, step_details) where riemann_sum is the calculated sum and 
-               step_details is a list of dictionaries with information about each subinterval
+        tuple: (riemann_sum, step_details) where riemann_sum is the calculated sum and
+               step_details is a RiemannSumResult that yields one dictionary per subinterval;
+               its value attribute keeps the mpmath or exact SymPy value
     """
     try:
-        # Parse the function
-        expr = parse_expression(func_str, var_str)
-        var = symbols(var_str)
+        if precision not in RIEMANN_PRECISIONS:
+            raise ValueError(f"Unknown precision: {precision}")
+        n = int(n)
+        if n < 1:
+            raise ValueError("n must be a positive integer")
+        
+        if precision != 'compensated':
+            with span("riemann.parse"):
+                compiled = compile_expression(func_str, var_str)
+            with span(f"riemann.{precision}", n=n, method=method):
+                if precision == 'exact':
+                    value = exact_riemann_sum(compiled.expr, compiled.var, lower_bound, upper_bound, n, method)
+                else:
+                    value = mpmath_riemann_sum(compiled.expr, compiled.var, lower_bound, upper_bound, n, method, dps)
+            # Las alturas en float64 solo se calculan si se piden los rectángulos
+            result = RiemannSumResult(float(_exact_bound(lower_bound)), float(_exact_bound(upper_bound)), n,
+                                      method, value=value, precision=precision, func_str=func_str,
+                                      var_str=var_str)
+            return result.total, result
         
-        # Create a numeric function using lambdify
-        f = lambdify(var, expr, "numpy")
+        # Parsed expression and numeric function come from the shared cache
+        with span("riemann.parse"):
+            f = compile_expression(func_str, var_str).func
         
-        # Calculate width of each subinterval
+        lower_bound = float(lower_bound)
+        upper_bound = float(upper_bound)
+        
+        # Alturas de todos los subintervalos en una sola pasada vectorizada
         delta_x = (upper_bound - lower_bound) / n
+        with span("riemann.evaluate", n=n, method=method):
+            heights = riemann_heights(f, lower_bound, upper_bound, n, method)
+        with span("riemann.sum"):
+            total = compensated_sum(heights) * delta_x
         
-        # Initialize sum and step details
-        riemann_sum = 0
-        step_details = []
+        result = RiemannSumResult(lower_bound, upper_bound, n, method, heights, value=total)
         
-        for i in range(n):
-            x_left = lower_bound + i * delta_x
-            x_right = lower_bound + (i + 1) * delta_x
-            
-            if method == 'left':
-                sample_point = x_left
-            elif method == 'right':
-                sample_point = x_right
-            elif method == 'midpoint':
-                sample_point = (x_left + x_right) / 2
-            else:
-                raise ValueError(f"Unknown method: {method}")
-            
-            # Calculate function value at sample point
-            function_value = f(sample_point)
-            
-            # Calculate area of the rectangle
-            rectangle_area = function_value * delta_x
-            
-            # Add to the sum
-            riemann_sum += rectangle_area
-            
-            # Store details for this step
-            step_details.append({
-                'subinterval_index': i + 1,
-                'x_left': x_left,
-                'x_right': x_right,
-                'sample_point': sample_point,
-                'function_value': function_value,
-                'rectangle_area': rectangle_area,
-                'running_sum': riemann_sum
-            })
-        
-        return riemann_sum, step_details
+        return result.total, result
     
     except Exception as e:
         raise ValueError(f"Error calculating Riemann sum: {str(e)}")
 
-def get_riemann_sum_steps(func_str, lower_bound, upper_bound, n, method='left', var_str="x"):
+@traced("riemann.steps")
+def get_riemann_sum_steps(func_str, lower_bound, upper_bound, n, method='left', var_str="x", result=None):
     """
     Generate formatted steps for Riemann sum calculation.
     
@@ -81,17 +384,22 @@ def get_riemann_sum_steps(func_str, lower_bound, upper_bound, n, method='left',
         lower_bound (float): Lower bound of the interval
         upper_bound (float): Upper bound of the interval
         n (int): Number of subdivisions
-        method (str): Method for selecting sample points ('left', 'right', 'midpoint')
+        method (str): Method for selecting sample points ('left', 'right', 'midpoint',
+            'trapezoid', 'simpson')
         var_str (str): Variable name
+        result (RiemannSumResult): Previously computed result to reuse (optional)
     
     Returns:
         list: List of formatted solution steps
     """
     try:
         # Calculate Riemann sum and get step details
-        riemann_sum, step_details = calculate_riemann_sum(
-            func_str, lower_bound, upper_bound, n, method, var_str
-        )
+        if result is None:
+            riemann_sum, step_details = calculate_riemann_sum(
+                func_str, lower_bound, upper_bound, n, method, var_str
+            )
+        else:
+            riemann_sum, step_details = result.total, result
         
         # Format the steps
         steps = []
@@ -105,7 +413,10 @@ def get_riemann_sum_steps(func_str, lower_bound, upper_bound, n, method='left',
         steps.append(f"Δ{var_str} = (b - a) / n = ({upper_bound} - {lower_bound}) / {n} = {delta_x}")
         
         # Step 3: Determine the sample points
-        steps.append(f"Step 3: Using the {method} endpoint method, calculate the sample points")
+        if method in ('trapezoid', 'simpson'):
+            steps.append(f"Step 3: Using the {method} rule, evaluate f at the endpoints of each subinterval")
+        else:
+            steps.append(f"Step 3: Using the {method} endpoint method, calculate the sample points")
         
         # Step 4: Calculate the sum
         steps.append(f"Step 4: Calculate the Riemann sum")
@@ -117,18 +428,29 @@ def get_riemann_sum_steps(func_str, lower_bound, upper_bound, n, method='left',
             sum_formula += f"Δ{var_str} × [f({var_str}_1) + f({var_str}_2) + ... + f({var_str}_{n})]"
         elif method == 'midpoint':
             sum_formula += f"Δ{var_str} × [f(m_1) + f(m_2) + ... + f(m_{n})]"
-            
+        elif method == 'trapezoid':
+            sum_formula += f"(Δ{var_str} / 2) × [f({var_str}_0) + 2f({var_str}_1) + ... + 2f({var_str}_{n-1}) + f({var_str}_{n})]"
+        elif method == 'simpson':
+            sum_formula += f"(Δ{var_str} / 6) × Σ [f({var_str}_(i-1)) + 4f(m_i) + f({var_str}_i)]"
+        
         steps.append(sum_formula)
         
         # Step 5: Detailed calculations
         steps.append(f"Step 5: Calculate each term in the sum")
         
-        for i, detail in enumerate(step_details):
-            if method == 'left':
-                steps.append(f"Rectangle {i+1}: {var_str} = {detail['sample_point']:.6f}, "
-                           f"f({var_str}) = {detail['function_value']:.6f}, "
-                           f"Area = {detail['function_value']:.6f} × {delta_x:.6f} = {detail['rectangle_area']:.6f}")
-            elif method == 'right':
+        # Solo se generan los detalles de los rectángulos que se van a mostrar
+        if n > MAX_DETAILED_STEPS:
+            head = MAX_DETAILED_STEPS // 2
+            shown = list(range(head)) + list(range(n - head, n))
+        else:
+            shown = list(range(n))
+        
+        for position, i in enumerate(shown):
+            if position > 0 and i != shown[position - 1] + 1:
+                steps.append(f"... ({i - shown[position - 1] - 1} rectangles omitted) ...")
+            
+            detail = step_details[i]
+            if method in ('left', 'right'):
                 steps.append(f"Rectangle {i+1}: {var_str} = {detail['sample_point']:.6f}, "
                            f"f({var_str}) = {detail['function_value']:.6f}, "
                            f"Area = {detail['function_value']:.6f} × {delta_x:.6f} = {detail['rectangle_area']:.6f}")
@@ -136,12 +458,25 @@ def get_riemann_sum_steps(func_str, lower_bound, upper_bound, n, method='left',
                 steps.append(f"Rectangle {i+1}: midpoint = {detail['sample_point']:.6f}, "
                            f"f(midpoint) = {detail['function_value']:.6f}, "
                            f"Area = {detail['function_value']:.6f} × {delta_x:.6f} = {detail['rectangle_area']:.6f}")
+            else:
+                steps.append(f"Subinterval {i+1}: [{detail['x_left']:.6f}, {detail['x_right']:.6f}], "
+                           f"average height = {detail['function_value']:.6f}, "
+                           f"Area = {detail['function_value']:.6f} × {delta_x:.6f} = {detail['rectangle_area']:.6f}")
         
         # Step 6: Final result
         steps.append(f"Step 6: Sum all rectangle areas")
         
-        sum_expression = " + ".join([f"{detail['rectangle_area']:.6f}" for detail in step_details])
+        if n > MAX_DETAILED_STEPS:
+            sum_expression = (" + ".join(f"{step_details[i]['rectangle_area']:.6f}" for i in shown[:head])
+                              + " + ... + "
+                              + " + ".join(f"{step_details[i]['rectangle_area']:.6f}" for i in shown[head:]))
+        else:
+            sum_expression = " + ".join([f"{detail['rectangle_area']:.6f}" for detail in step_details])
         steps.append(f"Riemann Sum = {sum_expression} = {riemann_sum:.6f}")
+        if step_details.precision == 'exact':
+            steps.append(f"Exact value (closed form with Faulhaber sums): R_{n} = {step_details.value}")
+        elif step_details.precision == 'mpmath':
+            steps.append(f"High-precision value (mpmath): R_{n} = {step_details.value}")
         
         return steps
     
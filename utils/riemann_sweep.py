@@ -0,0 +1,236 @@
+import math
+import numpy as np
+from utils.calculator import compile_expression
+from utils.riemann_sum import RIEMANN_METHODS, _evaluate_on_grid, compensated_sum
+from utils.tracing import span, traced
+
+# Factores de refinamiento admitidos: al duplicar, los puntos medios pasan a ser nodos;
+# al triplicar, los nodos y los puntos medios del nivel anterior se conservan
+SWEEP_RATIOS = (2, 3)
+
+# Niveles por defecto (n hasta 2^20 o 3^12) y máximo admitido
+DEFAULT_SWEEP_LEVELS = {2: 20, 3: 12}
+MAX_SWEEP_POINTS = 2 ** 24
+
+# Columnas de la tabla de Romberg; más allá domina el redondeo
+ROMBERG_MAX_COLUMNS = 6
+
+# Potencias de h del desarrollo del error de cada método (Euler-Maclaurin)
+_ERROR_POWERS = {
+    'left': lambda j: j,
+    'right': lambda j: j,
+    'midpoint': lambda j: 2 * j,
+    'trapezoid': lambda j: 2 * j,
+    'simpson': lambda j: 2 * j + 2
+}
+
+class RiemannSweepResult:
+    """
+    Riemann sums of one function for n = 1, r, r^2, ... and their extrapolation.
+    
+    values[k] is R_n for n[k]; romberg[k][j] is the j-th Richardson
+    extrapolation built from levels k - j .. k, and extrapolated[k] the last
+    column available at level k. Errors are measured against reference
+    (the given exact value, or the best extrapolation when none was given).
+    """
+    
+    def __init__(self, func_str, lower_bound, upper_bound, method, ratio, n, values, romberg, evaluations,
+                 reference=None, var_str="x"):
+        self.func_str = func_str
+        self.lower_bound = lower_bound
+        self.upper_bound = upper_bound
+        self.method = method
+        self.ratio = ratio
+        self.n = n
+        self.values = values
+        self.romberg = romberg
+        self.evaluations = evaluations
+        self.var_str = var_str
+        self.extrapolated = np.array([row[-1] for row in romberg])
+        self.reference_given = reference is not None
+        self.reference = float(reference) if reference is not None else float(self.extrapolated[-1])
+    
+    @property
+    def errors(self):
+        """numpy.ndarray: |R_n - reference| for every level."""
+        return np.abs(self.values - self.reference)
+    
+    @property
+    def extrapolated_errors(self):
+        """numpy.ndarray: |extrapolated - reference| for every level."""
+        return np.abs(self.extrapolated - self.reference)
+    
+    @property
+    def observed_orders(self):
+        """
+        numpy.ndarray: Observed convergence order p (error ~ n^-p) at every level.
+        
+        Computed from successive differences, so it needs no reference; the
+        first two levels (and levels already at rounding level) are NaN or infinite.
+        """
+        orders = np.full(self.values.size, np.nan)
+        differences = np.abs(np.diff(self.values))
+        with np.errstate(all='ignore'):
+            orders[2:] = np.log(differences[:-1] / differences[1:]) / math.log(self.ratio)
+        return orders
+    
+    @property
+    def separate_evaluations(self):
+        """int: Function evaluations that calling calculate_riemann_sum per level would need."""
+        per_level = {'left': 0, 'right': 0, 'midpoint': 0, 'trapezoid': 1, 'simpson': 1}
+        factor = 2 if self.method == 'simpson' else 1
+        return int(sum(factor * n + per_level[self.method] for n in self.n))
+    
+    def table(self):
+        """
+        Compact convergence table.
+        
+        Returns:
+            list: One dict per level with n, value, error, extrapolated,
+                  extrapolated_error and order
+        """
+        errors = self.errors
+        extrapolated_errors = self.extrapolated_errors
+        orders = self.observed_orders
+        return [
+            {
+                'n': int(self.n[k]),
+                'value': float(self.values[k]),
+                'error': float(errors[k]),
+                'extrapolated': float(self.extrapolated[k]),
+                'extrapolated_error': float(extrapolated_errors[k]),
+                'order': float(orders[k]) if np.isfinite(orders[k]) else None
+            }
+            for k in range(self.values.size)
+        ]
+
+def _combine(method, node_sum, mid_sum, f_a, f_b, h):
+    """R_n of a method from the sums over the left nodes and over the midpoints."""
+    left = node_sum * h
+    if method == 'left':
+        return left
+    if method == 'right':
+        return (node_sum - f_a + f_b) * h
+    if method == 'midpoint':
+        return mid_sum * h
+    trapezoid = (node_sum + (f_b - f_a) / 2) * h
+    if method == 'trapezoid':
+        return trapezoid
+    # Simpson por subintervalo: (T + 2M) / 3
+    return (trapezoid + 2 * mid_sum * h) / 3
+
+def romberg_table(values, ratio, method):
+    """
+    Richardson extrapolation of a sequence of Riemann sums.
+    
+    Each column removes the next term h^p of the method's error expansion:
+    T[k][j] = T[k][j-1] + (T[k][j-1] - T[k-1][j-1]) / (ratio^p - 1).
+    
+    Args:
+        values (sequence): R_n for n = ratio^0, ratio^1, ...
+        ratio (int): Refinement factor between levels
+        method (str): One of RIEMANN_METHODS
+    
+    Returns:
+        list: Rows of the triangular table (row k has min(k, ROMBERG_MAX_COLUMNS - 1) + 1 entries)
+    """
+    power = _ERROR_POWERS[method]
+    table = []
+    for k, value in enumerate(values):
+        row = [float(value)]
+        for j in range(1, min(k, ROMBERG_MAX_COLUMNS - 1) + 1):
+            factor = ratio ** power(j) - 1
+            row.append(row[j - 1] + (row[j - 1] - table[k - 1][j - 1]) / factor)
+        table.append(row)
+    return table
+
+@traced("riemann.sweep")
+def riemann_sweep(func_str, lower_bound, upper_bound, method='left', levels=None, ratio=2, var_str="x",
+                  reference=None):
+    """
+    Riemann sums for n = 1, ratio, ratio^2, ..., ratio^levels reusing every evaluation.
+    
+    The sums over the left nodes and over the midpoints are kept between
+    levels. With ratio 2 the midpoints of one level are the new nodes of the
+    next, so endpoint rules (and Simpson) only evaluate the new points; with
+    ratio 3 the old nodes and midpoints are both kept and only the new
+    thirds are evaluated. The whole sweep then costs about as much as its
+    finest level alone. Midpoint sums do not nest when doubling, so for the
+    midpoint rule ratio 3 is the refinement that reuses evaluations.
+    
+    Args:
+        func_str (str): String representation of the function
+        lower_bound (float): Lower bound of the interval
+        upper_bound (float): Upper bound of the interval
+        method (str): One of RIEMANN_METHODS
+        levels (int): Number of refinements (default DEFAULT_SWEEP_LEVELS[ratio])
+        ratio (int): Refinement factor, one of SWEEP_RATIOS
+        var_str (str): Variable name
+        reference (float): Exact value used for the error columns (optional)
+    
+    Returns:
+        RiemannSweepResult: Sums, Romberg table and evaluation count
+    """
+    try:
+        if method not in RIEMANN_METHODS:
+            raise ValueError(f"Unknown method: {method}")
+        if ratio not in SWEEP_RATIOS:
+            raise ValueError(f"Unsupported refinement ratio: {ratio}")
+        levels = DEFAULT_SWEEP_LEVELS[ratio] if levels is None else int(levels)
+        if levels < 0 or ratio ** levels > MAX_SWEEP_POINTS:
+            raise ValueError(f"levels must be between 0 and {int(math.log(MAX_SWEEP_POINTS, ratio))}")
+        
+        with span("riemann.parse"):
+            f = compile_expression(func_str, var_str).func
+        
+        a = float(lower_bound)
+        b = float(upper_bound)
+        
+        # Solo se evalúan los puntos que necesita el método: nodos, puntos medios o ambos
+        needs_nodes = method != 'midpoint'
+        needs_mids = method in ('midpoint', 'simpson')
+        
+        with span("riemann.sweep.evaluate", levels=levels, ratio=ratio):
+            f_a, f_b, f_mid = (float(v) for v in _evaluate_on_grid(f, np.array([a, b, (a + b) / 2])))
+            evaluations = 3
+            node_sum, mid_sum = f_a, f_mid
+            n, h = 1, b - a
+            ns, values = [], []
+            
+            def new_points(offsets):
+                # Suma de f en los desplazamientos (fracciones del paso actual) de cada celda
+                nonlocal evaluations
+                points = a + (np.arange(n)[:, None] + np.array(offsets)) * h
+                evaluations += points.size
+                return compensated_sum(_evaluate_on_grid(f, points.ravel()))
+            
+            for level in range(levels + 1):
+                ns.append(n)
+                values.append(_combine(method, node_sum, mid_sum, f_a, f_b, h))
+                if level == levels:
+                    break
+                
+                if ratio == 2:
+                    # Los puntos medios de este nivel son los nodos nuevos del siguiente
+                    if needs_mids:
+                        node_sum = math.fsum([node_sum, mid_sum])
+                        mid_sum = new_points([0.25, 0.75])
+                    else:
+                        node_sum = math.fsum([node_sum, new_points([0.5])])
+                else:
+                    # Al triplicar se conservan nodos y puntos medios; solo se añaden los tercios
+                    if needs_nodes:
+                        node_sum = math.fsum([node_sum, new_points([1 / 3, 2 / 3])])
+                    if needs_mids:
+                        mid_sum = math.fsum([mid_sum, new_points([1 / 6, 5 / 6])])
+                n *= ratio
+                h = (b - a) / n
+        
+        with span("riemann.sweep.extrapolate"):
+            table = romberg_table(values, ratio, method)
+        
+        return RiemannSweepResult(func_str, a, b, method, ratio, np.array(ns), np.array(values), table,
+                                  evaluations, reference, var_str)
+    
+    except Exception as e:
+        raise ValueError(f"Error calculating Riemann sweep: {str(e)}")
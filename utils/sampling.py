@@ -0,0 +1,165 @@
+import numpy as np
+
+# Tamaño de los bloques que se reevalúan cuando la evaluación vectorizada falla
+FALLBACK_CHUNK_SIZE = 64
+
+def _evaluate_block(f, x):
+    """Evaluate f over an array in one call and return a float array shaped like x."""
+    values = np.asarray(f(x))
+    if np.iscomplexobj(values):
+        # Solo se conservan los valores reales (parte imaginaria despreciable)
+        real = np.where(np.abs(values.imag) <= 1e-12 * np.maximum(1.0, np.abs(values.real)),
+                        values.real, np.nan)
+        values = real
+    return np.array(np.broadcast_to(values, x.shape), dtype=float)
+
+def _evaluate_point(f, x_val):
+    try:
+        value = complex(f(x_val))
+    except Exception:
+        return np.nan
+    if abs(value.imag) > 1e-12 * max(1.0, abs(value.real)):
+        return np.nan
+    return value.real
+
+def sample_function(f, x, chunk_size=FALLBACK_CHUNK_SIZE):
+    """
+    Evaluate a numeric function over a whole grid of points.
+    
+    The grid is evaluated with a single vectorized call under np.errstate so
+    that domain errors and overflows do not raise or warn. If that call
+    raises, the grid is split into chunks and only the chunks that raise are
+    evaluated point by point. Non-finite and non-real values are returned as
+    NaN, which Plotly renders as gaps instead of drawing them as zeros.
+    
+    Args:
+        f (callable): Vectorized numeric function (e.g. from lambdify)
+        x (array-like): Points where the function is evaluated
+        chunk_size (int): Size of the blocks re-evaluated after a failure
+    
+    Returns:
+        numpy.ndarray: Float array of function values with NaN where undefined
+    """
+    x = np.asarray(x, dtype=float)
+    with np.errstate(all='ignore'):
+        try:
+            y = _evaluate_block(f, x)
+        except Exception:
+            y = np.empty(x.shape, dtype=float)
+            flat_x = x.reshape(-1)
+            flat_y = y.reshape(-1)
+            for start in range(0, flat_x.size, chunk_size):
+                block = flat_x[start:start + chunk_size]
+                try:
+                    flat_y[start:start + chunk_size] = _evaluate_block(f, block)
+                except Exception:
+                    flat_y[start:start + chunk_size] = [_evaluate_point(f, x_val) for x_val in block]
+    
+    y[~np.isfinite(y)] = np.nan
+    return y
+
+# Parámetros por defecto del muestreo adaptativo de curvas
+ADAPTIVE_INITIAL_POINTS = 101
+ADAPTIVE_MAX_POINTS = 1000
+ADAPTIVE_TOLERANCE = 1e-3
+ADAPTIVE_MAX_DEPTH = 12
+
+def _refinement_scores(x, y, tol):
+    """
+    Score every interval of a sampled curve; intervals scoring above 1 need more points.
+    
+    The score is the deviation of each vertex from the chord of its neighbours
+    (a measure of how much the curve bends there), relative to tol times the
+    visible range of the curve. Intervals where the function switches between
+    defined and undefined get an infinite score so the edge gets located.
+    """
+    finite = np.isfinite(y)
+    if finite.any():
+        low, high = np.percentile(y[finite], [2, 98])
+        scale = high - low
+    else:
+        scale = 0.0
+    if not np.isfinite(scale) or scale <= 0:
+        scale = 1.0
+    
+    # Desviación de cada vértice interior respecto a la cuerda de sus vecinos
+    with np.errstate(all='ignore'):
+        t = (x[1:-1] - x[:-2]) / (x[2:] - x[:-2])
+        chord = y[:-2] + (y[2:] - y[:-2]) * t
+        vertex_error = np.abs(y[1:-1] - chord) / (tol * scale)
+    vertex_error = np.nan_to_num(vertex_error, nan=0.0, posinf=np.inf)
+    
+    scores = np.zeros(x.size - 1)
+    scores[:-1] = vertex_error
+    scores[1:] = np.maximum(scores[1:], vertex_error)
+    scores[finite[:-1] != finite[1:]] = np.inf
+    return scores
+
+def adaptive_sample(f, x_min, x_max, max_points=ADAPTIVE_MAX_POINTS, initial_points=ADAPTIVE_INITIAL_POINTS,
+                    tol=ADAPTIVE_TOLERANCE, max_depth=ADAPTIVE_MAX_DEPTH):
+    """
+    Sample a function for plotting, concentrating points where the curve bends or jumps.
+    
+    Starts from a coarse uniform grid and, in each round, bisects the intervals
+    whose neighbouring vertices deviate from a straight line by more than tol
+    (relative to the visible range) or that border an undefined region. All new
+    midpoints of a round are evaluated in one vectorized call. Refinement stops
+    when no interval needs it, the point budget is spent or max_depth rounds
+    have been done; when the budget is short the worst intervals go first.
+    
+    Args:
+        f (callable): Vectorized numeric function (e.g. from lambdify)
+        x_min (float): Left end of the plotted range
+        x_max (float): Right end of the plotted range
+        max_points (int): Maximum number of points returned
+        initial_points (int): Size of the initial uniform grid
+        tol (float): Allowed deviation from a straight line, as a fraction of the y range
+        max_depth (int): Maximum number of refinement rounds
+    
+    Returns:
+        tuple: (x, y) sorted NumPy arrays; y is NaN where the function is undefined
+    """
+    x = np.linspace(x_min, x_max, min(initial_points, max_points))
+    y = sample_function(f, x)
+    min_width = abs(x_max - x_min) * 1e-9
+    
+    for _ in range(max_depth):
+        budget = max_points - x.size
+        if budget <= 0 or x.size < 3:
+            break
+        
+        scores = _refinement_scores(x, y, tol)
+        candidates = np.flatnonzero((scores > 1) & (np.diff(x) > min_width))
+        if candidates.size == 0:
+            break
+        if candidates.size > budget:
+            candidates = candidates[np.argsort(scores[candidates])[::-1][:budget]]
+        candidates = np.sort(candidates)
+        
+        new_x = (x[candidates] + x[candidates + 1]) / 2
+        new_y = sample_function(f, new_x)
+        x = np.insert(x, candidates + 1, new_x)
+        y = np.insert(y, candidates + 1, new_y)
+    
+    return x, y
+
+def adaptive_sample_many(funcs, x_min, x_max, max_points=ADAPTIVE_MAX_POINTS, **kwargs):
+    """
+    Adaptively sample several functions on one shared grid.
+    
+    Each function is refined on its own and the resulting grids are merged, so
+    curves that are filled against each other share the same x values.
+    
+    Args:
+        funcs (list): Vectorized numeric functions
+        x_min (float): Left end of the plotted range
+        x_max (float): Right end of the plotted range
+        max_points (int): Point budget for each function
+        **kwargs: Extra options passed to adaptive_sample
+    
+    Returns:
+        tuple: (x, [y_1, y_2, ...]) with one value array per function
+    """
+    grids = [adaptive_sample(f, x_min, x_max, max_points=max_points, **kwargs)[0] for f in funcs]
+    x = np.unique(np.concatenate(grids))
+    return x, [sample_function(f, x) for f in funcs]
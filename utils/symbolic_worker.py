@@ -0,0 +1,240 @@
+import atexit
+import multiprocessing
+import os
+import threading
+import warnings
+import sympy as sp
+
+# Tiempo máximo (segundos) de una operación simbólica antes de cancelarla
+SYMBOLIC_TIMEOUT = float(os.environ.get("CALCUMASTER_SYMBOLIC_TIMEOUT", 10))
+
+# Número máximo de procesos de cálculo simbólico simultáneos
+SYMBOLIC_POOL_SIZE = int(os.environ.get("CALCUMASTER_SYMBOLIC_WORKERS", min(4, os.cpu_count() or 1)))
+
+class SymbolicTimeoutError(TimeoutError):
+    """Raised when a symbolic operation exceeds its deadline and its worker is killed."""
+
+def _worker_main(conn):
+    # Bucle del proceso trabajador: recibe (función, argumentos) y devuelve (ok, resultado)
+    while True:
+        try:
+            request = conn.recv()
+        except (EOFError, KeyboardInterrupt):
+            break
+        if request is None:
+            break
+        func, args = request
+        try:
+            response = (True, func(*args))
+        except Exception as e:
+            response = (False, e)
+        try:
+            conn.send(response)
+        except Exception as e:
+            # El resultado o la excepción no se pudo serializar
+            conn.send((False, RuntimeError(f"{type(e).__name__}: {e}")))
+
+def _get_context():
+    # forkserver evita duplicar los hilos del servidor de Streamlit y precarga SymPy una sola vez
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context("forkserver")
+        context.set_forkserver_preload(["sympy"])
+        return context
+    return multiprocessing.get_context("spawn")
+
+class SymbolicWorkerPool:
+    """
+    Pool of worker processes that run SymPy operations with a deadline.
+    
+    Each call is sent to an idle worker over a pipe. If the answer does not
+    arrive before the deadline the worker process is terminated (the only way
+    to stop a runaway integrate or solve) and a fresh one is started on the
+    next call, so a pathological input only costs its own caller the timeout.
+    At most size calls run at the same time; further callers wait for a free
+    worker. If worker processes cannot be started at all (OSError), calls run
+    in the current process without a deadline and a RuntimeWarning says so.
+    Workers that die before answering any call raise RuntimeError instead:
+    that usually means the main script is missing its
+    ``if __name__ == "__main__":`` guard (see get_symbolic_pool).
+    """
+    
+    def __init__(self, size=SYMBOLIC_POOL_SIZE):
+        self.size = max(1, size)
+        self._context = None
+        self._idle = []
+        self._busy = 0
+        self._condition = threading.Condition()
+        self._disabled = False
+        self._calls = 0
+        self._completed = 0
+        self._timeouts = 0
+    
+    def _start_worker(self):
+        if self._context is None:
+            self._context = _get_context()
+        parent_conn, child_conn = self._context.Pipe()
+        process = self._context.Process(target=_worker_main, args=(child_conn,), daemon=True)
+        process.start()
+        child_conn.close()
+        return process, parent_conn
+    
+    def _acquire(self):
+        with self._condition:
+            while not self._idle and self._busy >= self.size:
+                self._condition.wait()
+            self._busy += 1
+            self._calls += 1
+            worker = self._idle.pop() if self._idle else None
+        if worker is None:
+            try:
+                worker = self._start_worker()
+            except Exception:
+                self._release(None)
+                raise
+        return worker
+    
+    def _release(self, worker):
+        with self._condition:
+            self._busy -= 1
+            if worker is not None:
+                self._idle.append(worker)
+            self._condition.notify()
+    
+    @staticmethod
+    def _kill(worker):
+        process, conn = worker
+        conn.close()
+        process.terminate()
+        process.join(1)
+        if process.is_alive():
+            process.kill()
+            process.join()
+    
+    def run(self, func, *args, timeout=None):
+        """
+        Call func(*args) in a worker process and wait at most timeout seconds.
+        
+        Args:
+            func (callable): Picklable module-level function (e.g. sympy.integrate)
+            *args: Picklable arguments (SymPy expressions pickle fine)
+            timeout (float): Deadline in seconds (default SYMBOLIC_TIMEOUT)
+        
+        Returns:
+            The value returned by func
+        
+        Raises:
+            SymbolicTimeoutError: If the deadline expires; the worker is killed
+        """
+        timeout = SYMBOLIC_TIMEOUT if timeout is None else timeout
+        if self._disabled:
+            return func(*args)
+        try:
+            worker = self._acquire()
+        except OSError as e:
+            # Entornos sin soporte de procesos: se calcula en el proceso actual, avisando de que no hay límite
+            self._disabled = True
+            warnings.warn(f"no se pueden iniciar procesos de cálculo simbólico ({e}); los cálculos se "
+                          f"harán en este proceso sin tiempo límite", RuntimeWarning, stacklevel=2)
+            return func(*args)
+        
+        process, conn = worker
+        try:
+            conn.send((func, args))
+            if not conn.poll(timeout):
+                self._kill(worker)
+                worker = None
+                with self._condition:
+                    self._timeouts += 1
+                raise SymbolicTimeoutError(f"el cálculo simbólico superó el tiempo límite de {timeout:g} s")
+            ok, value = conn.recv()
+        except (EOFError, ConnectionError):
+            self._kill(worker)
+            worker = None
+            if not self._completed:
+                # Ningún trabajador ha llegado a responder: casi siempre falta la guarda de __main__
+                # en el script que se ejecutó (forkserver/spawn lo reimportan al iniciar cada trabajador)
+                raise RuntimeError("el proceso de cálculo simbólico terminó antes de responder; si se ejecuta "
+                                   "desde un script, su código debe estar bajo if __name__ == \"__main__\":")
+            raise RuntimeError("el proceso de cálculo simbólico terminó inesperadamente")
+        finally:
+            self._release(worker)
+        
+        with self._condition:
+            self._completed += 1
+        
+        if not ok:
+            raise value
+        return value
+    
+    def info(self):
+        """
+        Report the pool statistics.
+        
+        Returns:
+            dict: size, idle and busy workers, calls and timeouts
+        """
+        with self._condition:
+            return {
+                'size': self.size,
+                'idle': len(self._idle),
+                'busy': self._busy,
+                'calls': self._calls,
+                'timeouts': self._timeouts
+            }
+    
+    def shutdown(self):
+        """Stop every idle worker process."""
+        with self._condition:
+            workers, self._idle = self._idle, []
+        for process, conn in workers:
+            try:
+                conn.send(None)
+            except (OSError, ValueError):
+                pass
+            conn.close()
+            process.join(1)
+            if process.is_alive():
+                process.terminate()
+
+_default_pool = None
+_default_pool_lock = threading.Lock()
+
+def get_symbolic_pool():
+    """
+    Return the process-wide symbolic worker pool, creating it on first use.
+    
+    Workers are started with forkserver or spawn, which import the main
+    module again in each new process. A script that uses this module (even
+    indirectly, through solve_integral or the batch functions) must therefore
+    keep its top-level code under ``if __name__ == "__main__":``; otherwise
+    the workers fail at startup and every call raises RuntimeError.
+    """
+    global _default_pool
+    if _default_pool is None:
+        with _default_pool_lock:
+            if _default_pool is None:
+                _default_pool = SymbolicWorkerPool()
+                atexit.register(_default_pool.shutdown)
+    return _default_pool
+
+def run_symbolic(func, *args, timeout=None):
+    """
+    Run a SymPy operation in the shared worker pool with a deadline.
+    
+    Args:
+        func (callable): Picklable module-level function
+        *args: Arguments for func
+        timeout (float): Deadline in seconds (default SYMBOLIC_TIMEOUT)
+    
+    Returns:
+        The value returned by func
+    """
+    return get_symbolic_pool().run(func, *args, timeout=timeout)
+
+def symbolic_integrate(expr, *limits, timeout=None):
+    """sympy.integrate(expr, *limits) with a deadline."""
+    return run_symbolic(sp.integrate, expr, *limits, timeout=timeout)
+
+def symbolic_solve(equation, var, timeout=None):
+    """sympy.solve(equation, var) with a deadline."""
+    return run_symbolic(sp.solve, equation, var, timeout=timeout)
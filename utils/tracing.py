@@ -0,0 +1,235 @@
+import contextvars
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+# Registro estructurado (una línea JSON por traza) activado con CALCUMASTER_TRACE_LOG=1
+TRACE_LOG = os.environ.get("CALCUMASTER_TRACE_LOG", "").lower() in ("1", "true", "yes")
+
+# Puerto del endpoint /metrics en formato Prometheus (desactivado si no se define)
+METRICS_PORT = os.environ.get("CALCUMASTER_METRICS_PORT")
+
+logger = logging.getLogger("calcumaster.trace")
+if TRACE_LOG and not logger.handlers:
+    _handler = logging.StreamHandler(sys.stderr)
+    _handler.setFormatter(logging.Formatter("%(message)s"))
+    logger.addHandler(_handler)
+    logger.setLevel(logging.INFO)
+
+# Traza activa y span actual del contexto (hilo o tarea) que está calculando
+_current = contextvars.ContextVar("calcumaster_trace", default=None)
+
+_metrics_lock = threading.Lock()
+_metrics = {}
+
+class Span:
+    """One timed stage of a trace; start is relative to the start of the trace."""
+    
+    __slots__ = ("name", "start", "duration", "depth", "attributes", "error")
+    
+    def __init__(self, name, start, depth, attributes):
+        self.name = name
+        self.start = start
+        self.duration = None
+        self.depth = depth
+        self.attributes = attributes
+        self.error = None
+    
+    def as_dict(self):
+        return {
+            "name": self.name,
+            "start": self.start,
+            "duration": self.duration,
+            "depth": self.depth,
+            "attributes": self.attributes,
+            "error": self.error
+        }
+
+class Trace:
+    """
+    The spans recorded while a trace was collecting, in start order.
+    
+    Spans opened inside other spans get a larger depth, so the list reads as
+    an indented call tree.
+    """
+    
+    def __init__(self, name):
+        self.name = name
+        self.spans = []
+        self.started = time.perf_counter()
+        self.duration = None
+    
+    def as_dict(self):
+        return {"trace": self.name, "duration": self.duration, "spans": [s.as_dict() for s in self.spans]}
+
+def _record_metric(name, duration, failed):
+    with _metrics_lock:
+        entry = _metrics.setdefault(name, {'calls': 0, 'errors': 0, 'seconds': 0.0})
+        entry['calls'] += 1
+        entry['errors'] += failed
+        entry['seconds'] += duration
+
+@contextmanager
+def span(name, **attributes):
+    """
+    Time a stage of a computation.
+    
+    The duration always feeds the process-wide counters of stage_metrics; if
+    a trace is being collected in this context (see collect_trace) the span
+    is also added to it, nested under the span that is currently open.
+    
+    Args:
+        name (str): Stage name (dotted, e.g. "solve_integral.parse")
+        **attributes: Extra values stored with the span
+    
+    Yields:
+        Span or None: The recorded span (None when no trace is collecting)
+    """
+    state = _current.get()
+    record = token = None
+    start = time.perf_counter()
+    if state is not None:
+        trace, parent = state
+        record = Span(name, start - trace.started, parent.depth + 1 if parent else 0, attributes)
+        trace.spans.append(record)
+        token = _current.set((trace, record))
+    failed = False
+    try:
+        yield record
+    except BaseException as e:
+        failed = True
+        if record is not None:
+            record.error = str(e) or type(e).__name__
+        raise
+    finally:
+        duration = time.perf_counter() - start
+        if record is not None:
+            record.duration = duration
+            _current.reset(token)
+        _record_metric(name, duration, failed)
+
+def traced(name):
+    """Decorator that runs the whole function inside span(name)."""
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def annotate(**attributes):
+    """Add attributes to the innermost open span of the current trace (no-op without one)."""
+    state = _current.get()
+    if state is not None and state[1] is not None:
+        state[1].attributes.update(attributes)
+
+@contextmanager
+def collect_trace(name="request"):
+    """
+    Collect the spans of everything computed inside the block.
+    
+    When the block ends the trace is also written to the "calcumaster.trace"
+    logger as one JSON line (enabled with CALCUMASTER_TRACE_LOG=1 or any
+    handler configured for that logger).
+    
+    Yields:
+        Trace: The trace being filled
+    """
+    trace = Trace(name)
+    token = _current.set((trace, None))
+    try:
+        yield trace
+    finally:
+        trace.duration = time.perf_counter() - trace.started
+        _current.reset(token)
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(json.dumps(trace.as_dict(), ensure_ascii=False, default=str))
+
+def stage_metrics():
+    """
+    Report the accumulated counters of every stage seen by this process.
+    
+    Returns:
+        dict: For each stage name: calls, errors and seconds (total time)
+    """
+    with _metrics_lock:
+        return {name: dict(entry) for name, entry in _metrics.items()}
+
+def reset_metrics():
+    with _metrics_lock:
+        _metrics.clear()
+
+def _escape_label(value):
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def prometheus_metrics():
+    """
+    Render the stage counters in the Prometheus text exposition format.
+    
+    Returns:
+        str: calcumaster_stage_calls_total, calcumaster_stage_errors_total and
+             calcumaster_stage_seconds_total, labelled by stage
+    """
+    metrics = stage_metrics()
+    families = (
+        ("calcumaster_stage_calls_total", "calls", "Veces que se ejecutó cada etapa"),
+        ("calcumaster_stage_errors_total", "errors", "Ejecuciones de cada etapa que terminaron en error"),
+        ("calcumaster_stage_seconds_total", "seconds", "Tiempo acumulado de cada etapa en segundos")
+    )
+    lines = []
+    for metric, field, description in families:
+        lines.append(f"# HELP {metric} {description}")
+        lines.append(f"# TYPE {metric} counter")
+        for name in sorted(metrics):
+            lines.append(f'{metric}{{stage="{_escape_label(name)}"}} {metrics[name][field]}')
+    return "\n".join(lines) + "\n"
+
+_server = None
+_server_lock = threading.Lock()
+
+def start_metrics_server(port=None, host="0.0.0.0"):
+    """
+    Serve prometheus_metrics() at http://host:port/metrics from a daemon thread.
+    
+    Only one server is started per process; later calls return it.
+    
+    Args:
+        port (int): Port to listen on (default CALCUMASTER_METRICS_PORT)
+        host (str): Interface to bind
+    
+    Returns:
+        http.server.ThreadingHTTPServer or None: The server, or None when no port is configured
+    """
+    global _server
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+    
+    port = port if port is not None else METRICS_PORT
+    if not port:
+        return None
+    
+    class _MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.rstrip("/") != "/metrics":
+                self.send_error(404)
+                return
+            body = prometheus_metrics().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        
+        def log_message(self, format, *args):
+            pass
+    
+    with _server_lock:
+        if _server is None:
+            _server = ThreadingHTTPServer((host, int(port)), _MetricsHandler)
+            threading.Thread(target=_server.serve_forever, name="calcumaster-metrics", daemon=True).start()
+        return _server